@@ -0,0 +1,93 @@
+"""
+Stampede-guarded cache reads for expensive aggregates.
+
+The single-flight lock is a `cache.add` on the default cache, so it only
+spans processes when that cache is shared (CACHE_URL, see `is_shared`).
+On the LocMemCache fallback every gunicorn worker and run_workers holds
+its own lock and recomputes on its own; the guard then only covers the
+threads inside one process.
+"""
+
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 30
+WAIT_INTERVAL = 0.05
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared(alias='default'):
+    """
+    False when the `alias` cache lives inside each process (LocMemCache,
+    DummyCache), so gunicorn workers and run_workers each see their own.
+    """
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=None, beta=1.0, lock_timeout=LOCK_TIMEOUT):
+    """
+    Returns the cached value for `key`, calling `compute()` to fill it.
+    Guards expensive aggregates against cache stampedes:
+
+    - Single flight: only the caller that wins the `<key>:lock` key (an
+      atomic `cache.add`) recomputes; the rest keep serving what is cached.
+      Across processes only on a shared backend (see the module docstring).
+    - Probabilistic early expiry: a fresh entry is refreshed before it
+      expires with a probability that rises as expiry nears and with how
+      long `compute()` took last time (XFetch), so refreshes spread out
+      instead of all landing on the expiry instant.
+    - Stale while revalidate: an entry stays cached `stale_timeout` seconds
+      (default: `timeout`) past its expiry, and is served as is while the
+      lock holder refreshes it.
+
+    On a cold miss, callers that lose the lock wait up to `lock_timeout`
+    seconds for the winner's value, then compute it themselves.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, duration, expires_at = entry
+        # XFetch: -log(random()) is exponentially distributed around 1
+        if time.time() - duration * beta * math.log(1.0 - random.random()) < expires_at:
+            return value
+        refreshed = _refresh(key, compute, timeout, stale_timeout, lock_timeout)
+        return value if refreshed is None else refreshed[0]
+
+    deadline = time.monotonic() + lock_timeout
+    while True:
+        refreshed = _refresh(key, compute, timeout, stale_timeout, lock_timeout)
+        if refreshed is not None:
+            return refreshed[0]
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if time.monotonic() >= deadline:
+            return _store(key, compute, timeout, stale_timeout)
+
+
+def _refresh(key, compute, timeout, stale_timeout, lock_timeout):
+    # A 1-tuple so a computed None is told apart from "lock not acquired"
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, timeout=lock_timeout):
+        return None
+    try:
+        return (_store(key, compute, timeout, stale_timeout),)
+    finally:
+        cache.delete(lock_key)
+
+
+def _store(key, compute, timeout, stale_timeout):
+    started = time.monotonic()
+    value = compute()
+    duration = time.monotonic() - started
+    stale_timeout = timeout if stale_timeout is None else stale_timeout
+    cache.set(key, (value, duration, time.time() + timeout), timeout=timeout + stale_timeout)
+    return value
@@ -0,0 +1,38 @@
+import hashlib
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+
+def conditional_get(validator):
+    """
+    Method decorator for DRF handlers. A request whose `If-None-Match`
+    (or `If-Modified-Since`) still matches gets a 304 before the handler
+    runs, so nothing is serialised; other responses carry `ETag` and
+    `Last-Modified`:
+
+        @conditional_get(wallet_validator)
+        def me(self, request): ...
+
+    `validator(request, *args, **kwargs)` runs one cheap query and returns
+    `(state, last_modified)`, or `(None, None)` when the resource does not
+    exist. The ETag hashes `state` with the full path and the requesting
+    user, since responses vary by query string and owner.
+    """
+    def resolve(request, *args, **kwargs):
+        # condition() asks for the ETag and Last-Modified separately
+        if not hasattr(request, '_conditional_validators'):
+            request._conditional_validators = validator(request, *args, **kwargs)
+        return request._conditional_validators
+
+    def etag(request, *args, **kwargs):
+        state, _ = resolve(request, *args, **kwargs)
+        if state is None:
+            return None
+        raw = repr((request.get_full_path(), getattr(request.user, 'pk', None), state)).encode()
+        return hashlib.sha256(raw).hexdigest()[:40]
+
+    def last_modified(request, *args, **kwargs):
+        return resolve(request, *args, **kwargs)[1]
+
+    return method_decorator(condition(etag_func=etag, last_modified_func=last_modified))
@@ -5,4 +5,11 @@ class IsAdminUserSwaggerOnly(permissions.BasePermission):
     Allows access only to admin users for Swagger and Redoc views.
     """
     def has_permission(self, request, view):
-        return request.user and request.user.is_staff
\ No newline at end of file
+        return request.user and request.user.is_staff
+
+class IsAgent(permissions.BasePermission):
+    """
+    Allows access only to agent accounts.
+    """
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.is_agent)
@@ -26,6 +26,22 @@ CSRF_TRUSTED_ORIGINS = [
 MONNIFY_API_KEY = config('MONNIFY_API_KEY', default='')
 MONNIFY_CONTRACT_CODE = config('MONNIFY_CONTRACT_CODE', default='')
 MONNIFY_SECRET_KEY = config('MONNIFY_SECRET_KEY', default='')  # Used for webhook signature verification
+MONNIFY_BASE_URL = config('MONNIFY_BASE_URL', default='https://api.monnify.com')
+MONNIFY_CONNECT_TIMEOUT = config('MONNIFY_CONNECT_TIMEOUT', default=3.05, cast=float)  # Seconds
+MONNIFY_READ_TIMEOUT = config('MONNIFY_READ_TIMEOUT', default=10.0, cast=float)  # Seconds
+MONNIFY_MAX_RETRIES = config('MONNIFY_MAX_RETRIES', default=3, cast=int)  # Retries on timeouts, 429 and 5xx
+MONNIFY_POOL_SIZE = config('MONNIFY_POOL_SIZE', default=10, cast=int)  # Keep-alive connections per process
+MONNIFY_BREAKER_THRESHOLD = config('MONNIFY_BREAKER_THRESHOLD', default=5, cast=int)  # Failures before failing fast
+MONNIFY_BREAKER_RESET = config('MONNIFY_BREAKER_RESET', default=30.0, cast=float)  # Seconds before a trial call
+MONNIFY_WEBHOOK_INBOX = config('MONNIFY_WEBHOOK_INBOX', default=True, cast=bool)  # Queue credits for batched apply instead of crediting in the request
+MONNIFY_POOL_TARGET = config('MONNIFY_POOL_TARGET', default=200, cast=int)  # Unassigned reserved accounts kept ready for signups
+MONNIFY_POOL_REFILL_AT = config('MONNIFY_POOL_REFILL_AT', default=100, cast=int)  # Queue a refill at or below this depth
+MONNIFY_POOL_LOW_WATER = config('MONNIFY_POOL_LOW_WATER', default=20, cast=int)  # Log a warning at or below this depth
+MONNIFY_POOL_REFILL_CONCURRENCY = config('MONNIFY_POOL_REFILL_CONCURRENCY', default=4, cast=int)  # Monnify calls in flight per refill
+MONNIFY_POOL_ACCOUNT_NAME = config('MONNIFY_POOL_ACCOUNT_NAME', default='Wallet Customer')  # Customer details pooled accounts are reserved under; payers see this name, not the holder's, since assignment does not update it
+MONNIFY_POOL_ACCOUNT_EMAIL = config('MONNIFY_POOL_ACCOUNT_EMAIL', default='wallets@example.com')
+MONNIFY_PROVISION_CONCURRENCY = config('MONNIFY_PROVISION_CONCURRENCY', default=8, cast=int)  # Threads reserving accounts in provision_wallets
+MONNIFY_PROVISION_RATE = config('MONNIFY_PROVISION_RATE', default=10.0, cast=float)  # Monnify calls per second in provision_wallets; 0 for no limit
 
 # ─── INSTALLED APPS ─────────────────────────────────────────────────────────────
 INSTALLED_APPS = [
@@ -45,6 +61,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'wallets',
     'marketplace',
+    'jobs',
 
     'django.contrib.sites',
     'allauth',
@@ -158,12 +175,55 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 # ─── CACHING ───────────────────────────────────────────────────────────────────
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-wallet-dashboard',
+# The web workers and run_workers share cached state (balances, single-flight
+# locks) only through a shared backend: redis://host:6379/0, or
+# memcached://host:11211 with pymemcache installed. Without CACHE_URL each
+# process gets its own LocMemCache.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
     }
-}
+elif CACHE_URL.startswith('memcached://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': CACHE_URL.removeprefix('memcached://'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-wallet-dashboard',
+        }
+    }
+
+WALLET_HISTORY_MAX = config('WALLET_HISTORY_MAX', default=50, cast=int)  # Most transactions ?history=N embeds in wallet responses
+DASHBOARD_COUNTER_SLOTS = config('DASHBOARD_COUNTER_SLOTS', default=16, cast=int)  # Rows per dashboard counter, spreading concurrent increments
+DASHBOARD_COUNTERS_RECOMPUTE_INTERVAL = config('DASHBOARD_COUNTERS_RECOMPUTE_INTERVAL', default=60 * 60, cast=int)  # Seconds between exact recounts
+RECONCILE_SETTLE_SECONDS = config('RECONCILE_SETTLE_SECONDS', default=300, cast=int)  # reconcile_wallets only checkpoints transactions older than this
+WALLET_BALANCE_CACHE = config('WALLET_BALANCE_CACHE', default=bool(CACHE_URL), cast=bool)  # Serve /wallet/balance/ from the cache; needs a shared CACHE_URL
+WALLET_BALANCE_CACHE_TIMEOUT = config('WALLET_BALANCE_CACHE_TIMEOUT', default=300, cast=int)  # Backstop TTL; balance writes refresh entries
+WALLET_CONCURRENCY = config('WALLET_CONCURRENCY', default='atomic')  # 'optimistic' writes top-ups/withdrawals with a version check and retry
+WALLET_OPTIMISTIC_RETRIES = config('WALLET_OPTIMISTIC_RETRIES', default=5, cast=int)  # Version conflicts retried before a 409
+BULK_TRANSFER_MAX_LINES = config('BULK_TRANSFER_MAX_LINES', default=10000, cast=int)  # Recipients per /wallet/bulk-transfer/ request
+
+# ─── LEDGER ────────────────────────────────────────────────────────────────────
+LEDGER_CHECKPOINT_INTERVAL = config('LEDGER_CHECKPOINT_INTERVAL', default=500, cast=int)  # Legs per balance checkpoint
+LEDGER_CHECKPOINT_SETTLE_SECONDS = config('LEDGER_CHECKPOINT_SETTLE_SECONDS', default=300, cast=int)  # Checkpoints only cover legs older than this
+
+# ─── IDEMPOTENCY ───────────────────────────────────────────────────────────────
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24, cast=int)  # Seconds a stored response is replayable
+
+# ─── JOB QUEUE ─────────────────────────────────────────────────────────────────
+JOBS_VISIBILITY_TIMEOUT = config('JOBS_VISIBILITY_TIMEOUT', default=300, cast=int)  # Seconds before a stuck job is reclaimed
+JOBS_RETRY_BACKOFF = config('JOBS_RETRY_BACKOFF', default=2, cast=int)  # Retry n waits BACKOFF ** n seconds
+JOBS_MAX_BACKOFF = config('JOBS_MAX_BACKOFF', default=60 * 60, cast=int)
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=1.0, cast=float)  # Idle worker sleep
 
 # ─── WEASYPRINT ─────────────────────────────────────────────────────────────────
 WEASYPRINT_BASEURL = BASE_DIR / 'static'
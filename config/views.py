@@ -14,9 +14,13 @@ from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from config.caching import get_or_compute
 from wallets.models import Wallet
 from marketplace.models import Product, Purchase
 
+OVERVIEW_CACHE_KEY = 'dashboard_overview_counts'
+OVERVIEW_CACHE_TIMEOUT = 60
+
 # 🏠 Home Endpoint
 def home(request):
     return HttpResponse("<h2>👋 Welcome to Musa's Django API</h2>")
@@ -83,13 +87,18 @@ def metadata_overview(request):
 @permission_classes([AllowAny])
 def dashboard_overview(request):
     data = {
+        **get_or_compute(OVERVIEW_CACHE_KEY, _overview_counts, OVERVIEW_CACHE_TIMEOUT),
+        "server_time": now()
+    }
+    return JsonResponse(data)
+
+def _overview_counts():
+    return {
         "users": get_user_model().objects.count(),
         "wallets": Wallet.objects.count(),
         "products": Product.objects.count(),
         "purchases": Purchase.objects.count(),
-        "server_time": now()
     }
-    return JsonResponse(data)
 
 # 🧮 Agent Dashboard Data (for React Frontend)
 @swagger_auto_schema(
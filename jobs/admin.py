@@ -0,0 +1,23 @@
+# jobs/admin.py
+
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'priority', 'attempts', 'run_at', 'updated_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'last_error')
+    readonly_fields = ('created_at', 'updated_at')
+    ordering = ('-id',)
+    actions = ('retry_jobs',)
+
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status__in=[Job.QUEUED, Job.RUNNING]).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(), locked_until=None, locked_by='', last_error='',
+        )
+        self.message_user(request, f"{updated} job(s) queued for retry.")
+    retry_jobs.short_description = "Retry selected jobs"
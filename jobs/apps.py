@@ -0,0 +1,13 @@
+# jobs/apps.py
+
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        # Register every app's tasks.py so workers can resolve job names
+        autodiscover_modules('tasks')
@@ -0,0 +1,102 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs import queue
+
+
+def _process_main(batch, poll_interval, threads):
+    # Child process: Django is already configured (fork) or re-imported (spawn)
+    import django
+    django.setup()
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    _run_threads(stop_event, threads, batch, poll_interval)
+
+
+def _run_threads(stop_event, threads, batch, poll_interval):
+    workers = [
+        threading.Thread(
+            target=queue.run_worker,
+            args=(stop_event,),
+            kwargs={'batch': batch, 'poll_interval': poll_interval},
+            name=f"job-worker-{i}",
+            daemon=True,
+        )
+        for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(timeout=0.5)
+    except KeyboardInterrupt:
+        # Let in-flight jobs finish; unfinished ones are reclaimed after their visibility timeout
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (a thread pool, or several processes each with its own threads)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help="Worker threads per process")
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes; above 1 forks child processes")
+        parser.add_argument('--batch', type=int, default=1, help="Jobs claimed per round trip")
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=getattr(settings, 'JOBS_POLL_INTERVAL', 1.0),
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument('--once', action='store_true', help="Run every due job, then exit")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            ran = queue.drain(batch=max(options['batch'], 10))
+            self.stdout.write(self.style.SUCCESS(f"✅ Ran {ran} job(s)"))
+            return
+
+        threads, processes = max(options['threads'], 1), max(options['processes'], 1)
+        batch, poll_interval = options['batch'], options['poll_interval']
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Starting {processes} process(es) × {threads} thread(s); Ctrl+C to stop"
+        ))
+
+        if processes == 1:
+            stop_event = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+            _run_threads(stop_event, threads, batch, poll_interval)
+            self.stdout.write(self.style.SUCCESS("✅ Workers stopped"))
+            return
+
+        # Children must not inherit the parent's open DB connections
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=_process_main, args=(batch, poll_interval, threads), name=f"job-process-{i}")
+            for i in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def stop_children(*_):
+            # Children finish their current job on SIGTERM
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        signal.signal(signal.SIGTERM, stop_children)
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            stop_children()
+            for child in children:
+                child.join()
+        self.stdout.write(self.style.SUCCESS("✅ Workers stopped"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='dedupe_key',
+            field=models.CharField(blank=True, help_text='Set by enqueue_once while queued; cleared when claimed', max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# jobs/models.py
+
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A unit of background work, stored in the database and claimed by
+    `manage.py run_workers`.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100, help_text="Registered task name")
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not claimed before this time")
+    locked_until = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Visibility timeout; a running job past this is reclaimed",
+    )
+    locked_by = models.CharField(max_length=100, blank=True)
+    dedupe_key = models.CharField(
+        max_length=64, null=True, blank=True, unique=True,
+        help_text="Set by enqueue_once while queued; cleared when claimed",
+    )
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Claim scan: queued jobs by priority, then due time
+            models.Index(
+                fields=['-priority', 'run_at', 'id'],
+                name='job_queued_claim',
+                condition=models.Q(status='queued'),
+            ),
+            # Reclaim scan: running jobs whose visibility timeout lapsed
+            models.Index(
+                fields=['locked_until'],
+                name='job_running_lock',
+                condition=models.Q(status='running'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task}#{self.pk} ({self.status})"
+
+    def extend_lease(self, seconds):
+        """
+        Pushes `locked_until` to `seconds` from now while this worker still
+        holds the job. Returns False once the lease has lapsed and another
+        worker reclaimed it, so a long task can stop instead of running twice.
+        """
+        locked_until = timezone.now() + timedelta(seconds=seconds)
+        extended = Job.objects.filter(pk=self.pk, locked_by=self.locked_by, status=Job.RUNNING).update(
+            locked_until=locked_until, updated_at=timezone.now(),
+        )
+        if extended:
+            self.locked_until = locked_until
+        return bool(extended)
@@ -0,0 +1,286 @@
+# jobs/queue.py
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+_running = threading.local()
+
+
+class UnknownTask(Exception):
+    """
+    Raised when a job names a task that no tasks.py registered.
+    """
+
+
+class LeaseLost(Exception):
+    """
+    Raised by `keep_lease` once another worker has reclaimed the job this
+    thread is running.
+    """
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def visibility_timeout():
+    return _setting('JOBS_VISIBILITY_TIMEOUT', 300)
+
+
+def backoff(attempts):
+    """
+    Seconds to wait before retry number `attempts`: 2, 4, 8, ... capped
+    at JOBS_MAX_BACKOFF.
+    """
+    base = _setting('JOBS_RETRY_BACKOFF', 2)
+    return min(base ** attempts, _setting('JOBS_MAX_BACKOFF', 60 * 60))
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def dedupe_key(task_name, kwargs):
+    payload = json.dumps([task_name, kwargs], sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# -------------------------------------------------------------------
+# Registration and enqueueing
+# -------------------------------------------------------------------
+class Task:
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, priority=None, delay=0, **kwargs):
+        """
+        Stores a Job for this task. Inside a transaction the job only becomes
+        visible to workers once it commits, together with the caller's rows.
+        """
+        return self._create(kwargs, priority, delay)
+
+    def enqueue_once(self, priority=None, delay=0, **kwargs):
+        """
+        Enqueues unless a job for this task with the same arguments is
+        already waiting. Suits consumers that drain a backlog: a burst of
+        triggers collapses into one queued run.
+
+        Waiting jobs hold a unique `dedupe_key` until a worker claims them,
+        so two concurrent callers cannot both insert one: the loser's insert
+        fails and it returns the winner's job instead. A job waiting to be
+        retried after a failure has no key and does not count.
+        """
+        key = dedupe_key(self.name, kwargs)
+        while True:
+            waiting = Job.objects.filter(dedupe_key=key).first()
+            if waiting is not None:
+                return waiting
+            try:
+                with transaction.atomic():
+                    return self._create(kwargs, priority, delay, dedupe_key=key)
+            except IntegrityError:
+                # Raced another enqueue_once; read its job (or retry if already claimed)
+                continue
+
+    def _create(self, kwargs, priority, delay, **fields):
+        return Job.objects.create(
+            task=self.name,
+            kwargs=kwargs,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            **fields,
+        )
+
+
+def task(name=None, priority=0, max_attempts=5):
+    """
+    Registers a function as a background task:
+
+        @task(priority=10)
+        def send_receipt(purchase_id): ...
+
+        send_receipt.enqueue(purchase_id=purchase.pk)
+
+    Arguments must be JSON-serialisable keyword arguments.
+    """
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        registered = Task(func, task_name, priority, max_attempts)
+        REGISTRY[task_name] = registered
+        return registered
+    return decorator
+
+
+# -------------------------------------------------------------------
+# Claiming
+# -------------------------------------------------------------------
+def _claimable(now):
+    return Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now)
+
+
+def claim(limit=1, worker=None):
+    """
+    Claims up to `limit` due jobs for this worker and returns them.
+
+    On PostgreSQL candidates are locked with SELECT ... FOR UPDATE SKIP
+    LOCKED, so concurrent workers never wait on each other. Elsewhere
+    (SQLite) each candidate is claimed with a conditional UPDATE and lost
+    races are skipped.
+    """
+    worker = worker or worker_name()
+    now = timezone.now()
+    claim_fields = dict(
+        status=Job.RUNNING,
+        attempts=F('attempts') + 1,
+        locked_until=now + timedelta(seconds=visibility_timeout()),
+        locked_by=worker[:100],
+        dedupe_key=None,
+    )
+    candidates = Job.objects.filter(_claimable(now)).order_by('-priority', 'run_at', 'id')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(candidates.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**claim_fields)
+    else:
+        ids = []
+        for job_id in candidates.values_list('id', flat=True)[:limit]:
+            if Job.objects.filter(_claimable(now), id=job_id).update(**claim_fields):
+                ids.append(job_id)
+
+    return list(Job.objects.filter(id__in=ids).order_by('-priority', 'run_at', 'id'))
+
+
+# -------------------------------------------------------------------
+# Running
+# -------------------------------------------------------------------
+def current_job():
+    """
+    The Job this thread is running, or None outside a worker.
+    """
+    return getattr(_running, 'job', None)
+
+
+def heartbeat():
+    """
+    Extends the running job's lease by another JOBS_VISIBILITY_TIMEOUT.
+    Tasks that may outlive the timeout call it between units of work,
+    outside any open transaction. Returns False when the lease was lost
+    to another worker and the task should stop; True when it was extended
+    or when called outside a worker (e.g. a task run inline in a test).
+    """
+    job = current_job()
+    if job is None:
+        return True
+    return job.extend_lease(visibility_timeout())
+
+
+def keep_lease(*args, **kwargs):
+    """
+    `heartbeat` as a progress callback (`on_batch=keep_lease`): renews the
+    lease, or raises LeaseLost so the task stops instead of running twice.
+    """
+    if not heartbeat():
+        raise LeaseLost(f"{current_job()} was reclaimed by another worker")
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records the outcome. Failures are retried with
+    exponential backoff until `max_attempts`, then marked FAILED.
+    """
+    _running.job = job
+    try:
+        registered = REGISTRY.get(job.task)
+        if registered is None:
+            raise UnknownTask(job.task)
+        result = registered(**job.kwargs)
+    except Exception as exc:
+        logger.warning("Job %s failed (attempt %s/%s): %s", job, job.attempts, job.max_attempts, exc)
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts or isinstance(exc, UnknownTask):
+            changes = dict(status=Job.FAILED, locked_until=None, last_error=error)
+        else:
+            changes = dict(
+                status=Job.QUEUED,
+                run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+                locked_until=None,
+                last_error=error,
+            )
+    else:
+        changes = dict(status=Job.DONE, locked_until=None, result=result, last_error='')
+    finally:
+        _running.job = None
+
+    # Only the current lock holder may record the outcome
+    Job.objects.filter(id=job.id, locked_by=job.locked_by, status=Job.RUNNING).update(
+        updated_at=timezone.now(), **changes
+    )
+    for field, value in changes.items():
+        setattr(job, field, value)
+    return job
+
+
+def work(batch=1, worker=None):
+    """
+    Claims and runs one batch of jobs. Returns how many ran.
+    """
+    jobs = claim(limit=batch, worker=worker)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
+
+
+def run_worker(stop_event, batch=1, poll_interval=1.0):
+    """
+    Worker loop used by `run_workers`: runs jobs until `stop_event` is
+    set, sleeping `poll_interval` seconds whenever the queue is empty.
+    """
+    worker = worker_name()
+    while not stop_event.is_set():
+        close_old_connections()
+        try:
+            ran = work(batch=batch, worker=worker)
+        except Exception:
+            logger.exception("Worker %s could not claim jobs", worker)
+            ran = 0
+        if not ran:
+            stop_event.wait(poll_interval)
+    close_old_connections()
+
+
+def drain(batch=10):
+    """
+    Runs jobs until none are due. Used by `run_workers --once` and tests.
+    """
+    total = 0
+    while True:
+        ran = work(batch=batch)
+        if not ran:
+            return total
+        total += ran
@@ -0,0 +1,181 @@
+# jobs/tests/test_queue.py
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from jobs import queue
+from jobs.models import Job
+from users.models import OTP
+from users.services.otp_services import generate_otp_for_user
+from wallets.models import Wallet
+from wallets.tasks import provision_virtual_account, render_dashboard_pdf
+from wallets.views import export_dashboard_pdf
+
+User = get_user_model()
+
+calls = []
+
+
+@queue.task(name='tests.record')
+def record(value):
+    calls.append(value)
+    return {'value': value}
+
+
+@queue.task(name='tests.heartbeat')
+def beat():
+    return {'extended': queue.heartbeat()}
+
+
+@queue.task(name='tests.explode', max_attempts=2)
+def explode():
+    raise ValueError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_by_priority(self):
+        record.enqueue(value='low')
+        record.enqueue(value='high', priority=5)
+        self.assertEqual(queue.drain(), 2)
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.DONE})
+        self.assertEqual(Job.objects.get(kwargs__value='low').result, {'value': 'low'})
+
+    def test_delayed_job_waits(self):
+        record.enqueue(value='later', delay=60)
+        self.assertEqual(queue.drain(), 0)
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        record.enqueue(value='once')
+        self.assertEqual(len(queue.claim(worker='a')), 1)
+        self.assertEqual(queue.claim(worker='b'), [])
+
+    def test_visibility_timeout_reclaims_stuck_job(self):
+        job = record.enqueue(value='stuck')
+        queue.claim(worker='crashed')
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        reclaimed = queue.claim(worker='b')
+        self.assertEqual([j.pk for j in reclaimed], [job.pk])
+        self.assertEqual(reclaimed[0].attempts, 2)
+
+    @override_settings(JOBS_VISIBILITY_TIMEOUT=600)
+    def test_heartbeat_extends_the_lease(self):
+        job = beat.enqueue()
+        claimed = queue.claim(worker='a')[0]
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() + timedelta(seconds=1))
+
+        self.assertEqual(queue.run_job(claimed).result, {'extended': True})
+        self.assertIsNone(queue.current_job())
+
+    def test_lost_lease_cannot_be_extended(self):
+        record.enqueue(value='stuck')
+        stale = queue.claim(worker='crashed')[0]
+        Job.objects.filter(pk=stale.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        queue.claim(worker='b')
+        self.assertFalse(stale.extend_lease(60))
+
+    def test_keep_lease_stops_a_reclaimed_task(self):
+        job = record.enqueue(value='stuck')
+        stale = queue.claim(worker='crashed')[0]
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        queue.claim(worker='b')
+
+        with patch.object(queue._running, 'job', stale, create=True), self.assertRaises(queue.LeaseLost):
+            queue.keep_lease()
+
+    def test_enqueue_once_collapses_until_claimed(self):
+        first = record.enqueue_once(value='x')
+        self.assertEqual(record.enqueue_once(value='x'), first)
+        self.assertNotEqual(record.enqueue_once(value='y'), first)
+
+        queue.claim(limit=2)
+        self.assertNotEqual(record.enqueue_once(value='x').pk, first.pk)
+
+    def test_waiting_dedupe_key_is_unique(self):
+        job = record.enqueue_once(value='x')
+        # What a concurrent enqueue_once that missed the lookup runs into
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(task=job.task, kwargs=job.kwargs, dedupe_key=job.dedupe_key)
+
+    @override_settings(JOBS_RETRY_BACKOFF=2)
+    def test_retry_with_backoff_then_fail(self):
+        job = explode.enqueue()
+        queue.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=1))
+        self.assertIn('boom', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        queue.work()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_unknown_task_fails_immediately(self):
+        Job.objects.create(task='tests.missing')
+        queue.work()
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+
+@override_settings(MONNIFY_POOL_TARGET=0)
+class QueuedSideEffectTests(TestCase):
+    def test_signup_queues_virtual_account(self):
+        user = User.objects.create_user(phone_number='+2348000000090', password='pass')
+        self.assertIsNone(user.wallet.account_number)
+        job = Job.objects.get(task=provision_virtual_account.name)
+
+        account = {'account_number': '0123456790', 'bank_name': 'Moniepoint'}
+        with patch('wallets.tasks.create_virtual_account', return_value=account) as monnify:
+            queue.drain()
+        monnify.assert_called_once()
+        self.assertEqual(Wallet.objects.get(user=user).account_number, '0123456790')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_otp_is_delivered_by_worker(self):
+        user = User.objects.create_user(phone_number='+2348000000091', password='pass')
+        with patch('users.tasks.send_otp_to_user', return_value=True) as send:
+            otp = generate_otp_for_user(user, purpose='signup')
+            send.assert_not_called()
+            with patch('wallets.tasks.create_virtual_account', side_effect=RuntimeError):
+                queue.drain()
+        send.assert_called_once_with(user.phone_number, otp.code, via='sms')
+        self.assertTrue(OTP.objects.filter(pk=otp.pk).exists())
+
+    @override_settings(STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    def test_pdf_export_is_queued_then_served(self):
+        factory = RequestFactory()
+        response = export_dashboard_pdf(factory.get('/admin/wallets/wallet/export-report/', {'range': '30'}))
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(task=render_dashboard_pdf.name)
+        self.assertEqual(job.kwargs['params'], {'range': '30'})
+
+        poll = factory.get('/admin/wallets/wallet/export-report/', {'job': job.pk})
+        self.assertEqual(export_dashboard_pdf(poll).status_code, 202)
+
+        # Rendering needs WeasyPrint; store the worker's output directly
+        path = default_storage.save('reports/test.pdf', ContentFile(b'%PDF-1.7'))
+        Job.objects.filter(pk=job.pk).update(status=Job.DONE, result={'path': path})
+        response = export_dashboard_pdf(poll)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.7')
+
+    def test_pdf_export_poll_with_bad_job_id_is_404(self):
+        poll = RequestFactory().get('/admin/wallets/wallet/export-report/', {'job': 'abc'})
+        with self.assertRaises(Http404):
+            export_dashboard_pdf(poll)
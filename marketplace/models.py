@@ -3,6 +3,7 @@ from django.db import models, transaction as db_transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from wallets.models import Wallet, Transaction as WalletTransaction
+from wallets.services.balance import InsufficientFunds, debit_wallet
 
 
 class Category(models.Model):
@@ -54,6 +55,22 @@ class Product(models.Model):
 
     class Meta:
         ordering = ['provider', 'product_type', 'value']
+        indexes = [
+            # Active catalog listing in Meta.ordering, and the API's provider/value ordering.
+            # Partial indexes, since `WHERE active` on a bare boolean can't seek a composite key.
+            models.Index(
+                fields=['provider', 'product_type', 'value'],
+                condition=models.Q(active=True),
+                name='product_active_catalog',
+            ),
+            models.Index(
+                fields=['provider', 'value'],
+                condition=models.Q(active=True),
+                name='product_active_provider_value',
+            ),
+            # Catalog ETag: MAX(updated_at) and COUNT(*) read this index alone
+            models.Index(fields=['updated_at'], name='product_updated_at'),
+        ]
 
     def __str__(self):
         return f"{self.get_provider_display()} {self.get_product_type_display()} {self.value}"
@@ -79,29 +96,32 @@ class Purchase(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='purchase_user_timestamp'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} → {self.product.name} ({self.amount})"
 
     def save(self, *args, **kwargs):
         with db_transaction.atomic():
-            wallet = Wallet.objects.select_for_update().get(user=self.user)
+            wallet = Wallet.objects.only('id').get(user=self.user)
             self.amount = self.product.price
 
-            if wallet.balance < self.amount:
+            try:
+                balance_after = debit_wallet(wallet.pk, self.amount)
+            except InsufficientFunds:
                 raise ValidationError("Insufficient wallet balance for purchase.")
 
-            wallet.balance -= self.amount
-            wallet.save(update_fields=['balance'])
-
             super().save(*args, **kwargs)
 
             WalletTransaction.objects.create(
                 wallet=wallet,
-                transaction_type=WalletTransaction.Type.PURCHASE,
+                transaction_type=WalletTransaction.PURCHASE,
                 amount=self.amount,
+                balance_after=balance_after,
                 bundle=self.product,
                 description=f"Purchased {self.product.name}"
             )
 
-            # 💡 Hook for commissions, referral rewards, or promo tracking can go here
\ No newline at end of file
+            # 💡 Hook for commissions, referral rewards, or promo tracking can go here
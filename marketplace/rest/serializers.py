@@ -1,5 +1,7 @@
+from django.db import transaction as db_transaction
 from rest_framework import serializers
 from wallets.models import Transaction
+from wallets.services.balance import InsufficientFunds, debit_wallet
 from marketplace.models import Product, Purchase, Category
 
 
@@ -54,19 +56,21 @@ class BuyBundleSerializer(serializers.Serializer):
 
         if wallet is None:
             raise serializers.ValidationError("No wallet found for user.")
-        if wallet.balance < bundle.price:
-            raise serializers.ValidationError("Insufficient wallet balance.")
-
-        wallet.balance -= bundle.price
-        wallet.save()
-
-        return Transaction.objects.create(
-            wallet=wallet,
-            transaction_type=Transaction.Type.PURCHASE,
-            amount=bundle.price,
-            bundle=bundle,
-            description=description
-        )
+
+        with db_transaction.atomic():
+            try:
+                balance_after = debit_wallet(wallet.pk, bundle.price)
+            except InsufficientFunds:
+                raise serializers.ValidationError("Insufficient wallet balance.")
+
+            return Transaction.objects.create(
+                wallet=wallet,
+                transaction_type=Transaction.PURCHASE,
+                amount=bundle.price,
+                balance_after=balance_after,
+                bundle=bundle,
+                description=description
+            )
 
 
 class PurchaseSerializer(serializers.ModelSerializer):
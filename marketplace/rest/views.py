@@ -1,9 +1,12 @@
+from django.db.models import Count, Max
 from rest_framework import status, viewsets, permissions, filters
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from config.conditional import conditional_get
 from marketplace.models import Product, Purchase, Category
 from wallets.models import Transaction
+from wallets.idempotency import idempotent
 from marketplace.rest.serializers import (
     BuyBundleSerializer,
     ProductSerializer,
@@ -12,6 +15,28 @@ from marketplace.rest.serializers import (
 )
 
 
+def catalog_validator(request, *args, **kwargs):
+    """
+    Conditional GET state for the product catalog: the newest product edit
+    plus the product count, which catches deletions.
+    """
+    stats = Product.objects.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return (stats['count'], stats['last_modified']), stats['last_modified']
+
+
+class CatalogConditionalGetMixin:
+    """
+    Answers repeat catalog reads with 304 until a product changes.
+    """
+    @conditional_get(catalog_validator)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get(catalog_validator)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
 class BuyBundleView(APIView):
     """
     POST /api/marketplace/rest/buy-bundle/
@@ -19,6 +44,7 @@ class BuyBundleView(APIView):
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent('buy-bundle')
     def post(self, request):
         serializer = BuyBundleSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
@@ -33,7 +59,7 @@ class BuyBundleView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(CatalogConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     GET /api/products/
     List & retrieve active airtime and data bundles.
@@ -47,7 +73,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['provider', 'value']
 
 
-class PopularProductViewSet(viewsets.ReadOnlyModelViewSet):
+class PopularProductViewSet(CatalogConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     GET /api/products/popular/
     Returns bundles flagged as popular.
@@ -74,6 +100,10 @@ class PurchaseViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Purchase.objects.filter(user=self.request.user)
 
+    @idempotent('purchase')
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -88,7 +118,7 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
 
 
-class ProviderViewSet(viewsets.ReadOnlyModelViewSet):
+class ProviderViewSet(CatalogConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     GET /api/providers/
     Grouped product listing by provider type (MTN, GLO, etc).
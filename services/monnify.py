@@ -1,32 +1,401 @@
+import asyncio
+import base64
+import random
+import threading
+import time
+
+import httpx
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
 
-MONNIFY_BASE_URL = "https://api.monnify.com/api/v1"
-API_KEY = settings.MONNIFY_API_KEY
-CONTRACT_CODE = settings.MONNIFY_CONTRACT_CODE
+DEFAULT_BASE_URL = "https://api.monnify.com"
+TOKEN_CACHE_KEY = "monnify:access_token"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
-def create_virtual_account(user):
-    url = f"{MONNIFY_BASE_URL}/reserved-accounts"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "accountReference": f"user-{user.id}",
-        "accountName": user.get_full_name(),
-        "currencyCode": "NGN",
-        "contractCode": CONTRACT_CODE,
-        "customerEmail": user.email,
-        "customerName": user.get_full_name()
-    }
-
-    response = requests.post(url, json=payload, headers=headers)
-    data = response.json()
-
-    if response.status_code == 200:
+
+class MonnifyError(Exception):
+    """
+    Monnify returned an error, or could not be reached after all retries.
+    """
+    def __init__(self, message, status_code=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class MonnifyUnavailable(MonnifyError):
+    """
+    Raised without a network call while the circuit breaker is open.
+    """
+
+
+class _Retry(Exception):
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets one trial call through (half-open).
+    A success closes it again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at >= self.reset_timeout:
+                # Half-open: admit this caller and push the window forward for the rest
+                self.opened_at = self.clock()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = self.clock()
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the threads of a bulk job: `acquire()` blocks
+    until a call fits within `rate` calls per second, allowing bursts of
+    up to `burst`.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = burst
+        self.updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+class _MonnifyBase:
+    """
+    Request building, retry policy and response parsing shared by the
+    sync and async clients.
+    """
+
+    def __init__(self, base_url=None, api_key=None, secret_key=None, contract_code=None,
+                 connect_timeout=None, read_timeout=None, max_retries=None, backoff=None,
+                 breaker=None):
+        self.base_url = (base_url or getattr(settings, 'MONNIFY_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        self.api_key = api_key if api_key is not None else settings.MONNIFY_API_KEY
+        self.secret_key = secret_key if secret_key is not None else settings.MONNIFY_SECRET_KEY
+        self.contract_code = contract_code if contract_code is not None else settings.MONNIFY_CONTRACT_CODE
+        self.connect_timeout = connect_timeout or getattr(settings, 'MONNIFY_CONNECT_TIMEOUT', 3.05)
+        self.read_timeout = read_timeout or getattr(settings, 'MONNIFY_READ_TIMEOUT', 10.0)
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, 'MONNIFY_MAX_RETRIES', 3)
+        self.backoff = backoff if backoff is not None else getattr(settings, 'MONNIFY_RETRY_BACKOFF', 0.25)
+        self.breaker = breaker or CircuitBreaker(
+            threshold=getattr(settings, 'MONNIFY_BREAKER_THRESHOLD', 5),
+            reset_timeout=getattr(settings, 'MONNIFY_BREAKER_RESET', 30.0),
+        )
+
+    # ----------------------------------------------------------------
+    # Policy
+    # ----------------------------------------------------------------
+    def _delay(self, attempt):
+        # Full jitter: uniform over [0, backoff * 2^attempt]
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _basic_auth(self):
+        raw = f"{self.api_key}:{self.secret_key}".encode()
+        return f"Basic {base64.b64encode(raw).decode()}"
+
+    def _token_cache_key(self):
+        return f"{TOKEN_CACHE_KEY}:{self.api_key}"
+
+    def _check(self, status_code, body):
+        """
+        Raises _Retry for transient failures, MonnifyError for the rest, and
+        returns the response body otherwise.
+        """
+        if status_code in RETRY_STATUSES:
+            raise _Retry(f"HTTP {status_code}")
+        if status_code >= 400 or not body.get('requestSuccessful', True):
+            message = body.get('responseMessage') or f"HTTP {status_code}"
+            raise MonnifyError(f"Monnify error: {message}", status_code=status_code, body=body)
+        return body
+
+    @staticmethod
+    def _token_from(body):
+        token = body['responseBody']
+        # Refresh a minute early so a token never expires mid-request
+        return token['accessToken'], max(int(token.get('expiresIn', 300)) - 60, 1)
+
+    def _reserved_account_payload(self, reference, name, email):
+        return {
+            "accountReference": reference,
+            "accountName": name,
+            "currencyCode": "NGN",
+            "contractCode": self.contract_code,
+            "customerEmail": email,
+            "customerName": name,
+            "getAllAvailableBanks": False,
+        }
+
+    @staticmethod
+    def _account_from(body):
+        account = body['responseBody']
+        if 'accountNumber' not in account and account.get('accounts'):
+            account = account['accounts'][0]
         return {
-            "account_number": data['responseBody']['accountNumber'],
-            "bank_name": data['responseBody']['bankName']
+            "account_number": account['accountNumber'],
+            "bank_name": account['bankName'],
         }
-    else:
-        raise Exception(f"Monnify error: {data}")
\ No newline at end of file
+
+    @staticmethod
+    def _is_duplicate_reference(error):
+        return error.status_code in (400, 409, 422) and 'already' in str(error).lower()
+
+
+class MonnifyClient(_MonnifyBase):
+    """
+    Thread-safe Monnify client for WSGI workers and job workers.
+
+    One `requests.Session` keeps TLS connections alive across calls; each
+    call has connect/read timeouts, transient failures (timeouts, 429,
+    5xx) are retried with jittered exponential backoff, the OAuth token is
+    cached until shortly before it expires, and a circuit breaker fails
+    fast while Monnify is down.
+    """
+
+    def __init__(self, pool_size=None, **kwargs):
+        super().__init__(**kwargs)
+        pool_size = pool_size or getattr(settings, 'MONNIFY_POOL_SIZE', 10)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._token_lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def _send(self, method, path, **kwargs):
+        timeout = (self.connect_timeout, self.read_timeout)
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            raise _Retry(type(exc).__name__)
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        return response.status_code, body
+
+    def _call(self, method, path, authenticated=True, guarded=True, **kwargs):
+        if guarded and not self.breaker.allow():
+            raise MonnifyUnavailable("Monnify circuit breaker is open")
+
+        refreshed = False
+        attempt = 0
+        while True:
+            headers = {"Authorization": self.access_token(guarded=False) if authenticated else self._basic_auth()}
+            try:
+                status_code, body = self._send(method, path, headers=headers, **kwargs)
+                if status_code == 401 and authenticated and not refreshed:
+                    # Token revoked or expired early: fetch a new one once
+                    cache.delete(self._token_cache_key())
+                    refreshed = True
+                    continue
+                body = self._check(status_code, body)
+            except _Retry as retry:
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise MonnifyError(f"Monnify unavailable after {attempt + 1} attempts: {retry.reason}")
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return body
+
+    def access_token(self, guarded=True):
+        token = cache.get(self._token_cache_key())
+        if token:
+            return f"Bearer {token}"
+        with self._token_lock:
+            token = cache.get(self._token_cache_key())
+            if not token:
+                body = self._call('POST', '/api/v1/auth/login', authenticated=False, guarded=guarded)
+                token, ttl = self._token_from(body)
+                cache.set(self._token_cache_key(), token, timeout=ttl)
+        return f"Bearer {token}"
+
+    def get_reserved_account(self, reference):
+        body = self._call('GET', f"/api/v2/bank-transfer/reserved-accounts/{reference}")
+        return self._account_from(body)
+
+    def reserve_account(self, reference, name, email):
+        try:
+            body = self._call(
+                'POST', '/api/v2/bank-transfer/reserved-accounts',
+                json=self._reserved_account_payload(reference, name, email),
+            )
+        except MonnifyError as error:
+            # A retried POST whose first attempt succeeded; read the account back
+            if not self._is_duplicate_reference(error):
+                raise
+            return self.get_reserved_account(reference)
+        return self._account_from(body)
+
+    def create_virtual_account(self, user):
+        return self.reserve_account(f"user-{user.id}", user.get_full_name(), user.email)
+
+    def release_account(self, reference):
+        self._call('DELETE', f"/api/v1/bank-transfer/reserved-accounts/reference/{reference}")
+
+    def release_virtual_account(self, user_id):
+        self.release_account(f"user-{user_id}")
+
+
+class AsyncMonnifyClient(_MonnifyBase):
+    """
+    `httpx.AsyncClient` counterpart of MonnifyClient for ASGI deployments,
+    with the same timeouts, retries, token cache and circuit breaker.
+    Use one instance per event loop and `await client.aclose()` on shutdown.
+    """
+
+    def __init__(self, pool_size=None, **kwargs):
+        super().__init__(**kwargs)
+        pool_size = pool_size or getattr(settings, 'MONNIFY_POOL_SIZE', 10)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+        self._token_lock = asyncio.Lock()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _send(self, method, path, **kwargs):
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except (httpx.TransportError, httpx.TimeoutException) as exc:
+            raise _Retry(type(exc).__name__)
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        return response.status_code, body
+
+    async def _call(self, method, path, authenticated=True, guarded=True, **kwargs):
+        if guarded and not self.breaker.allow():
+            raise MonnifyUnavailable("Monnify circuit breaker is open")
+
+        refreshed = False
+        attempt = 0
+        while True:
+            headers = {"Authorization": await self.access_token(guarded=False) if authenticated else self._basic_auth()}
+            try:
+                status_code, body = await self._send(method, path, headers=headers, **kwargs)
+                if status_code == 401 and authenticated and not refreshed:
+                    await cache.adelete(self._token_cache_key())
+                    refreshed = True
+                    continue
+                body = self._check(status_code, body)
+            except _Retry as retry:
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise MonnifyError(f"Monnify unavailable after {attempt + 1} attempts: {retry.reason}")
+                await asyncio.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return body
+
+    async def access_token(self, guarded=True):
+        token = await cache.aget(self._token_cache_key())
+        if token:
+            return f"Bearer {token}"
+        async with self._token_lock:
+            token = await cache.aget(self._token_cache_key())
+            if not token:
+                body = await self._call('POST', '/api/v1/auth/login', authenticated=False, guarded=guarded)
+                token, ttl = self._token_from(body)
+                await cache.aset(self._token_cache_key(), token, timeout=ttl)
+        return f"Bearer {token}"
+
+    async def get_reserved_account(self, reference):
+        body = await self._call('GET', f"/api/v2/bank-transfer/reserved-accounts/{reference}")
+        return self._account_from(body)
+
+    async def reserve_account(self, reference, name, email):
+        try:
+            body = await self._call(
+                'POST', '/api/v2/bank-transfer/reserved-accounts',
+                json=self._reserved_account_payload(reference, name, email),
+            )
+        except MonnifyError as error:
+            if not self._is_duplicate_reference(error):
+                raise
+            return await self.get_reserved_account(reference)
+        return self._account_from(body)
+
+    async def create_virtual_account(self, user):
+        return await self.reserve_account(f"user-{user.id}", user.get_full_name(), user.email)
+
+    async def release_account(self, reference):
+        await self._call('DELETE', f"/api/v1/bank-transfer/reserved-accounts/reference/{reference}")
+
+    async def release_virtual_account(self, user_id):
+        await self.release_account(f"user-{user_id}")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Process-wide MonnifyClient, so every caller shares one connection pool.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MonnifyClient()
+    return _client
+
+
+def create_virtual_account(user):
+    return get_client().create_virtual_account(user)
@@ -0,0 +1,166 @@
+"""
+Local stand-in for the Monnify API, for benchmarks and tests.
+
+Serves the auth and reserved-account endpoints MonnifyClient uses, with
+configurable latency and failure injection:
+
+    python -m services.monnify_stub --port 8765 --latency 0.05 --error-rate 0.02
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, token_ttl=3600):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.fail_next = 0          # Respond 503 to this many upcoming requests
+        self.stall_next = 0         # Sleep past any sane read timeout for this many requests
+        self.logins = 0
+        self.requests = 0
+        self.connections = set()
+        self.accounts = {}
+        self.released = []
+        self.lock = threading.Lock()
+
+
+class MonnifyStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep-alive, so connection pooling is observable
+    wbufsize = -1                   # Headers and body leave in one segment
+    disable_nagle_algorithm = True
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _before(self):
+        state = self.state
+        with state.lock:
+            state.requests += 1
+            state.connections.add(self.client_address)
+            fail = state.fail_next > 0 or random.random() < state.error_rate
+            state.fail_next = max(state.fail_next - 1, 0)
+            stall = state.stall_next > 0
+            state.stall_next = max(state.stall_next - 1, 0)
+        time.sleep(state.latency + random.uniform(0, state.jitter) + (5 if stall else 0))
+        if fail:
+            self._reply(503, {'requestSuccessful': False, 'responseMessage': 'Service unavailable'})
+            return False
+        return True
+
+    def do_POST(self):
+        body = self._read_json()
+        if not self._before():
+            return
+        if self.path == '/api/v1/auth/login':
+            if not self.headers.get('Authorization', '').startswith('Basic '):
+                return self._reply(401, {'requestSuccessful': False, 'responseMessage': 'Unauthorized'})
+            with self.state.lock:
+                self.state.logins += 1
+            return self._reply(200, {
+                'requestSuccessful': True,
+                'responseBody': {'accessToken': f"stub-token-{self.state.logins}", 'expiresIn': self.state.token_ttl},
+            })
+        if self.path == '/api/v2/bank-transfer/reserved-accounts':
+            if not self.headers.get('Authorization', '').startswith('Bearer stub-token-'):
+                return self._reply(401, {'requestSuccessful': False, 'responseMessage': 'Unauthorized'})
+            reference = body.get('accountReference')
+            with self.state.lock:
+                duplicate = reference in self.state.accounts
+                if not duplicate:
+                    issued = len(self.state.accounts) + len(self.state.released)
+                    self.state.accounts[reference] = f"{issued + 1:010d}"
+                number = self.state.accounts[reference]
+            if duplicate:
+                return self._reply(422, {
+                    'requestSuccessful': False,
+                    'responseMessage': 'Account reference already exists',
+                })
+            return self._reply(200, {
+                'requestSuccessful': True,
+                'responseBody': {'accountReference': reference, 'accountNumber': number, 'bankName': 'Stub Bank'},
+            })
+        self._reply(404, {'requestSuccessful': False, 'responseMessage': 'Not found'})
+
+    def do_GET(self):
+        if not self._before():
+            return
+        prefix = '/api/v2/bank-transfer/reserved-accounts/'
+        if self.path.startswith(prefix):
+            number = self.state.accounts.get(self.path[len(prefix):])
+            if number:
+                return self._reply(200, {
+                    'requestSuccessful': True,
+                    'responseBody': {'accountNumber': number, 'bankName': 'Stub Bank'},
+                })
+        self._reply(404, {'requestSuccessful': False, 'responseMessage': 'Not found'})
+
+    def do_DELETE(self):
+        if not self._before():
+            return
+        prefix = '/api/v1/bank-transfer/reserved-accounts/reference/'
+        if self.path.startswith(prefix):
+            reference = self.path[len(prefix):]
+            with self.state.lock:
+                number = self.state.accounts.pop(reference, None)
+                if number:
+                    self.state.released.append(reference)
+            if number:
+                return self._reply(200, {
+                    'requestSuccessful': True,
+                    'responseBody': {'accountReference': reference, 'accountNumber': number},
+                })
+        self._reply(404, {'requestSuccessful': False, 'responseMessage': 'Not found'})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128        # Don't let the listen backlog add SYN-retry latency
+
+
+def start_stub(host='127.0.0.1', port=0, **options):
+    """
+    Starts the stub on a daemon thread. Returns `(server, state)`; the URL
+    is `f"http://{host}:{server.server_port}"`. Call `server.shutdown()`.
+    """
+    state = StubState(**options)
+    handler = type('Handler', (MonnifyStubHandler,), {'state': state})
+    server = StubServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random latency up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server, _ = start_stub(args.host, args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    print(f"Monnify stub listening on http://{args.host}:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,64 @@
+# tests/test_caching.py
+
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from config.caching import get_or_compute
+
+KEY = 'test_caching:figures'
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return {'total': self.calls}
+
+    def test_fresh_value_is_reused(self):
+        self.assertEqual(get_or_compute(KEY, self.compute, 60), {'total': 1})
+        self.assertEqual(get_or_compute(KEY, self.compute, 60), {'total': 1})
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_served_while_another_worker_refreshes(self):
+        cache.set(KEY, ('stale', 1.0, time.time() - 5), timeout=60)
+        cache.add(f'{KEY}:lock', 1)
+        self.assertEqual(get_or_compute(KEY, self.compute, 60), 'stale')
+        self.assertEqual(self.calls, 0)
+
+    def test_expired_value_is_refreshed_by_lock_winner(self):
+        cache.set(KEY, ('stale', 1.0, time.time() - 5), timeout=60)
+        self.assertEqual(get_or_compute(KEY, self.compute, 60), {'total': 1})
+        self.assertIsNone(cache.get(f'{KEY}:lock'))
+
+    def test_early_expiry_refreshes_before_deadline(self):
+        cache.set(KEY, ('old', 2.0, time.time() + 1), timeout=60)
+        with mock.patch('config.caching.random.random', return_value=0.0):
+            self.assertEqual(get_or_compute(KEY, self.compute, 60), 'old')
+        # -log(1 - 0.9) * 2s reaches past the remaining second
+        with mock.patch('config.caching.random.random', return_value=0.9):
+            self.assertEqual(get_or_compute(KEY, self.compute, 60), {'total': 1})
+
+    def test_cold_miss_computes_once(self):
+        def slow():
+            time.sleep(0.2)
+            return self.compute()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_or_compute(KEY, slow, 60))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{'total': 1}] * 5)
+
+    def test_cold_miss_computes_after_lock_timeout(self):
+        cache.add(f'{KEY}:lock', 1)
+        self.assertEqual(get_or_compute(KEY, self.compute, 60, lock_timeout=0), {'total': 1})
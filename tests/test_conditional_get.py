@@ -0,0 +1,110 @@
+# tests/test_conditional_get.py
+
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from marketplace.models import Product
+from wallets.models import Transaction, Wallet
+from wallets.services.balance import credit_wallet, set_shard_count
+
+User = get_user_model()
+
+
+class WalletConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(phone_number='+2348000000601', password='pass')
+        self.client.force_authenticate(self.user)
+        self.wallet = self.user.wallet
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('100.00'))
+        self.tx = Transaction.objects.create(
+            wallet=self.wallet, transaction_type=Transaction.TOPUP, amount=Decimal('100.00'), description='Opening',
+        )
+
+    def test_me_answers_304_before_serializing(self):
+        first = self.client.get('/api/v1/wallet/me/')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertTrue(first['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', first)
+
+        # Only the validator query runs; no wallet, serializer or history queries
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/v1/wallet/me/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b'')
+
+    def test_balance_change_invalidates_etag(self):
+        etag = self.client.get('/api/v1/wallet/me/')['ETag']
+        self.client.post('/api/v1/wallet/top-up/', {'amount': '5.00'})
+
+        response = self.client.get('/api/v1/wallet/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_sharded_write_invalidates_etag(self):
+        set_shard_count(self.wallet.pk, 3)
+        etag = self.client.get('/api/v1/wallet/me/')['ETag']
+        with mock.patch('wallets.services.balance.random.randrange', return_value=2):
+            credit_wallet(self.wallet.pk, Decimal('5.00'))
+
+        response = self.client.get('/api/v1/wallet/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_transaction_list_and_detail(self):
+        listing = self.client.get('/api/v1/transactions/')
+        filtered = self.client.get('/api/v1/transactions/', {'transaction_type': Transaction.TOPUP})
+        self.assertNotEqual(listing['ETag'], filtered['ETag'])
+        self.assertEqual(
+            self.client.get('/api/v1/transactions/', HTTP_IF_NONE_MATCH=listing['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        detail = self.client.get(f'/api/v1/transactions/{self.tx.pk}/')
+        self.assertEqual(
+            self.client.get(f'/api/v1/transactions/{self.tx.pk}/', HTTP_IF_NONE_MATCH=detail['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        Transaction.objects.create(
+            wallet=self.wallet, transaction_type=Transaction.WITHDRAW, amount=Decimal('1.00'), description='New',
+        )
+        self.assertEqual(
+            self.client.get('/api/v1/transactions/', HTTP_IF_NONE_MATCH=listing['ETag']).status_code,
+            status.HTTP_200_OK,
+        )
+
+    def test_etag_is_per_user(self):
+        etag = self.client.get('/api/v1/wallet/me/')['ETag']
+        other = User.objects.create_user(phone_number='+2348000000602', password='pass')
+        self.client.force_authenticate(other)
+        self.assertEqual(
+            self.client.get('/api/v1/wallet/me/', HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_200_OK,
+        )
+
+
+class CatalogConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='MTN 1GB', code='MTN-1GB', product_type=Product.DATA, provider=Product.MTN,
+            value=Decimal('1000'), price=Decimal('300'),
+        )
+
+    def test_catalog_304_until_product_changes(self):
+        etag = self.client.get('/api/v1/marketplace/products/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/marketplace/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.product.price = Decimal('290')
+        self.product.save()
+        self.assertEqual(
+            self.client.get('/api/v1/marketplace/products/', HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_200_OK,
+        )
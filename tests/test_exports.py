@@ -0,0 +1,73 @@
+# tests/test_exports.py
+
+import csv
+import gzip
+import io
+from decimal import Decimal
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+
+from config.exports import CSVExport
+from users.admin import UserAdmin
+from wallets.admin import TransactionAdmin
+from wallets.models import Transaction
+
+User = get_user_model()
+
+
+def read_csv(response):
+    body = b''.join(response.streaming_content)
+    if response['Content-Type'] == 'application/gzip':
+        body = gzip.decompress(body)
+    return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+
+
+class StreamingExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = []
+        for i in range(3):
+            cls.users.append(User.objects.create_user(phone_number=f'+23480000000{70 + i}', password='pass'))
+        for user in cls.users:
+            for _ in range(2):
+                Transaction.objects.create(wallet=user.wallet, transaction_type=Transaction.TOPUP, amount=Decimal('10.00'))
+
+    def setUp(self):
+        self.request = RequestFactory().post('/admin/')
+        self.tx_admin = TransactionAdmin(Transaction, AdminSite())
+
+    def test_transaction_export_is_one_query(self):
+        queryset = self.tx_admin.get_queryset(self.request)
+        response = self.tx_admin.export_csv(self.request, queryset)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        with self.assertNumQueries(1):
+            rows = read_csv(response)
+
+        self.assertEqual(rows[0], ['ID', 'User', 'Type', 'Amount', 'Timestamp'])
+        self.assertEqual(len(rows), 7)
+        phones = {row[1] for row in rows[1:]}
+        self.assertEqual(phones, {user.phone_number for user in self.users})
+
+    def test_gzip_export(self):
+        queryset = self.tx_admin.get_queryset(self.request)
+        response = self.tx_admin.export_csv_gzip(self.request, queryset)
+        self.assertIn('transactions.csv.gz', response['Content-Disposition'])
+        self.assertEqual(read_csv(response), read_csv(self.tx_admin.export_csv(self.request, queryset)))
+
+    def test_user_export(self):
+        user_admin = UserAdmin(User, AdminSite())
+        rows = read_csv(user_admin.export_users_csv(self.request, User.objects.order_by('phone_number')))
+        self.assertEqual(rows[0][:2], ['Email', 'Phone'])
+        self.assertEqual([row[1] for row in rows[1:]], sorted(user.phone_number for user in self.users))
+
+    def test_formatter_and_small_chunks(self):
+        export = CSVExport(
+            [('Amount', 'amount', lambda value: f"NGN {value}")],
+            'amounts.csv',
+            chunk_size=1,
+        )
+        rows = read_csv(export.response(Transaction.objects.order_by('id')))
+        self.assertEqual(rows[1:], [['NGN 10.00']] * 6)
@@ -0,0 +1,135 @@
+# tests/test_monnify.py
+
+import asyncio
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from services.monnify import (
+    AsyncMonnifyClient,
+    CircuitBreaker,
+    MonnifyClient,
+    MonnifyError,
+    MonnifyUnavailable,
+    RateLimiter,
+)
+from services.monnify_stub import start_stub
+
+
+class StubUser:
+    email = 'stub@example.com'
+
+    def __init__(self, pk):
+        self.id = pk
+
+    def get_full_name(self):
+        return f"Stub User {self.id}"
+
+
+class MonnifyClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server, cls.state = start_stub()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.state.fail_next = self.state.stall_next = 0
+        self.state.logins = 0
+        self.state.connections.clear()
+
+    def _client(self, cls=MonnifyClient, **kwargs):
+        options = dict(
+            base_url=self.base_url, api_key='key', secret_key='secret', contract_code='code',
+            backoff=0.001, read_timeout=0.5,
+        )
+        options.update(kwargs)
+        return cls(**options)
+
+    def test_creates_account_and_caches_token(self):
+        client = self._client()
+        first = client.create_virtual_account(StubUser(1))
+        second = client.create_virtual_account(StubUser(2))
+        self.assertEqual(first['bank_name'], 'Stub Bank')
+        self.assertNotEqual(first['account_number'], second['account_number'])
+        self.assertEqual(self.state.logins, 1)
+
+    def test_reuses_connections(self):
+        client = self._client()
+        for pk in range(10, 15):
+            client.create_virtual_account(StubUser(pk))
+        self.assertEqual(len(self.state.connections), 1)
+
+    def test_retries_transient_errors(self):
+        client = self._client()
+        client.access_token()
+        self.state.fail_next = 2
+        self.assertIn('account_number', client.create_virtual_account(StubUser(20)))
+
+    def test_retried_post_reads_existing_account(self):
+        client = self._client()
+        created = client.create_virtual_account(StubUser(30))
+        self.assertEqual(client.create_virtual_account(StubUser(30)), created)
+
+    def test_read_timeout_is_bounded(self):
+        client = self._client(read_timeout=0.2, max_retries=0)
+        client.access_token()
+        self.state.stall_next = 1
+        with self.assertRaisesMessage(MonnifyError, 'ReadTimeout'):
+            client.create_virtual_account(StubUser(40))
+
+    def test_circuit_breaker_fails_fast(self):
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=2, reset_timeout=10, clock=lambda: now[0])
+        client = self._client(max_retries=0, breaker=breaker)
+        client.access_token()
+
+        self.state.fail_next = 2
+        for pk in (50, 51):
+            with self.assertRaises(MonnifyError):
+                client.create_virtual_account(StubUser(pk))
+        self.assertTrue(breaker.is_open)
+
+        requests_before = self.state.requests
+        with self.assertRaises(MonnifyUnavailable):
+            client.create_virtual_account(StubUser(52))
+        self.assertEqual(self.state.requests, requests_before)
+
+        now[0] = 11.0  # Half-open: one trial call goes through and closes the breaker
+        client.create_virtual_account(StubUser(53))
+        self.assertFalse(breaker.is_open)
+
+    def test_async_client(self):
+        async def run():
+            client = self._client(AsyncMonnifyClient)
+            try:
+                return await asyncio.gather(*(client.create_virtual_account(StubUser(pk)) for pk in range(60, 65)))
+            finally:
+                await client.aclose()
+
+        accounts = asyncio.run(run())
+        self.assertEqual(len({account['account_number'] for account in accounts}), 5)
+        self.assertEqual(self.state.logins, 1)
+
+
+class RateLimiterTests(SimpleTestCase):
+    def test_spaces_calls_to_rate_after_burst(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(rate=4, burst=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(4):
+            limiter.acquire()
+
+        self.assertEqual(len(sleeps), 2)
+        self.assertAlmostEqual(now[0], 0.5)
@@ -0,0 +1,137 @@
+# tests/test_query_plans.py
+
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from marketplace.models import Product, Purchase
+from users.models import OTP
+from users.services.otp_services import verify_otp
+from wallets.models import Transaction, Wallet
+
+User = get_user_model()
+
+
+HOT_TABLES = {
+    Transaction._meta.db_table,
+    Purchase._meta.db_table,
+    Product._meta.db_table,
+    OTP._meta.db_table,
+}
+
+
+def plan_violations(sql):
+    """
+    EXPLAINs a captured SELECT and returns the problems found on HOT_TABLES:
+    full table scans and sorts that no index satisfies.
+    """
+    if connection.vendor == 'postgresql':
+        return _postgres_violations(sql)
+    return _sqlite_violations(sql)
+
+
+def _sqlite_violations(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        details = [row[-1] for row in cursor.fetchall()]
+
+    problems = []
+    touches_hot_table = any(table in sql for table in HOT_TABLES)
+    for detail in details:
+        words = detail.replace('SCAN TABLE ', 'SCAN ').split()
+        if words[:1] == ['SCAN'] and words[1] in HOT_TABLES and 'USING' not in words:
+            problems.append(detail)
+        elif 'TEMP B-TREE' in detail and 'ORDER BY' in detail and touches_hot_table:
+            problems.append(detail)
+    return problems
+
+
+def _postgres_violations(sql):
+    with connection.cursor() as cursor:
+        # Tiny test tables always look cheaper to seq-scan; make the planner prove an index exists
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("SET LOCAL enable_sort = off")
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        raw = cursor.fetchone()[0]
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+
+    problems = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        relation = node.get('Relation Name')
+        if node['Node Type'] == 'Seq Scan' and relation in HOT_TABLES:
+            problems.append(f"Seq Scan on {relation}")
+        if node['Node Type'] in ('Sort', 'Incremental Sort'):
+            problems.append(f"Sort on {node.get('Sort Key')}")
+        stack.extend(node.get('Plans', []))
+    return problems
+
+
+class QueryPlanRegressionTests(TestCase):
+    """
+    Runs each hot endpoint, EXPLAINs every SELECT it issued and fails on a
+    sequential scan or filesort over the wallet, marketplace or OTP tables.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(phone_number='+2348000000040', password='pass')
+        Wallet.objects.filter(user=cls.user).update(balance=Decimal('10000.00'))
+        cls.product = Product.objects.create(
+            name='MTN 1GB', code='MTN1GB', product_type=Product.DATA,
+            provider=Product.MTN, value=1024, price=Decimal('300.00'),
+        )
+        Product.objects.create(
+            name='Glo 500', code='GLO500', product_type=Product.AIRTIME,
+            provider=Product.GLO, value=500, price=Decimal('490.00'),
+        )
+        for _ in range(3):
+            Purchase(user=cls.user, product=cls.product).save()
+        OTP.objects.create(user=cls.user, code='123456', purpose='signup')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertIndexedQueries(self, run):
+        with CaptureQueriesContext(connection) as ctx:
+            run()
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects, "No SELECT statements were captured")
+        for sql in selects:
+            problems = plan_violations(sql)
+            self.assertFalse(problems, f"Unindexed plan for:\n{sql}\n→ {problems}")
+
+    def test_transaction_history(self):
+        self.assertIndexedQueries(lambda: self.client.get('/api/v1/transactions/', {'limit': 20}))
+
+    def test_transaction_history_cursor(self):
+        self.assertIndexedQueries(lambda: self.client.get('/api/v1/transactions/', {'pagination': 'cursor'}))
+
+    def test_purchase_history(self):
+        self.assertIndexedQueries(lambda: self.client.get('/api/v1/marketplace/purchases/'))
+
+    def test_product_catalog(self):
+        self.assertIndexedQueries(lambda: self.client.get('/api/v1/marketplace/products/'))
+
+    def test_product_catalog_meta_ordering(self):
+        self.assertIndexedQueries(lambda: list(Product.objects.filter(active=True)))
+
+    def test_dashboard_range_scan(self):
+        end = timezone.now()
+        start = end - timedelta(days=7)
+        self.assertIndexedQueries(
+            lambda: Transaction.objects.filter(timestamp__range=(start, end)).aggregate(total=Sum('amount'))
+        )
+
+    def test_otp_lookup(self):
+        self.assertIndexedQueries(lambda: verify_otp(self.user, '000000', purpose='signup'))
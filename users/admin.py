@@ -1,12 +1,17 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.urls import path
-from django.http import HttpResponse
 from django.template.response import TemplateResponse
 from django.db.models import Count
-import csv
 
+from config.caching import get_or_compute
+from config.exports import csv_export_action
 from users.models import User, OTP, OTPAttempt
+from wallets.services import provisioning
+from wallets.tasks import provision_wallets
+
+DASHBOARD_CACHE_KEY = 'user_dashboard_metrics'
+DASHBOARD_CACHE_TIMEOUT = 60
 
 
 # ─────────────────────────────────────────────────────────────
@@ -28,6 +33,12 @@ class CustomAdminSite(admin.AdminSite):
     def dashboard_view(self, request):
         context = dict(
             self.each_context(request),
+            **get_or_compute(DASHBOARD_CACHE_KEY, self.dashboard_metrics, DASHBOARD_CACHE_TIMEOUT),
+        )
+        return TemplateResponse(request, "admin/dashboard.html", context)
+
+    def dashboard_metrics(self):
+        return dict(
             total_users=User.objects.count(),
             verified_users=User.objects.filter(is_phone_verified=True).count(),
             agent_count=User.objects.filter(is_agent=True).count(),
@@ -41,7 +52,6 @@ class CustomAdminSite(admin.AdminSite):
             success_attempts=OTPAttempt.objects.filter(success=True).count(),
             failed_attempts=OTPAttempt.objects.filter(success=False).count(),
         )
-        return TemplateResponse(request, "admin/dashboard.html", context)
 
 
 custom_admin_site = CustomAdminSite(name="custom_admin")
@@ -78,25 +88,35 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
 
-    actions = ["verify_selected", "export_users_csv"]
+    actions = ["verify_selected", "provision_selected_wallets", "export_users_csv"]
 
     def verify_selected(self, request, queryset):
         count = queryset.update(is_phone_verified=True)
         self.message_user(request, f"{count} users have been verified.")
     verify_selected.short_description = "✅ Verify selected users"
 
-    def export_users_csv(self, request, queryset):
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="users.csv"'
-        writer = csv.writer(response)
-        writer.writerow(["Email", "Phone", "Full Name", "Agent", "Phone Verified", "Date Joined"])
-        for user in queryset:
-            writer.writerow([
-                user.email, user.phone_number, user.full_name,
-                user.is_agent, user.is_phone_verified, user.date_joined
-            ])
-        return response
-    export_users_csv.short_description = "📤 Export selected users as CSV"
+    def provision_selected_wallets(self, request, queryset):
+        user_ids = list(provisioning.unprovisioned_users().filter(pk__in=queryset).values_list("pk", flat=True))
+        if not user_ids:
+            self.message_user(request, "Selected users already have wallets.")
+            return
+        run = provisioning.start_run(user_ids)
+        provision_wallets.enqueue(run_id=run.pk)
+        self.message_user(request, f"Provisioning wallets for {len(user_ids)} users in the background (run {run.pk}).")
+    provision_selected_wallets.short_description = "🏦 Provision wallets for selected users"
+
+    export_users_csv = csv_export_action(
+        (
+            ("Email", "email"),
+            ("Phone", "phone_number"),
+            ("Full Name", "full_name"),
+            ("Agent", "is_agent"),
+            ("Phone Verified", "is_phone_verified"),
+            ("Date Joined", "date_joined"),
+        ),
+        "users.csv",
+        "📤 Export selected users as CSV",
+    )
 
 
 # ─────────────────────────────────────────────────────────────
@@ -115,18 +135,17 @@ class OTPAdmin(admin.ModelAdmin):
 
     actions = ["export_otp_csv"]
 
-    def export_otp_csv(self, request, queryset):
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="otp.csv"'
-        writer = csv.writer(response)
-        writer.writerow(["User", "Code", "Purpose", "Used", "Created At"])
-        for otp in queryset:
-            writer.writerow([
-                otp.user.email, otp.code, otp.purpose,
-                otp.is_used, otp.created_at
-            ])
-        return response
-    export_otp_csv.short_description = "📥 Export selected OTPs as CSV"
+    export_otp_csv = csv_export_action(
+        (
+            ("User", "user__email"),
+            ("Code", "code"),
+            ("Purpose", "purpose"),
+            ("Used", "is_used"),
+            ("Created At", "created_at"),
+        ),
+        "otp.csv",
+        "📥 Export selected OTPs as CSV",
+    )
 
 
 # ─────────────────────────────────────────────────────────────
@@ -145,15 +164,13 @@ class OTPAttemptAdmin(admin.ModelAdmin):
 
     actions = ["export_attempts_csv"]
 
-    def export_attempts_csv(self, request, queryset):
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="otp_attempts.csv"'
-        writer = csv.writer(response)
-        writer.writerow(["User", "Code Entered", "Success", "Attempt Time"])
-        for attempt in queryset:
-            writer.writerow([
-                attempt.user.email, attempt.code_entered,
-                attempt.success, attempt.attempt_time
-            ])
-        return response
-    export_attempts_csv.short_description = "🗂 Export selected OTP attempts as CSV"
\ No newline at end of file
+    export_attempts_csv = csv_export_action(
+        (
+            ("User", "user__email"),
+            ("Code Entered", "code_entered"),
+            ("Success", "success"),
+            ("Attempt Time", "attempt_time"),
+        ),
+        "otp_attempts.csv",
+        "🗂 Export selected OTP attempts as CSV",
+    )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_alter_otp_options_alter_otpattempt_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='otp',
+            name='users_otp_user_id_eb7a7d_idx',
+        ),
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['user', 'purpose', '-created_at'], name='otp_unused_latest'),
+        ),
+    ]
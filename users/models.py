@@ -117,7 +117,12 @@ class OTP(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=['user', 'purpose', 'is_used']),
+            # verify_otp: latest unused OTP for (user, purpose)
+            models.Index(
+                fields=['user', 'purpose', '-created_at'],
+                condition=models.Q(is_used=False),
+                name='otp_unused_latest',
+            ),
         ]
         ordering = ['-created_at']
         verbose_name = "OTP"
@@ -43,8 +43,8 @@ def send_otp_to_user(destination, code, via='sms'):
 # ✅ OTP Generator
 def generate_otp_for_user(user, purpose='signup', expires_minutes=5):
     """
-    Creates and dispatches a one-time password (OTP) for a user.
-    Returns the OTP instance on success or raises RuntimeError on failure.
+    Creates a one-time password (OTP) for a user and queues its delivery.
+    Returns the OTP instance.
     """
     code = get_random_string(length=6, allowed_chars='0123456789')
     expires_at = now() + timedelta(minutes=expires_minutes)
@@ -57,6 +57,8 @@ def generate_otp_for_user(user, purpose='signup', expires_minutes=5):
         destination = user.email
         channel = 'email'
 
+    from users.tasks import deliver_otp
+
     with transaction.atomic():
         otp_obj = OTP.objects.create(
             user=user,
@@ -65,12 +67,8 @@ def generate_otp_for_user(user, purpose='signup', expires_minutes=5):
             expires_at=expires_at,
             is_used=False
         )
-
-        sent = send_otp_to_user(destination, code, via=channel)
-        if not sent:
-            OTPAttempt.objects.create(user=user, code_entered='', success=False)
-            otp_obj.delete()
-            raise RuntimeError(f"Failed to send OTP via {channel}")
+        # Sent by a job worker so the request does not wait on Twilio or SMTP
+        deliver_otp.enqueue(otp_id=otp_obj.pk, destination=destination, channel=channel)
 
     return otp_obj
 
@@ -0,0 +1,21 @@
+# users/tasks.py
+
+from django.utils.timezone import now
+
+from jobs.queue import task
+from users.models import OTP
+from users.services.otp_services import send_otp_to_user
+
+
+@task(priority=20, max_attempts=3)
+def deliver_otp(otp_id, destination, channel):
+    """
+    Sends a stored OTP by SMS or email. Raising makes the job retry; codes
+    that were used or expired in the meantime are not sent.
+    """
+    otp = OTP.objects.filter(pk=otp_id, is_used=False, expires_at__gt=now()).first()
+    if otp is None:
+        return {'sent': False, 'reason': 'used or expired'}
+    if not send_otp_to_user(destination, otp.code, via=channel):
+        raise RuntimeError(f"Failed to send OTP via {channel}")
+    return {'sent': True}
@@ -1,9 +1,11 @@
-import csv
 from django.contrib import admin
-from django.http import HttpResponse
+from django.db.models import Q
 from django.urls import path
 
+from config.exports import csv_export_action
+
 from .models import Wallet, Transaction
+from .services import search
 from .views import export_dashboard_pdf
 
 
@@ -33,7 +35,7 @@ class WalletAdmin(admin.ModelAdmin):
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ('wallet', 'transaction_type', 'amount', 'bundle', 'timestamp')
-    search_fields = ('wallet__user__username', 'bundle__name', 'description')
+    search_fields = ('=wallet__user__phone_number', 'bundle__name', 'description')
     list_filter = ('transaction_type', 'timestamp')
     list_per_page = 25
     date_hierarchy = 'timestamp'
@@ -41,25 +43,31 @@ class TransactionAdmin(admin.ModelAdmin):
     readonly_fields = ('timestamp',)
     list_select_related = ('wallet', 'bundle')
     raw_id_fields = ('wallet', 'bundle')  # ✅ Stable reference for migrations
-    actions = ('export_csv', 'flag_suspicious')
+    actions = ('export_csv', 'export_csv_gzip', 'flag_suspicious')
 
-    def export_csv(self, request, queryset):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename=transactions.csv'
-        writer = csv.writer(response)
-        writer.writerow(['ID', 'User', 'Type', 'Amount', 'Timestamp'])
-        for tx in queryset:
-            writer.writerow([
-                tx.id,
-                tx.wallet.user.username,
-                tx.transaction_type,
-                tx.amount,
-                tx.timestamp,
-            ])
-        return response
-    export_csv.short_description = "Export selected transactions to CSV"
+    export_columns = (
+        ('ID', 'id'),
+        ('User', 'wallet__user__phone_number'),
+        ('Type', 'transaction_type'),
+        ('Amount', 'amount'),
+        ('Timestamp', 'timestamp'),
+    )
+    export_csv = csv_export_action(
+        export_columns, 'transactions.csv', "Export selected transactions to CSV",
+    )
+    export_csv_gzip = csv_export_action(
+        export_columns, 'transactions.csv', "Export selected transactions to gzipped CSV", compress=True,
+    )
 
     def flag_suspicious(self, request, queryset):
         updated = queryset.update(is_flagged=True)
         self.message_user(request, f"{updated} transactions flagged as suspicious.")
-    flag_suspicious.short_description = "Flag selected transactions as suspicious"
\ No newline at end of file
+    flag_suspicious.short_description = "Flag selected transactions as suspicious"
+
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text match on description and bundle name, or the owner's exact phone number
+        ids = search.matching_ids(search_term) if search.available() else None
+        if ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        owners = Wallet.objects.filter(user__phone_number=search_term.strip()).values('pk')
+        return queryset.filter(Q(pk__in=ids) | Q(wallet__in=owners)), False
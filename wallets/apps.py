@@ -9,4 +9,5 @@ class WalletsConfig(AppConfig):
 
     def ready(self):
         # 🔄 Hook signal handlers to enable cache invalidation & other startup tasks
-        import wallets.signals  # ✅ activates smart cache invalidation on model changes
\ No newline at end of file
+        import wallets.signals  # ✅ activates smart cache invalidation on model changes
+        import wallets.checks  # ✅ refuses a balance cache on a per-process backend
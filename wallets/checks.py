@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core import checks
+
+from config import caching
+
+
+@checks.register(checks.Tags.caches)
+def balance_cache_backend(app_configs, **kwargs):
+    # run_workers credits wallets too; a per-process cache would hide them from the web workers
+    if getattr(settings, 'WALLET_BALANCE_CACHE', False) and not caching.is_shared():
+        return [checks.Error(
+            "WALLET_BALANCE_CACHE needs a cache shared by every process.",
+            hint="Set CACHE_URL to a Redis or Memcached server, or turn WALLET_BALANCE_CACHE off.",
+            id='wallets.E001',
+        )]
+    return []
@@ -0,0 +1,137 @@
+# wallets/idempotency.py
+
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def _ttl():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+
+def _cache_key(scope, key):
+    digest = hashlib.sha256(f"{scope}:{key}".encode()).hexdigest()
+    return f"idempotency:{digest}"
+
+
+def fingerprint(body):
+    return hashlib.sha256(body or b'').hexdigest()
+
+
+def run_idempotent(scope, key, request_hash, handler):
+    """
+    Runs `handler()` at most once per (scope, key).
+
+    `handler` returns a `(status_code, body)` pair. The key is claimed with
+    a unique insert in the same DB transaction as the handler's writes, so
+    a concurrent duplicate waits for the first request and then replays it.
+    Returns `(status_code, body, replayed)`.
+    """
+    cache_key = _cache_key(scope, key)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return _replay(cached, request_hash)
+
+    now = timezone.now()
+    IdempotencyKey.objects.filter(scope=scope, key=key, expires_at__lte=now).delete()
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    scope=scope,
+                    key=key,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=_ttl()),
+                )
+        except IntegrityError:
+            record = None
+
+        if record is not None:
+            status_code, body = handler()
+            record.response_status = status_code
+            record.response_body = body
+            record.save(update_fields=['response_status', 'response_body'])
+            transaction.on_commit(lambda: _remember(cache_key, record))
+            return status_code, body, False
+
+    record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if record is None or record.response_status is None:
+        return (
+            status.HTTP_409_CONFLICT,
+            {"detail": "A request with this Idempotency-Key is still being processed."},
+            False,
+        )
+    stored = _remember(cache_key, record)
+    return _replay(stored, request_hash)
+
+
+def _remember(cache_key, record):
+    stored = {
+        'request_hash': record.request_hash,
+        'status': record.response_status,
+        'body': record.response_body,
+    }
+    timeout = max(int((record.expires_at - timezone.now()).total_seconds()), 1)
+    cache.set(cache_key, stored, timeout=timeout)
+    return stored
+
+
+def _replay(stored, request_hash):
+    if stored['request_hash'] != request_hash:
+        return (
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            {"detail": "Idempotency-Key was already used with a different request body."},
+            False,
+        )
+    return stored['status'], stored['body'], True
+
+
+def idempotent(scope):
+    """
+    Decorator for DRF view methods. Requests carrying an `Idempotency-Key`
+    header are executed once; retries get the stored response back without
+    touching the wallet. Requests without the header run as before.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            def handler():
+                response = view_method(self, request, *args, **kwargs)
+                return response.status_code, response.data
+
+            status_code, body, replayed = run_idempotent(
+                scope,
+                f"{request.user.pk}:{key}",
+                fingerprint(request.body),
+                handler,
+            )
+            response = Response(body, status=status_code)
+            if replayed:
+                response[REPLAY_HEADER] = 'true'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from wallets.services import account_pool
+
+
+class Command(BaseCommand):
+    help = "Show reserved account pool depth, or top it up with --refill"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refill', action='store_true', help="Reserve accounts up to MONNIFY_POOL_TARGET now")
+        parser.add_argument('--limit', type=int, help="Reserve at most this many accounts")
+        parser.add_argument('--concurrency', type=int, help="Monnify calls in flight (default MONNIFY_POOL_REFILL_CONCURRENCY)")
+
+    def handle(self, *args, **options):
+        if options['refill']:
+            result = account_pool.refill(limit=options['limit'], concurrency=options['concurrency'])
+            style = self.style.WARNING if result['failed'] else self.style.SUCCESS
+            self.stdout.write(style(f"Reserved {result['created']} account(s), {result['failed']} failed"))
+
+        stats = account_pool.pool_stats()
+        style = self.style.ERROR if stats['is_low'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Pool: {stats['available']} available / {stats['target']} target "
+            f"(refill at {stats['refill_at']}, low water {stats['low_water']}), {stats['assigned']} assigned"
+        ))
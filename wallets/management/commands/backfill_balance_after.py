@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from wallets.services.running_balance import backfill
+
+
+class Command(BaseCommand):
+    help = "Replay each wallet's transactions to fill the running balance_after column"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Wallet ids per chunk")
+        parser.add_argument('--processes', type=int, help="Worker processes (default: one per CPU; SQLite runs inline)")
+        parser.add_argument('--all', action='store_true', help="Replay every wallet, not only those with missing values")
+
+    def handle(self, *args, **options):
+        def progress(wallets, transactions):
+            if wallets:
+                self.stdout.write(f"Replayed {wallets} wallet(s), {transactions} transaction(s)")
+
+        wallets, transactions = backfill(
+            chunk_size=options['chunk_size'],
+            processes=options['processes'],
+            everything=options['all'],
+            on_chunk=progress if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Wrote balance_after on {transactions} transaction(s) across {wallets} wallet(s)"
+        ))
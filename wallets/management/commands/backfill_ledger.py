@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from wallets.models import LedgerAccount, Transaction, Wallet
+from wallets.services.ledger import (
+    post_entry,
+    post_transaction,
+    system_account,
+    wallet_account,
+    wallet_balance,
+    write_checkpoint,
+)
+
+
+class Command(BaseCommand):
+    help = "Post journal entries for transactions that predate the ledger, then checkpoint every wallet account"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--adjust-opening',
+            action='store_true',
+            help="Post an opening-balance entry where the ledger disagrees with Wallet balances",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = (
+            Transaction.objects
+            .filter(journal_entry__isnull=True)
+            .select_related('wallet')
+            .order_by('id')
+        )
+
+        posted = 0
+        for tx in pending.iterator(chunk_size=batch_size):
+            post_transaction(tx)
+            posted += 1
+        self.stdout.write(f"Posted {posted} transaction(s) to the ledger")
+
+        adjusted = 0
+        for wallet in Wallet.objects.order_by('id').iterator(chunk_size=batch_size):
+            with transaction.atomic():
+                account = wallet_account(wallet)
+                if options['adjust_opening']:
+                    diff = wallet.logical_balance - wallet_balance(wallet)
+                    if diff:
+                        post_entry(
+                            [(account, diff), (system_account(LedgerAccount.FUNDING), -diff)],
+                            description="Opening balance adjustment",
+                        )
+                        adjusted += 1
+                write_checkpoint(account)
+
+        if options['adjust_opening']:
+            self.stdout.write(f"Adjusted opening balance on {adjusted} wallet(s)")
+        self.stdout.write(self.style.SUCCESS("✅ Ledger backfill complete"))
@@ -0,0 +1,57 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from wallets.models import Wallet
+from wallets.services import counters, rollups, transfers
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark one bulk transfer from an agent wallet to --recipients fresh wallets. "
+        "Ledger rows are append-only and stay behind; run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10_000)
+        parser.add_argument('--amount', type=Decimal, default=Decimal('100.00'))
+
+    def handle(self, *args, **options):
+        count = options['recipients']
+        amount = options['amount']
+        started_at = timezone.now()
+
+        # bulk_create skips post_save, so no Monnify accounts are provisioned
+        users = User.objects.bulk_create([
+            User(phone_number=f"+996{uuid.uuid4().int % 10**11:011d}", is_active=False, is_agent=index == 0)
+            for index in range(count + 1)
+        ])
+        wallets = Wallet.objects.bulk_create([Wallet(user=user) for user in users])
+        source, recipients = wallets[0], wallets[1:]
+        Wallet.objects.filter(pk=source.pk).update(balance=amount * count)
+        lines = [(user.phone_number, amount) for user in users[1:]]
+
+        try:
+            started = time.perf_counter()
+            report = transfers.distribute(source.pk, lines)
+            elapsed = time.perf_counter() - started
+
+            received = Wallet.objects.filter(pk__in=[w.pk for w in recipients]).aggregate(total=Sum('balance'))['total']
+            self.stdout.write(
+                f"{report['credited']} recipients in {elapsed:.2f}s "
+                f"→ {report['credited'] / elapsed:,.0f} lines/sec "
+                f"(failed: {report['failed']}, source balance: {report['balance']}, "
+                f"received: {received}, consistent: {received == report['total'] and report['balance'] == 0})"
+            )
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+            # The benchmark went into the counters and rollups; recount them
+            counters.recompute()
+            rollups.rebuild(since=started_at)
@@ -0,0 +1,87 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from wallets.models import Wallet
+from wallets.services.balance import InsufficientFunds, debit_wallet
+
+User = get_user_model()
+
+
+def legacy_debit(wallet_id, amount):
+    """
+    The pre-existing read/compare/save debit, kept here only as a baseline.
+    """
+    with transaction.atomic():
+        wallet = Wallet.objects.select_for_update().get(pk=wallet_id)
+        if wallet.balance < amount:
+            raise InsufficientFunds("Insufficient funds.")
+        wallet.balance -= amount
+        wallet.save()
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent wallet debits: locked read-modify-write vs conditional UPDATE"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--debits', type=int, default=250, help="Debits per thread")
+        parser.add_argument('--amount', type=Decimal, default=Decimal('1.00'))
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        per_thread = options['debits']
+        amount = options['amount']
+
+        # bulk_create skips post_save, so no Monnify account is provisioned
+        user = User.objects.bulk_create([
+            User(phone_number=f"+999{uuid.uuid4().int % 10**11:011d}", is_active=False)
+        ])[0]
+        wallet = Wallet.objects.create(user=user, account_number=f"B{uuid.uuid4().hex[:9]}")
+
+        try:
+            for label, debit in (('locked', legacy_debit), ('conditional', debit_wallet)):
+                self._run(label, debit, wallet, threads, per_thread, amount)
+        finally:
+            user.delete()
+
+    def _run(self, label, debit, wallet, threads, per_thread, amount):
+        start_balance = amount * threads * per_thread
+        Wallet.objects.filter(pk=wallet.pk).update(balance=start_balance)
+
+        ok = [0] * threads
+        errors = [0] * threads
+
+        def worker(idx):
+            try:
+                for _ in range(per_thread):
+                    try:
+                        debit(wallet.pk, amount)
+                        ok[idx] += 1
+                    except InsufficientFunds:
+                        pass
+                    except Exception:
+                        errors[idx] += 1
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        wallet.refresh_from_db(fields=['balance'])
+        expected = start_balance - amount * sum(ok)
+        self.stdout.write(
+            f"{label:<12} {sum(ok):>7} debits in {elapsed:6.2f}s "
+            f"→ {sum(ok) / elapsed:9.1f} debits/sec "
+            f"(errors: {sum(errors)}, balance consistent: {wallet.balance == expected})"
+        )
@@ -0,0 +1,118 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from services.monnify import AsyncMonnifyClient, CircuitBreaker, MonnifyClient
+from services.monnify_stub import start_stub
+
+
+class StubUser:
+    def __init__(self, pk):
+        self.id = pk
+        self.email = f"bench{pk}@example.com"
+
+    def get_full_name(self):
+        return f"Bench User {self.id}"
+
+
+class Command(BaseCommand):
+    help = "Benchmark Monnify account creation against a local stub: fresh connections vs pooled vs async"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--latency', type=float, default=0.02, help="Stub response latency in seconds")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of stub responses that are 503s")
+
+    def handle(self, *args, **options):
+        calls, concurrency = options['calls'], options['concurrency']
+        server, state = start_stub(latency=options['latency'], error_rate=options['error_rate'])
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        client_options = dict(
+            base_url=base_url, api_key='bench', secret_key='bench', contract_code='bench',
+            breaker=CircuitBreaker(threshold=10 ** 6),
+        )
+        cache.delete("monnify:access_token:bench")
+
+        try:
+            token = MonnifyClient(**client_options).access_token()
+
+            def unpooled(user):
+                # The pre-existing call shape: no session, no timeout, no retry
+                response = requests.post(
+                    f"{base_url}/api/v2/bank-transfer/reserved-accounts",
+                    json={"accountReference": f"user-{user.id}"},
+                    headers={"Authorization": token},
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(response.status_code)
+
+            pooled_client = MonnifyClient(pool_size=concurrency, **client_options)
+
+            offset = 0
+            for label, call in (('unpooled', unpooled), ('pooled', pooled_client.create_virtual_account)):
+                state.connections.clear()
+                users = [StubUser(offset + i) for i in range(calls)]
+                offset += calls
+                latencies, errors, elapsed = self._run_threads(call, users, concurrency)
+                self._report(label, latencies, errors, elapsed, len(state.connections))
+            pooled_client.close()
+
+            state.connections.clear()
+            users = [StubUser(offset + i) for i in range(calls)]
+            latencies, errors, elapsed = asyncio.run(self._run_async(client_options, users, concurrency))
+            self._report('async', latencies, errors, elapsed, len(state.connections))
+        finally:
+            server.shutdown()
+
+    def _run_threads(self, call, users, concurrency):
+        def timed(user):
+            started = time.perf_counter()
+            try:
+                call(user)
+            except Exception:
+                return None
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, users))
+        elapsed = time.perf_counter() - started
+        latencies = [r for r in results if r is not None]
+        return latencies, len(results) - len(latencies), elapsed
+
+    async def _run_async(self, client_options, users, concurrency):
+        client = AsyncMonnifyClient(pool_size=concurrency, **client_options)
+        gate = asyncio.Semaphore(concurrency)
+
+        async def timed(user):
+            async with gate:
+                started = time.perf_counter()
+                try:
+                    await client.create_virtual_account(user)
+                except Exception:
+                    return None
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(timed(user) for user in users))
+        elapsed = time.perf_counter() - started
+        await client.aclose()
+        latencies = [r for r in results if r is not None]
+        return latencies, len(results) - len(latencies), elapsed
+
+    def _report(self, label, latencies, errors, elapsed, connections):
+        if len(latencies) < 2:
+            self.stdout.write(self.style.ERROR(f"{label:<9} too few successful calls ({len(latencies)})"))
+            return
+        cuts = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{label:<9} {len(latencies) / elapsed:8.1f} calls/sec  "
+            f"p50 {cuts[49] * 1000:6.1f}ms  p95 {cuts[94] * 1000:6.1f}ms  p99 {cuts[98] * 1000:6.1f}ms  "
+            f"(errors: {errors}, TCP connections: {connections})"
+        )
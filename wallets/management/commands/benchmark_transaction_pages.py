@@ -0,0 +1,95 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from wallets.models import Transaction, Wallet
+from wallets.pagination import KeysetPagination
+from wallets.views import TransactionViewSet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Benchmark limit/offset vs keyset pages of /transactions/ at increasing depth"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000_000, help="Transactions to seed on one wallet")
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded wallet afterwards")
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        page_size = options['page_size']
+
+        user = User.objects.bulk_create([
+            User(phone_number=f"+998{uuid.uuid4().int % 10**11:011d}", is_active=True)
+        ])[0]
+        wallet = Wallet.objects.create(user=user, account_number=f"P{uuid.uuid4().hex[:9]}")
+        try:
+            self._seed(wallet, rows)
+            view = TransactionViewSet.as_view({'get': 'list'})
+            host = next((h for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost').lstrip('.')
+            factory = APIRequestFactory(SERVER_NAME=host)
+
+            depths = sorted({d for d in (0, 1_000, 100_000, rows // 2, rows - page_size) if 0 <= d < rows})
+            self.stdout.write(f"{'depth':>10} {'offset ms':>12} {'keyset ms':>12}")
+            for depth in depths:
+                offset_ms = self._time(view, factory, user, {'limit': page_size, 'offset': depth}, options['repeat'])
+                params = {'pagination': 'cursor', 'limit': page_size}
+                cursor = self._cursor_at(wallet, depth)
+                if cursor:
+                    params['cursor'] = cursor
+                keyset_ms = self._time(view, factory, user, params, options['repeat'])
+                self.stdout.write(f"{depth:>10} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+        finally:
+            if not options['keep']:
+                Transaction.objects.filter(wallet=wallet)._raw_delete(Transaction.objects.db)
+                user.delete()
+
+    def _seed(self, wallet, rows, batch=10_000):
+        start = timezone.now() - timedelta(seconds=rows)
+        created = 0
+        while created < rows:
+            size = min(batch, rows - created)
+            txs = Transaction.objects.bulk_create([
+                Transaction(wallet=wallet, transaction_type=Transaction.TOPUP, amount=Decimal('1.00'))
+                for _ in range(size)
+            ])
+            # auto_now_add stamps every row "now"; spread them out like real history
+            for i, tx in enumerate(txs):
+                tx.timestamp = start + timedelta(seconds=created + i)
+            Transaction.objects.bulk_update(txs, ['timestamp'], batch_size=batch)
+            created += size
+            self.stdout.write(f"seeded {created}/{rows}", ending='\r')
+        self.stdout.write('')
+
+    def _cursor_at(self, wallet, depth):
+        if depth == 0:
+            return None
+        row = (
+            Transaction.objects.filter(wallet=wallet)
+            .order_by('-timestamp', '-id')
+            .values_list('timestamp', 'id')[depth - 1]
+        )
+        paginator = KeysetPagination()
+        return paginator.encode_cursor(list(row))
+
+    def _time(self, view, factory, user, params, repeat):
+        samples = []
+        for _ in range(repeat):
+            request = factory.get('/api/v1/transactions/', params)
+            force_authenticate(request, user=user)
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
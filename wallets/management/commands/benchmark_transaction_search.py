@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from marketplace.models import Product
+from wallets.models import Transaction, Wallet
+from wallets.services import search
+
+User = get_user_model()
+
+WORDS = (
+    'airtime', 'data', 'bundle', 'monthly', 'weekly', 'refund', 'transfer', 'salary', 'rent',
+    'school', 'fees', 'electricity', 'token', 'cable', 'subscription', 'gift', 'family', 'savings',
+)
+PROVIDERS = ('MTN', 'Glo', 'Airtel', '9mobile')
+
+
+class Command(BaseCommand):
+    help = "Benchmark full-text vs icontains transaction search, API (description) and admin (+ bundle name)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Transactions to seed on one wallet")
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--term', action='append', dest='terms', help="Search term (repeatable)")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded wallet afterwards")
+
+    def handle(self, *args, **options):
+        if not search.available():
+            raise CommandError("The full-text index needs SQLite or PostgreSQL")
+        terms = options['terms'] or ['salary', 'elec', 'mtn', 'school fees', 'nothingmatches']
+
+        user = User.objects.bulk_create([
+            User(phone_number=f"+998{uuid.uuid4().int % 10**11:011d}", is_active=True)
+        ])[0]
+        wallet = Wallet.objects.create(user=user, account_number=f"S{uuid.uuid4().hex[:9]}")
+        products = Product.objects.bulk_create([
+            Product(
+                name=f"{provider} {size}GB data", code=f"bench-{uuid.uuid4().hex[:12]}",
+                product_type=Product.DATA, provider=provider.lower(), value=size, price=Decimal(size * 300),
+            )
+            for provider in PROVIDERS for size in (1, 2, 5)
+        ])
+        try:
+            seconds = self._seed(wallet, products, options['rows'])
+            self.stdout.write(
+                f"seeded {options['rows']} rows in {seconds:.1f}s (index kept in sync by triggers)\n"
+            )
+            self.stdout.write(
+                f"{'scope':<6} {'term':<16} {'matches':>8} {'icontains ms':>13} {'full-text ms':>13}"
+            )
+            scopes = (('api', ('description',)), ('admin', ('description', 'bundle__name')))
+            for scope, lookups in scopes:
+                for term in terms:
+                    slow = self._icontains(wallet, term, lookups)
+                    fast = search.search(Transaction.objects.filter(wallet=wallet), term, lookups)
+                    matches = fast.count()
+                    slow_ms = self._time(slow, options['page_size'], options['repeat'])
+                    fast_ms = self._time(fast, options['page_size'], options['repeat'])
+                    self.stdout.write(f"{scope:<6} {term:<16} {matches:>8} {slow_ms:>13.2f} {fast_ms:>13.2f}")
+        finally:
+            if not options['keep']:
+                Transaction.objects.filter(wallet=wallet)._raw_delete(Transaction.objects.db)
+                user.delete()
+                Product.objects.filter(pk__in=[p.pk for p in products]).delete()
+
+    def _seed(self, wallet, products, rows, batch=10_000):
+        rng = random.Random(0)
+        started = time.perf_counter()
+        created = 0
+        while created < rows:
+            size = min(batch, rows - created)
+            txs = []
+            for _ in range(size):
+                bundle = rng.choice(products) if rng.random() < 0.3 else None
+                txs.append(Transaction(
+                    wallet=wallet,
+                    transaction_type=Transaction.PURCHASE if bundle else Transaction.TOPUP,
+                    amount=Decimal('1.00'),
+                    bundle=bundle,
+                    description=' '.join(rng.sample(WORDS, 3)),
+                ))
+            Transaction.objects.bulk_create(txs)
+            created += size
+            self.stdout.write(f"seeded {created}/{rows}", ending='\r')
+        self.stdout.write('')
+        return time.perf_counter() - started
+
+    def _icontains(self, wallet, term, lookups):
+        # What SearchFilter and the admin did: each word icontains some field
+        queryset = Transaction.objects.filter(wallet=wallet)
+        for word in term.split():
+            condition = Q()
+            for lookup in lookups:
+                condition |= Q(**{f'{lookup}__icontains': word})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def _time(self, queryset, page_size, repeat):
+        # One list page: the count and the newest rows, as the paginator reads them
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset.count()
+            list(queryset.order_by('-timestamp', '-id')[:page_size])
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,149 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Case, F, Max, Sum, When
+from django.utils import timezone
+
+from wallets.models import Transaction, Wallet
+from wallets.serializers import TopUpSerializer, WithdrawSerializer
+from wallets.services import rollups
+from wallets.services.balance import (
+    InsufficientFunds,
+    WriteConflict,
+    apply_versioned,
+    credit_wallet,
+    debit_wallet,
+)
+
+User = get_user_model()
+
+
+def _record(wallet_id, transaction_type, amount, balance_after):
+    Transaction.objects.create(
+        wallet_id=wallet_id,
+        transaction_type=transaction_type,
+        amount=amount,
+        balance_after=balance_after,
+        description='Concurrency benchmark',
+    )
+
+
+def locked_move(wallet_id, amount, debit):
+    """
+    Pessimistic baseline: row lock first, then validation, balance write
+    and Transaction insert, all while holding it.
+    """
+    with transaction.atomic():
+        wallet = Wallet.objects.select_for_update().get(pk=wallet_id)
+        ser = (WithdrawSerializer if debit else TopUpSerializer)(data={'amount': amount})
+        ser.is_valid(raise_exception=True)
+        if debit and wallet.balance < amount:
+            raise InsufficientFunds("Insufficient funds.")
+        balance = wallet.balance - amount if debit else wallet.balance + amount
+        Wallet.objects.filter(pk=wallet_id).update(
+            balance=balance, version=F('version') + 1, updated_at=timezone.now(),
+        )
+        _record(wallet_id, Transaction.WITHDRAW if debit else Transaction.TOPUP, amount, balance)
+
+
+def atomic_move(wallet_id, amount, debit):
+    # The default mode: validate, then conditional F() update and insert
+    (WithdrawSerializer if debit else TopUpSerializer)(data={'amount': amount}).is_valid(raise_exception=True)
+    with transaction.atomic():
+        balance = debit_wallet(wallet_id, amount) if debit else credit_wallet(wallet_id, amount)
+        _record(wallet_id, Transaction.WITHDRAW if debit else Transaction.TOPUP, amount, balance)
+
+
+def optimistic_move(wallet_id, amount, debit):
+    (WithdrawSerializer if debit else TopUpSerializer)(data={'amount': amount}).is_valid(raise_exception=True)
+    transaction_type = Transaction.WITHDRAW if debit else Transaction.TOPUP
+    apply_versioned(
+        wallet_id, amount, debit=debit,
+        record=lambda balance: _record(wallet_id, transaction_type, amount, balance),
+    )
+
+
+MODES = (('locked', locked_move), ('atomic', atomic_move), ('optimistic', optimistic_move))
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark top-up/withdraw throughput on one hot wallet: select_for_update vs "
+        "conditional UPDATE vs optimistic version check, at increasing thread counts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16, 32])
+        parser.add_argument('--ops', type=int, default=200, help="Operations per thread")
+        parser.add_argument('--amount', type=Decimal, default=Decimal('1.00'))
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        # bulk_create skips post_save, so no Monnify account is provisioned
+        user = User.objects.bulk_create([
+            User(phone_number=f"+997{uuid.uuid4().int % 10**11:011d}", is_active=False)
+        ])[0]
+        wallet = Wallet.objects.create(user=user, account_number=f"C{uuid.uuid4().hex[:9]}")
+        self.stdout.write(f"database: {connection.vendor}")
+        self.stdout.write(f"{'mode':<11} {'threads':>7} {'ops/sec':>9} {'ok':>6} {'conflicts':>9} {'errors':>6}  consistent")
+        try:
+            for threads in options['threads']:
+                for label, move in MODES:
+                    self._run(label, move, wallet, threads, options)
+        finally:
+            user.delete()
+            # The benchmark's Transactions went into the rollups; recount the buckets it touched
+            rollups.rebuild(since=started_at)
+
+    def _run(self, label, move, wallet, threads, options):
+        amount = options['amount']
+        start_balance = amount * threads * options['ops']
+        Wallet.objects.filter(pk=wallet.pk).update(balance=start_balance)
+        floor = Transaction.objects.filter(wallet=wallet).aggregate(last=Max('id'))['last'] or 0
+
+        ok = [0] * threads
+        conflicts = [0] * threads
+        errors = [0] * threads
+
+        def worker(idx):
+            try:
+                for op in range(options['ops']):
+                    debit = op % 2 == 1
+                    try:
+                        move(wallet.pk, amount, debit)
+                        ok[idx] += 1
+                    except WriteConflict:
+                        conflicts[idx] += 1
+                    except InsufficientFunds:
+                        pass
+                    except Exception:
+                        errors[idx] += 1
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        # Every committed balance change must have committed its Transaction too
+        wallet.refresh_from_db(fields=['balance'])
+        recorded = Transaction.objects.filter(wallet=wallet, id__gt=floor).aggregate(
+            net=Sum(Case(
+                When(transaction_type=Transaction.WITHDRAW, then=-F('amount')),
+                default=F('amount'),
+            ))
+        )['net'] or 0
+        consistent = wallet.balance == start_balance + recorded
+        self.stdout.write(
+            f"{label:<11} {threads:>7} {sum(ok) / elapsed:>9.1f} {sum(ok):>6} "
+            f"{sum(conflicts):>9} {sum(errors):>6}  {consistent}"
+        )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from wallets.models import Wallet
+from wallets.services.balance import consolidate_wallet, set_shard_count
+
+
+class Command(BaseCommand):
+    help = "Rebalance sharded wallet slots (run periodically), or change a wallet's shard count"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wallet', type=int, help="Only process this wallet id")
+        parser.add_argument('--shards', type=int, help="Set the shard count for --wallet (1 disables sharding)")
+
+    def handle(self, *args, **options):
+        wallet_id = options.get('wallet')
+        shards = options.get('shards')
+
+        if shards is not None:
+            if wallet_id is None:
+                self.stderr.write(self.style.ERROR("--shards requires --wallet"))
+                return
+            total = set_shard_count(wallet_id, shards)
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Wallet {wallet_id} now uses {max(shards, 1)} slot(s), balance ₦{total}"
+            ))
+            return
+
+        wallets = Wallet.objects.filter(shard_count__gt=1)
+        if wallet_id is not None:
+            wallets = wallets.filter(pk=wallet_id)
+
+        count = 0
+        for pk in wallets.values_list('pk', flat=True).iterator():
+            consolidate_wallet(pk)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Consolidated {count} sharded wallet(s)"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from wallets.services import counters
+from wallets.tasks import recompute_dashboard_counters
+
+
+class Command(BaseCommand):
+    help = "Show the dashboard wallet counters, recount them exactly, or schedule the periodic recount"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recompute', action='store_true', help="Reset the counters to exact totals now")
+        parser.add_argument(
+            '--schedule',
+            action='store_true',
+            help="Queue the self-rescheduling recount job (every DASHBOARD_COUNTERS_RECOMPUTE_INTERVAL seconds)",
+        )
+
+    def handle(self, *args, **options):
+        before = counters.totals()
+        if options['recompute']:
+            after = counters.recompute()
+            drift = (after['total_wallets'] - before['total_wallets'], after['total_balance'] - before['total_balance'])
+            self.stdout.write(self.style.SUCCESS(f"✅ Recounted; corrected drift of {drift[0]} wallet(s), ₦{drift[1]}"))
+            before = after
+
+        if options['schedule']:
+            job = recompute_dashboard_counters.enqueue_once(reschedule=True)
+            self.stdout.write(self.style.SUCCESS(f"✅ Recount job {job.pk} queued"))
+
+        self.stdout.write(f"Wallets: {before['total_wallets']}, balance: ₦{before['total_balance']}")
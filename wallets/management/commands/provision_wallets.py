@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wallets.models import ProvisioningRun
+from wallets.services import provisioning
+
+
+class Command(BaseCommand):
+    help = "Create wallets and Monnify virtual accounts for every user without one, in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, help="Threads calling Monnify (default MONNIFY_PROVISION_CONCURRENCY)")
+        parser.add_argument('--rate', type=float, help="Monnify calls per second (default MONNIFY_PROVISION_RATE, 0 for no limit)")
+        parser.add_argument('--resume', action='store_true', help="Continue the latest unfinished run from its checkpoint")
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            run = provisioning.resumable_run()
+            if run is None:
+                raise CommandError("No unfinished provisioning run to resume")
+            self.stdout.write(f"Resuming run {run.pk} after user {run.last_user_id}")
+        else:
+            run = provisioning.start_run()
+            if not run.max_user_id:
+                run.status = ProvisioningRun.DONE
+                run.save(update_fields=['status'])
+                self.stdout.write(self.style.SUCCESS("✅ Every user already has a wallet"))
+                return
+
+        started = time.perf_counter()
+
+        def report(run, stats, seconds):
+            self.stdout.write(
+                f"Up to user {run.last_user_id}/{run.max_user_id}: {stats['users']} users in {seconds:.1f}s "
+                f"({stats['users'] / seconds:.1f} wallets/s, {stats['calls'] / seconds:.1f} Monnify calls/s); "
+                f"{stats['from_pool']} pooled, {stats['reserved']} reserved, {stats['deferred']} deferred"
+            )
+
+        run = provisioning.provision(
+            run,
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+            rate=options['rate'],
+            on_batch=report,
+        )
+        elapsed = time.perf_counter() - started
+        total = run.from_pool + run.reserved + run.deferred
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Run {run.pk}: {run.wallets_created} wallets created, {run.from_pool} pooled, "
+            f"{run.reserved} reserved, {run.deferred} left to the retry job "
+            f"in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} wallets/s)"
+        ))
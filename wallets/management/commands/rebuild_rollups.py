@@ -0,0 +1,26 @@
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from wallets.services.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild the hour/day transaction rollup tables from Transaction rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            help="Only rebuild buckets from this date (YYYY-MM-DD); default rebuilds everything",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        since = options.get('since')
+        if since is not None:
+            since = timezone.make_aware(datetime.combine(since, datetime.min.time()))
+
+        written = rebuild(since=since, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {written} rollup row(s)"))
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from wallets.services.reconciliation import reconcile
+
+
+class Command(BaseCommand):
+    help = "Check every Wallet balance against the signed sum of its Transactions and report mismatches as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Wallet ids per chunk")
+        parser.add_argument('--processes', type=int, help="Worker processes (default: one per CPU; 1 runs inline)")
+        parser.add_argument('--full', action='store_true', help="Ignore checkpoints and re-read every transaction")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        def progress(result):
+            self.stderr.write(
+                f"Checked {result['wallets']} wallet(s), {result['transactions']} transaction(s), "
+                f"{len(result['mismatches'])} mismatch(es)"
+            )
+
+        report = reconcile(
+            chunk_size=options['chunk_size'],
+            processes=options['processes'],
+            full=options['full'],
+            on_chunk=progress if options['verbosity'] > 1 else None,
+        )
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(payload)
+        else:
+            self.stdout.write(payload)
+
+        rate = report['transactions'] / report['seconds'] if report['seconds'] else 0
+        style = self.style.ERROR if report['mismatches'] else self.style.SUCCESS
+        self.stderr.write(style(
+            f"{len(report['mismatches'])} mismatch(es) across {report['wallets']} wallet(s); "
+            f"{report['transactions']} transaction(s) in {report['seconds']}s ({rate:.0f}/s)"
+        ))
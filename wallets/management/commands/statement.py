@@ -0,0 +1,61 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.files.storage import default_storage
+
+from wallets.models import Wallet
+from wallets.services import statements
+from wallets.tasks import render_statement_pdf
+
+
+class Command(BaseCommand):
+    help = "Write a wallet statement as CSV or NDJSON (streamed) or PDF"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--wallet', type=int, help="Wallet id")
+        target.add_argument('--phone', help="Owner's phone number")
+        parser.add_argument('--start', type=date.fromisoformat, help="First day (YYYY-MM-DD); default: start of this month")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last day (YYYY-MM-DD); default: end of this month")
+        parser.add_argument('--format', choices=['csv', 'ndjson', 'pdf'], default='csv')
+        parser.add_argument('--output', help="File to write; default stdout (required for pdf)")
+
+    def handle(self, *args, **options):
+        lookup = {'pk': options['wallet']} if options['wallet'] else {'user__phone_number': options['phone']}
+        try:
+            wallet = Wallet.objects.select_related('user').get(**lookup)
+        except Wallet.DoesNotExist:
+            raise CommandError("Wallet not found")
+
+        default_start, default_end = statements.month_range()
+        start, end = options['start'] or default_start, options['end'] or default_end
+        if start > end:
+            raise CommandError("--start is after --end")
+
+        if options['format'] == 'pdf':
+            if not options['output']:
+                raise CommandError("--output is required for pdf")
+            result = render_statement_pdf(
+                wallet_id=wallet.pk,
+                start=start.isoformat(),
+                end=end.isoformat(),
+                last_transaction_id=statements.last_transaction_id(wallet, end),
+            )
+            with default_storage.open(result['path'], 'rb') as src, open(options['output'], 'wb') as dst:
+                dst.write(src.read())
+            self.stderr.write(self.style.SUCCESS(f"✅ Wrote {options['output']}"))
+            return
+
+        statement = statements.Statement(wallet, start, end)
+        lines = statement.csv_lines() if options['format'] == 'csv' else statement.ndjson_lines()
+        if options['output']:
+            with open(options['output'], 'wb') as out:
+                for line in lines:
+                    out.write(line)
+        else:
+            for line in lines:
+                self.stdout.write(line.decode('utf-8'), ending='')
+        closing = statement.closing()
+        self.stderr.write(self.style.SUCCESS(
+            f"✅ {closing['count']} transaction(s); closing balance ₦{closing['closing_balance']}"
+        ))
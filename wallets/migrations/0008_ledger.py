@@ -0,0 +1,63 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0007_wallet_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('transaction', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='journal_entry', to='wallets.transaction')),
+            ],
+            options={
+                'verbose_name_plural': 'Journal entries',
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_account', to='wallets.wallet')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JournalLeg',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='legs', to='wallets.journalentry')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='legs', to='wallets.ledgeraccount')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'id'], name='ledger_leg_account_id'), models.Index(fields=['account', 'created_at'], name='ledger_leg_account_created')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leg_id', models.BigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField()),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='checkpoints', to='wallets.ledgeraccount')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'created_at'], name='ledger_checkpoint_created')],
+                'constraints': [models.UniqueConstraint(fields=('account', 'leg_id'), name='unique_checkpoint_per_leg')],
+            },
+        ),
+    ]
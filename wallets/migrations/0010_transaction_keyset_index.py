@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0004_category_product_popular_purchase_status_and_more'),
+        ('wallets', '0009_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['wallet', '-timestamp', '-id'], name='tx_wallet_timestamp_id'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0005_catalog_and_purchase_indexes'),
+        ('wallets', '0010_transaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-timestamp'], name='tx_timestamp'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0011_transaction_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grain', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('dimension', models.CharField(choices=[('all', 'All transactions'), ('type', 'Transaction type'), ('provider', 'Provider'), ('wallet', 'Wallet')], max_length=10)),
+                ('key', models.CharField(blank=True, default='', help_text="Type, provider or wallet id; blank for 'all'", max_length=32)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour or local day')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('volume', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('grain', 'dimension', 'key', 'bucket'), name='unique_transaction_rollup_bucket')],
+            },
+        ),
+    ]
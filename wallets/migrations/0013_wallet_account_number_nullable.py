@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:48
+
+from django.db import migrations, models
+
+
+def blank_to_null(apps, schema_editor):
+    Wallet = apps.get_model('wallets', 'Wallet')
+    Wallet.objects.filter(account_number='').update(account_number=None)
+
+
+def null_to_blank(apps, schema_editor):
+    Wallet = apps.get_model('wallets', 'Wallet')
+    Wallet.objects.filter(account_number__isnull=True).update(account_number='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0012_transactionrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wallet',
+            name='account_number',
+            field=models.CharField(blank=True, help_text='Virtual NUBAN-style account number; empty until Monnify provisioning completes', max_length=10, null=True, unique=True),
+        ),
+        migrations.RunPython(blank_to_null, null_to_blank),
+    ]
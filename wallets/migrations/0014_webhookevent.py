@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:54
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0013_wallet_account_number_nullable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='monnify', max_length=20)),
+                ('reference', models.CharField(help_text='Provider transaction reference', max_length=255)),
+                ('event_type', models.CharField(max_length=50)),
+                ('account_number', models.CharField(blank=True, max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('applied', 'Applied'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('transaction', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='webhook_event', to='wallets.transaction')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='webhook_event_pending')],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'reference'), name='unique_webhook_event_reference')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0014_webhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservedAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_number', models.CharField(max_length=10, unique=True)),
+                ('bank_name', models.CharField(max_length=50)),
+                ('account_reference', models.CharField(help_text='Reference sent to Monnify', max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('assigned_at', models.DateTimeField(blank=True, null=True)),
+                ('wallet', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reserved_account', to='wallets.wallet')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('wallet__isnull', True)), fields=['id'], name='reserved_account_available')],
+            },
+        ),
+    ]
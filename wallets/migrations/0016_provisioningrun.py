@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0015_reservedaccount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProvisioningRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done')], default='running', max_length=10)),
+                ('user_ids', models.JSONField(blank=True, help_text='Restricts the run to these users; empty means all', null=True)),
+                ('max_user_id', models.PositiveBigIntegerField(default=0)),
+                ('last_user_id', models.PositiveBigIntegerField(default=0)),
+                ('wallets_created', models.PositiveIntegerField(default=0)),
+                ('from_pool', models.PositiveIntegerField(default=0)),
+                ('reserved', models.PositiveIntegerField(default=0, help_text='Accounts reserved with Monnify during the run')),
+                ('deferred', models.PositiveIntegerField(default=0, help_text='Wallets left to the provision_virtual_account job')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
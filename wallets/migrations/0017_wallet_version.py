@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0016_provisioningrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Bumped by every balance mutation; orders write-through balance cache entries'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:35
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def seed_counters(apps, schema_editor):
+    # Slot 0 starts from the exact totals; other slots are created on first use
+    Wallet = apps.get_model('wallets', 'Wallet')
+    WalletShard = apps.get_model('wallets', 'WalletShard')
+    DashboardCounter = apps.get_model('wallets', 'DashboardCounter')
+    row = Wallet.objects.aggregate(count=Count('id'), balance=Sum('balance'))
+    shards = WalletShard.objects.aggregate(balance=Sum('balance'))['balance'] or 0
+    DashboardCounter.objects.bulk_create([
+        DashboardCounter(name='wallets', slot=0, value=row['count']),
+        DashboardCounter(name='balance', slot=0, value=(row['balance'] or 0) + shards),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0017_wallet_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(choices=[('wallets', 'Total wallets'), ('balance', 'Total balance')], max_length=16)),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'slot'), name='unique_dashboard_counter_slot')],
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0018_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationCheckpoint',
+            fields=[
+                ('wallet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reconciliation', serialize=False, to='wallets.wallet')),
+                ('transaction_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('last_transaction_id', models.PositiveBigIntegerField(default=0)),
+                ('checked_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0019_reconciliationcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='balance_after',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Wallet balance right after this transaction; empty for sharded wallets', max_digits=12, null=True),
+        ),
+    ]
@@ -0,0 +1,150 @@
+# Full-text index over Transaction.description and the bundle's name,
+# in a side table keyed by transaction id. Database triggers keep it in
+# step with every write, bulk_create included.
+
+from django.db import migrations
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE wallets_transaction_search USING fts5(
+        description, bundle, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER wallets_transaction_search_insert AFTER INSERT ON wallets_transaction BEGIN
+        INSERT INTO wallets_transaction_search (rowid, description, bundle)
+        VALUES (NEW.id, NEW.description, (SELECT name FROM marketplace_product WHERE id = NEW.bundle_id));
+    END
+    """,
+    """
+    CREATE TRIGGER wallets_transaction_search_update
+    AFTER UPDATE OF description, bundle_id ON wallets_transaction BEGIN
+        DELETE FROM wallets_transaction_search WHERE rowid = OLD.id;
+        INSERT INTO wallets_transaction_search (rowid, description, bundle)
+        VALUES (NEW.id, NEW.description, (SELECT name FROM marketplace_product WHERE id = NEW.bundle_id));
+    END
+    """,
+    """
+    CREATE TRIGGER wallets_transaction_search_delete AFTER DELETE ON wallets_transaction BEGIN
+        DELETE FROM wallets_transaction_search WHERE rowid = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER wallets_transaction_search_bundle AFTER UPDATE OF name ON marketplace_product BEGIN
+        UPDATE wallets_transaction_search SET bundle = NEW.name
+        WHERE rowid IN (SELECT id FROM wallets_transaction WHERE bundle_id = NEW.id);
+    END
+    """,
+    """
+    INSERT INTO wallets_transaction_search (rowid, description, bundle)
+    SELECT t.id, t.description, p.name
+    FROM wallets_transaction t LEFT JOIN marketplace_product p ON p.id = t.bundle_id
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS wallets_transaction_search_bundle",
+    "DROP TRIGGER IF EXISTS wallets_transaction_search_delete",
+    "DROP TRIGGER IF EXISTS wallets_transaction_search_update",
+    "DROP TRIGGER IF EXISTS wallets_transaction_search_insert",
+    "DROP TABLE IF EXISTS wallets_transaction_search",
+]
+
+# Description is weight A and the bundle name weight B, so a query can
+# target either with `term:*A` / `term:*B`. No foreign key: Django's test
+# flush truncates wallets_transaction without CASCADE.
+POSTGRES_INSTALL = [
+    """
+    CREATE TABLE wallets_transaction_search (
+        transaction_id bigint PRIMARY KEY,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX wallets_transaction_search_gin ON wallets_transaction_search USING gin (document)",
+    """
+    CREATE FUNCTION wallets_transaction_search_document(description text, bundle_id bigint) RETURNS tsvector AS $$
+        SELECT setweight(to_tsvector('simple', coalesce(description, '')), 'A')
+            || setweight(to_tsvector('simple', coalesce((SELECT name FROM marketplace_product WHERE id = bundle_id), '')), 'B')
+    $$ LANGUAGE sql STABLE
+    """,
+    """
+    CREATE FUNCTION wallets_transaction_search_sync() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            TRUNCATE wallets_transaction_search;
+            RETURN NULL;
+        ELSIF TG_OP = 'DELETE' THEN
+            DELETE FROM wallets_transaction_search WHERE transaction_id = OLD.id;
+            RETURN OLD;
+        END IF;
+        INSERT INTO wallets_transaction_search (transaction_id, document)
+        VALUES (NEW.id, wallets_transaction_search_document(NEW.description, NEW.bundle_id))
+        ON CONFLICT (transaction_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER wallets_transaction_search_sync
+    AFTER INSERT OR UPDATE OF description, bundle_id OR DELETE ON wallets_transaction
+    FOR EACH ROW EXECUTE FUNCTION wallets_transaction_search_sync()
+    """,
+    """
+    CREATE TRIGGER wallets_transaction_search_truncate
+    AFTER TRUNCATE ON wallets_transaction
+    FOR EACH STATEMENT EXECUTE FUNCTION wallets_transaction_search_sync()
+    """,
+    """
+    CREATE FUNCTION wallets_transaction_search_bundle() RETURNS trigger AS $$
+    BEGIN
+        UPDATE wallets_transaction_search s
+        SET document = wallets_transaction_search_document(t.description, t.bundle_id)
+        FROM wallets_transaction t
+        WHERE t.bundle_id = NEW.id AND s.transaction_id = t.id;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER wallets_transaction_search_bundle
+    AFTER UPDATE OF name ON marketplace_product
+    FOR EACH ROW EXECUTE FUNCTION wallets_transaction_search_bundle()
+    """,
+    """
+    INSERT INTO wallets_transaction_search (transaction_id, document)
+    SELECT id, wallets_transaction_search_document(description, bundle_id) FROM wallets_transaction
+    """,
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS wallets_transaction_search_bundle ON marketplace_product",
+    "DROP TRIGGER IF EXISTS wallets_transaction_search_truncate ON wallets_transaction",
+    "DROP TRIGGER IF EXISTS wallets_transaction_search_sync ON wallets_transaction",
+    "DROP FUNCTION IF EXISTS wallets_transaction_search_bundle()",
+    "DROP FUNCTION IF EXISTS wallets_transaction_search_sync()",
+    "DROP FUNCTION IF EXISTS wallets_transaction_search_document(text, bigint)",
+    "DROP TABLE IF EXISTS wallets_transaction_search",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        # Other backends keep the icontains search
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0020_transaction_balance_after'),
+        ('marketplace', '0006_product_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL}),
+            _run({'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0021_transaction_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='walletshard',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='walletshard',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, help_text="Bumped by every write to this slot; adds to the wallet's logical version"),
+        ),
+    ]
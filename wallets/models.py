@@ -1,10 +1,9 @@
 from django.conf import settings
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction as db_transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-
-# ✅ Import Monnify service
-from services.monnify import create_virtual_account
+from django.utils import timezone
 
 
 class Wallet(models.Model):
@@ -19,8 +18,9 @@ class Wallet(models.Model):
     account_number = models.CharField(
         max_length=10,
         unique=True,
+        null=True,
         blank=True,
-        help_text="Virtual NUBAN-style account number"
+        help_text="Virtual NUBAN-style account number; empty until Monnify provisioning completes"
     )
     bank_name = models.CharField(
         max_length=50,
@@ -32,12 +32,94 @@ class Wallet(models.Model):
         decimal_places=2,
         default=0.00
     )
+    shard_count = models.PositiveSmallIntegerField(
+        default=1,
+        help_text="Number of balance slots; above 1 spreads hot-wallet writes across WalletShard rows"
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Bumped by every balance mutation; orders write-through balance cache entries"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(balance__gte=0),
+                name='wallet_balance_non_negative',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.email} — {self.account_number} (₦{self.balance})"
 
+    @property
+    def is_sharded(self):
+        return self.shard_count > 1
+
+    @property
+    def logical_balance(self):
+        """
+        Spendable balance: the wallet row (slot 0) plus every WalletShard slot.
+        """
+        if not self.is_sharded:
+            return self.balance
+        shard_total = self.shards.aggregate(total=models.Sum('balance'))['total'] or 0
+        return self.balance + shard_total
+
+    @property
+    def logical_version(self):
+        """
+        `version` plus every shard's, so writes to any slot advance it
+        without touching the wallet row.
+        """
+        if not self.is_sharded:
+            return self.version
+        return self.version + (self.shards.aggregate(total=models.Sum('version'))['total'] or 0)
+
+    @property
+    def logical_updated_at(self):
+        if not self.is_sharded:
+            return self.updated_at
+        latest = self.shards.aggregate(latest=models.Max('updated_at'))['latest']
+        return max(self.updated_at, latest) if latest else self.updated_at
+
+
+class WalletShard(models.Model):
+    """
+    Extra balance slot for a sharded Wallet. The Wallet row itself is slot 0;
+    shards hold slots 1..shard_count-1 so concurrent writes land on different rows.
+    """
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name='shards'
+    )
+    slot = models.PositiveSmallIntegerField()
+    balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0.00
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Bumped by every write to this slot; adds to the wallet's logical version"
+    )
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'slot'], name='unique_wallet_shard_slot'),
+            models.CheckConstraint(
+                condition=models.Q(balance__gte=0),
+                name='wallet_shard_balance_non_negative',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Wallet {self.wallet_id} slot {self.slot} (₦{self.balance})"
+
 
 class Transaction(models.Model):
     """
@@ -67,6 +149,13 @@ class Transaction(models.Model):
         max_digits=12,
         decimal_places=2
     )
+    balance_after = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Wallet balance right after this transaction; empty for sharded wallets"
+    )
     bundle = models.ForeignKey(
         'marketplace.Product',  # ✅ Use string path to avoid import errors during migration
         on_delete=models.SET_NULL,
@@ -81,19 +170,395 @@ class Transaction(models.Model):
     )
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (wallet, timestamp, id)
+            models.Index(fields=['wallet', '-timestamp', '-id'], name='tx_wallet_timestamp_id'),
+            # Admin dashboard range scans and the admin changelist ordering
+            models.Index(fields=['-timestamp'], name='tx_timestamp'),
+        ]
+
     def __str__(self):
         return f"{self.wallet.user.email} — {self.transaction_type.capitalize()} ₦{self.amount}"
 
+    def save(self, *args, **kwargs):
+        # post_save handlers (ledger, rollups) must commit or fail together with the row
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class TransactionRollup(models.Model):
+    """
+    Pre-aggregated Transaction count and volume per hour or day bucket,
+    kept globally and per transaction type, provider and wallet. Updated in
+    the same DB transaction as each Transaction insert.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    GRAIN_CHOICES = [
+        (HOUR, 'Hour'),
+        (DAY, 'Day'),
+    ]
+
+    ALL = 'all'
+    TYPE = 'type'
+    PROVIDER = 'provider'
+    WALLET = 'wallet'
+    DIMENSION_CHOICES = [
+        (ALL, 'All transactions'),
+        (TYPE, 'Transaction type'),
+        (PROVIDER, 'Provider'),
+        (WALLET, 'Wallet'),
+    ]
+
+    grain = models.CharField(max_length=4, choices=GRAIN_CHOICES)
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=32, blank=True, default='', help_text="Type, provider or wallet id; blank for 'all'")
+    bucket = models.DateTimeField(help_text="Start of the hour or local day")
+    count = models.PositiveBigIntegerField(default=0)
+    volume = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['grain', 'dimension', 'key', 'bucket'],
+                name='unique_transaction_rollup_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.grain}/{self.dimension}:{self.key or '*'} @ {self.bucket:%Y-%m-%d %H:%M} → {self.count} / ₦{self.volume}"
+
+
+class DashboardCounter(models.Model):
+    """
+    Running wallet totals for the admin dashboard. Each counter is spread
+    over several slot rows so concurrent writers rarely touch the same row;
+    its value is the sum of its slots.
+    """
+    WALLETS = 'wallets'
+    BALANCE = 'balance'
+    NAME_CHOICES = [
+        (WALLETS, 'Total wallets'),
+        (BALANCE, 'Total balance'),
+    ]
+
+    name = models.CharField(max_length=16, choices=NAME_CHOICES)
+    slot = models.PositiveSmallIntegerField()
+    value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'slot'], name='unique_dashboard_counter_slot'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}[{self.slot}] = {self.value}"
+
+
+class LedgerImmutableError(Exception):
+    """
+    Raised on any attempt to modify or delete a posted ledger row.
+    """
+
+
+class AppendOnlyQuerySet(models.QuerySet):
+    """
+    Ledger rows are immutable: bulk updates and deletes are refused.
+    """
+    def update(self, **kwargs):
+        raise LedgerImmutableError(f"{self.model.__name__} rows are append-only.")
+
+    def delete(self):
+        raise LedgerImmutableError(f"{self.model.__name__} rows are append-only.")
+
+
+class AppendOnlyModel(models.Model):
+    objects = AppendOnlyQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise LedgerImmutableError(f"{type(self).__name__} rows are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise LedgerImmutableError(f"{type(self).__name__} rows are append-only.")
+
+
+class LedgerAccount(models.Model):
+    """
+    An account in the double-entry ledger: one per wallet, plus system
+    accounts (funding, payouts, sales) that sit on the other side of each entry.
+    Wallet-to-wallet transfers clear through `transfers`, which nets to zero.
+    """
+    FUNDING = 'system:funding'
+    PAYOUTS = 'system:payouts'
+    SALES = 'system:sales'
+    TRANSFERS = 'system:transfers'
+
+    code = models.CharField(max_length=50, unique=True)
+    wallet = models.OneToOneField(
+        Wallet,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ledger_account'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.code
+
+
+class JournalEntry(AppendOnlyModel):
+    """
+    One balanced, immutable posting. Its legs always sum to zero.
+    """
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='journal_entry'
+    )
+    description = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "Journal entries"
+
+    def __str__(self):
+        return f"Entry #{self.pk} — {self.description}"
+
+
+class JournalLeg(AppendOnlyModel):
+    """
+    A single debit or credit line of a JournalEntry.
+    `amount` is signed: credits are positive, debits negative, so an
+    account's balance is the plain sum of its legs.
+    """
+    entry = models.ForeignKey(
+        JournalEntry,
+        on_delete=models.PROTECT,
+        related_name='legs'
+    )
+    account = models.ForeignKey(
+        LedgerAccount,
+        on_delete=models.PROTECT,
+        related_name='legs'
+    )
+    amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'id'], name='ledger_leg_account_id'),
+            models.Index(fields=['account', 'created_at'], name='ledger_leg_account_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.account.code} {self.amount:+}"
+
+
+class BalanceCheckpoint(AppendOnlyModel):
+    """
+    Running balance of a LedgerAccount up to and including `leg_id`,
+    written every LEDGER_CHECKPOINT_INTERVAL legs.
+    """
+    account = models.ForeignKey(
+        LedgerAccount,
+        on_delete=models.PROTECT,
+        related_name='checkpoints'
+    )
+    leg_id = models.BigIntegerField()
+    balance = models.DecimalField(
+        max_digits=14,
+        decimal_places=2
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'leg_id'], name='unique_checkpoint_per_leg'),
+        ]
+        indexes = [
+            models.Index(fields=['account', 'created_at'], name='ledger_checkpoint_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.account.code} @ leg {self.leg_id}: ₦{self.balance}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a money-moving request, keyed by the client's
+    Idempotency-Key header, so retries replay the response instead of
+    writing again.
+    """
+    scope = models.CharField(max_length=50, help_text="Endpoint the key belongs to")
+    key = models.CharField(max_length=300, help_text="Client key, prefixed with the user id")
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_key_per_scope'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} → {self.response_status}"
+
+
+class WebhookEvent(models.Model):
+    """
+    Inbox of payment provider webhook deliveries. The webhook view only
+    verifies and stores the event; a job applies pending events to wallets
+    in batches. The unique reference turns redeliveries into no-ops.
+    """
+    PENDING = 'pending'
+    APPLIED = 'applied'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (APPLIED, 'Applied'),
+        (FAILED, 'Failed'),
+    ]
+
+    provider = models.CharField(max_length=20, default='monnify')
+    reference = models.CharField(max_length=255, help_text="Provider transaction reference")
+    event_type = models.CharField(max_length=50)
+    account_number = models.CharField(max_length=10, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.CharField(max_length=255, blank=True)
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='webhook_event',
+    )
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'reference'], name='unique_webhook_event_reference'),
+        ]
+        indexes = [
+            # Consumer scan over the unapplied backlog
+            models.Index(fields=['id'], name='webhook_event_pending', condition=models.Q(status='pending')),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.reference} ({self.status})"
+
+
+class ReservedAccount(models.Model):
+    """
+    Monnify reserved account created ahead of demand. A background refiller
+    keeps a stock of unassigned rows so signup can hand one to the new
+    wallet without calling Monnify.
+    """
+    account_number = models.CharField(max_length=10, unique=True)
+    bank_name = models.CharField(max_length=50)
+    account_reference = models.CharField(max_length=64, unique=True, help_text="Reference sent to Monnify")
+    wallet = models.OneToOneField(
+        Wallet,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reserved_account',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    assigned_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claim scan and depth count over the unassigned stock
+            models.Index(fields=['id'], name='reserved_account_available', condition=models.Q(wallet__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.account_number} ({'assigned' if self.wallet_id else 'available'})"
+
+
+class ProvisioningRun(models.Model):
+    """
+    Checkpoint of a bulk wallet provisioning run. Users are processed in
+    id order up to `max_user_id`, and `last_user_id` advances after every
+    committed batch, so an interrupted run resumes where it stopped.
+    """
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    user_ids = models.JSONField(null=True, blank=True, help_text="Restricts the run to these users; empty means all")
+    max_user_id = models.PositiveBigIntegerField(default=0)
+    last_user_id = models.PositiveBigIntegerField(default=0)
+    wallets_created = models.PositiveIntegerField(default=0)
+    from_pool = models.PositiveIntegerField(default=0)
+    reserved = models.PositiveIntegerField(default=0, help_text="Accounts reserved with Monnify during the run")
+    deferred = models.PositiveIntegerField(default=0, help_text="Wallets left to the provision_virtual_account job")
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Provisioning run {self.pk} ({self.status}, up to user {self.last_user_id}/{self.max_user_id})"
+
+
+class ReconciliationCheckpoint(models.Model):
+    """
+    Signed sum of a wallet's Transactions up to `last_transaction_id`, so
+    `reconcile_wallets` only reads transactions added since its last run.
+    """
+    wallet = models.OneToOneField(
+        Wallet,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='reconciliation',
+    )
+    transaction_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    last_transaction_id = models.PositiveBigIntegerField(default=0)
+    checked_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Wallet {self.wallet_id}: ₦{self.transaction_total} up to transaction {self.last_transaction_id}"
+
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_wallet_for_new_user(sender, instance, created, **kwargs):
     """
-    Auto-creates a wallet with Monnify virtual account when a new user is registered.
+    Auto-creates a wallet when a new user is registered and hands it an
+    account from the warm pool. When the pool is empty the account is
+    requested by a background job instead, so signup never waits on Monnify.
+    Skipped inside `provisioning.suppress_wallet_signal()`, for bulk imports
+    that run `provision_wallets` afterwards.
     """
     if created:
-        account_data = create_virtual_account(instance)
-        Wallet.objects.create(
-            user=instance,
-            account_number=account_data['account_number'],
-            bank_name=account_data['bank_name']
-        )
\ No newline at end of file
+        from wallets.services import account_pool, provisioning
+        from wallets.tasks import provision_virtual_account, refill_account_pool
+
+        if provisioning.signal_suppressed():
+            return
+
+        wallet = Wallet.objects.create(user=instance)
+        if account_pool.assign(wallet) is None:
+            provision_virtual_account.enqueue(wallet_id=wallet.pk)
+        if account_pool.needs_refill():
+            refill_account_pool.enqueue_once()
@@ -0,0 +1,183 @@
+# wallets/pagination.py
+
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.encoding import force_str
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the queryset's ordering plus `id` as a
+    tie-breaker, e.g. `(timestamp, id)`. Each page is a single indexed range
+    scan with no COUNT(*), so page N costs the same as page 1.
+
+    Cursors are opaque base64 tokens holding the boundary row's sort values.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 500
+    default_ordering = ('-timestamp', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+
+        values, self.reverse = self.decode_cursor(request, queryset.model)
+        ordering = [self._order_by(name, desc ^ self.reverse) for name, desc in self.keys]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.page = rows
+        if self.reverse:
+            self.has_next, self.has_previous = values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # ----------------------------------------------------------------
+    # Ordering helpers
+    # ----------------------------------------------------------------
+    def get_keys(self, queryset):
+        """
+        Returns [(field_name, descending), ...] from the queryset's current
+        ordering (as set by OrderingFilter), always ending with `id`.
+        """
+        ordering = [o for o in queryset.query.order_by if isinstance(o, str)] or list(self.default_ordering)
+        keys = []
+        for term in ordering:
+            name = term.lstrip('-')
+            name = 'id' if name == 'pk' else name
+            keys.append((name, term.startswith('-')))
+        if 'id' not in dict(keys):
+            keys.append(('id', keys[0][1]))
+        return keys
+
+    @staticmethod
+    def _order_by(name, desc):
+        return f"-{name}" if desc else name
+
+    def _seek(self, values):
+        clauses = []
+        for i, (name, desc) in enumerate(self.keys):
+            lookup = 'lt' if desc ^ self.reverse else 'gt'
+            clause = Q(**{f"{name}__{lookup}": values[i]})
+            for j, (prev_name, _) in enumerate(self.keys[:i]):
+                clause &= Q(**{prev_name: values[j]})
+            clauses.append(clause)
+        # Redundant bound on the leading key so the planner can range-scan the index
+        name, desc = self.keys[0]
+        bound = Q(**{f"{name}__{'lte' if desc ^ self.reverse else 'gte'}": values[0]})
+        return bound & reduce(or_, clauses)
+
+    # ----------------------------------------------------------------
+    # Cursor encoding
+    # ----------------------------------------------------------------
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, values, reverse=False):
+        payload = {'v': [force_str(v) if v is not None else None for v in values], 'r': int(reverse)}
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            payload = json.loads(raw)
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.keys, payload['v'], strict=True)
+            ]
+            return values, bool(payload.get('r'))
+        except (binascii.Error, ValueError, KeyError, TypeError,
+                FieldDoesNotExist, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _row_values(self, row):
+        return [getattr(row, name) for name, _ in self.keys]
+
+    def _link(self, row, reverse):
+        cursor = self.encode_cursor(self._row_values(row), reverse)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+
+class TransactionPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination by default (unchanged for existing clients).
+    `?pagination=cursor`, or any request carrying `?cursor=`, switches to
+    KeysetPagination, which skips the COUNT(*) and stays flat at any depth.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.keyset_class.cursor_query_param in request.query_params):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
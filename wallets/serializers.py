@@ -1,9 +1,30 @@
 # wallets/serializers.py
 
+from decimal import Decimal
+
+from django.conf import settings
 from rest_framework import serializers
 from .models import Wallet, Transaction
 
 
+class SparseFieldsetMixin:
+    """
+    Honours `?fields=a,b` by dropping every other field before
+    serialization, so skipped fields (and the queries behind them) never
+    run. Unknown names are ignored.
+    """
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get(self.fields_query_param) if request else None
+        if requested:
+            keep = {name.strip() for name in requested.split(',')}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+
 class TopUpSerializer(serializers.Serializer):
     """
     Validates wallet top-up input. Requires amount ≥ ₦0.01.
@@ -34,10 +55,75 @@ class WithdrawSerializer(serializers.Serializer):
     )
 
 
+class WalletBalanceSerializer(serializers.Serializer):
+    """
+    Balance-only wallet view for polling clients. `version` increases
+    with every balance change.
+    """
+    balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    version = serializers.IntegerField(read_only=True)
+
+
+class WalletBalanceAtSerializer(serializers.Serializer):
+    """
+    Point-in-time balance: the running balance after `transaction`, the
+    wallet's last Transaction at or before `at`.
+    """
+    balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    at = serializers.DateTimeField(read_only=True)
+    transaction = serializers.IntegerField(read_only=True, allow_null=True)
+
+
+class BulkTransferLineSerializer(serializers.Serializer):
+    recipient = serializers.CharField(max_length=15, help_text="Recipient's phone number")
+    amount = serializers.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        min_value=Decimal('0.01'),
+        error_messages={'min_value': 'Minimum transfer is ₦0.01.'}
+    )
+
+
+class BulkTransferSerializer(serializers.Serializer):
+    """
+    Validates a bulk transfer: one to BULK_TRANSFER_MAX_LINES
+    recipient/amount lines.
+    """
+    lines = BulkTransferLineSerializer(many=True, allow_empty=False)
+
+    def validate_lines(self, lines):
+        limit = getattr(settings, 'BULK_TRANSFER_MAX_LINES', 10_000)
+        if len(lines) > limit:
+            raise serializers.ValidationError(f"At most {limit} lines per transfer.")
+        return lines
+
+
+class BulkTransferLineResultSerializer(serializers.Serializer):
+    line = serializers.IntegerField(read_only=True)
+    recipient = serializers.CharField(read_only=True)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    status = serializers.CharField(read_only=True)
+    transaction = serializers.IntegerField(read_only=True, required=False)
+    error = serializers.CharField(read_only=True, required=False)
+
+
+class BulkTransferResultSerializer(serializers.Serializer):
+    """
+    Outcome of a bulk transfer: the source's new balance, the total moved
+    and one result per input line, in input order.
+    """
+    balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    credited = serializers.IntegerField(read_only=True)
+    failed = serializers.IntegerField(read_only=True)
+    lines = BulkTransferLineResultSerializer(many=True, read_only=True)
+
+
 class TransactionSerializer(serializers.ModelSerializer):
     """
     Serializer for Transaction model.
-    Displays transaction type, amount, bundle, description, and timestamp.
+    Displays transaction type, amount, running balance, bundle,
+    description, and timestamp.
     """
     bundle = serializers.StringRelatedField(read_only=True)
 
@@ -47,22 +133,32 @@ class TransactionSerializer(serializers.ModelSerializer):
             'id',
             'transaction_type',
             'amount',
+            'balance_after',
             'bundle',
             'description',
             'timestamp',
         ]
-        read_only_fields = ['id', 'timestamp']
+        read_only_fields = ['id', 'balance_after', 'timestamp']
 
 
-class WalletSerializer(serializers.ModelSerializer):
+class WalletSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Wallet model.
-    Displays user info, virtual account details, balance,
-    timestamps, and optional transaction history.
+    Displays user info, virtual account details, balance and timestamps.
+    Transaction history is opt-in with `?history=N` (capped at
+    WALLET_HISTORY_MAX); `?fields=` trims the payload further.
     """
     user = serializers.StringRelatedField(read_only=True)
     account_number = serializers.CharField(read_only=True)
     bank_name = serializers.CharField(read_only=True)
+    balance = serializers.DecimalField(
+        source='logical_balance',
+        max_digits=12,
+        decimal_places=2,
+        read_only=True
+    )
+    version = serializers.IntegerField(source='logical_version', read_only=True)
+    updated_at = serializers.DateTimeField(source='logical_updated_at', read_only=True)
     history = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -73,6 +169,7 @@ class WalletSerializer(serializers.ModelSerializer):
             'account_number',
             'bank_name',
             'balance',
+            'version',
             'created_at',
             'updated_at',
             'history',
@@ -83,19 +180,36 @@ class WalletSerializer(serializers.ModelSerializer):
             'account_number',
             'bank_name',
             'balance',
+            'version',
             'created_at',
             'updated_at',
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.history_size:
+            self.fields.pop('history', None)
+
+    @property
+    def history_size(self):
+        request = self.context.get('request')
+        size = request.query_params.get('history', '') if request else ''
+        if not size.isdigit():
+            return 0
+        return min(int(size), getattr(settings, 'WALLET_HISTORY_MAX', 50))
+
     def get_history(self, wallet):
         """
-        Returns the wallet’s latest transactions,
-        sorted newest first. Supports ?limit=N.
+        Returns the wallet’s latest `?history=N` transactions, newest
+        first, loading only the columns TransactionSerializer renders.
         """
-        qs = wallet.transactions.select_related('bundle').order_by('-timestamp')
-        request = self.context.get('request')
-        if request:
-            limit = request.query_params.get('limit')
-            if limit and limit.isdigit():
-                qs = qs[:int(limit)]
+        qs = (
+            wallet.transactions
+            .select_related('bundle')
+            .only(
+                'id', 'wallet', 'transaction_type', 'amount', 'balance_after', 'description', 'timestamp',
+                'bundle', 'bundle__provider', 'bundle__product_type', 'bundle__value',
+            )
+            .order_by('-timestamp', '-id')[:self.history_size]
+        )
         return TransactionSerializer(qs, many=True, context=self.context).data
\ No newline at end of file
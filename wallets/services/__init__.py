@@ -0,0 +1 @@
+# Init file for wallets service layer
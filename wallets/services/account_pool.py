@@ -0,0 +1,238 @@
+# wallets/services/account_pool.py
+
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, models, transaction
+from django.utils import timezone
+
+from services.monnify import MonnifyError, MonnifyUnavailable, get_client
+from wallets.models import ReservedAccount, Wallet
+
+from .bulk import case_by_pk
+
+logger = logging.getLogger('monnify')
+
+ALARM_CACHE_KEY = 'account_pool:low_water_alarm'
+ALARM_INTERVAL = 60 * 5
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def target():
+    return _setting('MONNIFY_POOL_TARGET', 200)
+
+
+def refill_at():
+    return _setting('MONNIFY_POOL_REFILL_AT', 100)
+
+
+def low_water():
+    return _setting('MONNIFY_POOL_LOW_WATER', 20)
+
+
+def available():
+    return ReservedAccount.objects.filter(wallet__isnull=True).count()
+
+
+# -------------------------------------------------------------------
+# Claiming
+# -------------------------------------------------------------------
+def assign(wallet):
+    """
+    Hands an unassigned pooled account to `wallet` without any network
+    I/O. Returns the ReservedAccount, or None when the pool is empty.
+
+    On PostgreSQL the row is locked with SELECT ... FOR UPDATE SKIP
+    LOCKED, so concurrent signups take different rows. Elsewhere (SQLite)
+    each candidate is claimed with a conditional UPDATE and lost races
+    move on to the next one.
+
+    The Monnify reservation keeps the customer details it was made under
+    (MONNIFY_POOL_ACCOUNT_NAME and _EMAIL): nothing here updates them, so
+    payers see that name rather than the wallet owner's on transfers.
+    Deployments that need the holder's name should set
+    MONNIFY_POOL_TARGET to 0, so the pool is not refilled and signups
+    reserve per user once the remaining pooled accounts are used up.
+    """
+    now = timezone.now()
+    candidates = ReservedAccount.objects.filter(wallet__isnull=True).order_by('id')
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            account = candidates.select_for_update(skip_locked=True).first()
+            if account is not None:
+                ReservedAccount.objects.filter(pk=account.pk).update(wallet=wallet, assigned_at=now)
+        else:
+            account = None
+            for candidate in candidates[:5]:
+                if ReservedAccount.objects.filter(pk=candidate.pk, wallet__isnull=True).update(
+                    wallet=wallet, assigned_at=now
+                ):
+                    account = candidate
+                    break
+
+        if account is None:
+            return None
+
+        Wallet.objects.filter(pk=wallet.pk).update(
+            account_number=account.account_number,
+            bank_name=account.bank_name,
+            updated_at=now,
+        )
+
+    account.wallet, account.assigned_at = wallet, now
+    wallet.account_number, wallet.bank_name = account.account_number, account.bank_name
+    return account
+
+
+def assign_many(wallets):
+    """
+    Bulk form of `assign` for provisioning runs: hands pooled accounts to
+    as many of `wallets` as the pool covers and returns the number assigned.
+    """
+    if not connection.features.has_select_for_update_skip_locked:
+        assigned = 0
+        for wallet in wallets:
+            if assign(wallet) is None:
+                break
+            assigned += 1
+        return assigned
+
+    now = timezone.now()
+    with transaction.atomic():
+        accounts = list(
+            ReservedAccount.objects.filter(wallet__isnull=True).order_by('id')
+            .select_for_update(skip_locked=True)[:len(wallets)]
+        )
+        written = write_accounts({
+            wallet.pk: (account.account_number, account.bank_name) for account, wallet in zip(accounts, wallets)
+        }, now)
+        # Accounts of wallets provisioned meanwhile stay in the pool
+        assigned = [(account, wallet) for account, wallet in zip(accounts, wallets) if wallet.pk in written]
+        for account, wallet in assigned:
+            account.wallet, account.assigned_at = wallet, now
+            wallet.account_number, wallet.bank_name, wallet.updated_at = account.account_number, account.bank_name, now
+        ReservedAccount.objects.bulk_update([account for account, _ in assigned], ['wallet', 'assigned_at'])
+    return len(assigned)
+
+
+def write_accounts(accounts, now):
+    """
+    Stores `{wallet_pk: (account_number, bank_name)}` in one UPDATE, only
+    on wallets that still have no account number: one that got an account
+    meanwhile (e.g. from provision_virtual_account) keeps it. Returns the
+    pks of the wallets written.
+    """
+    if not accounts:
+        return set()
+    Wallet.objects.filter(pk__in=accounts, account_number__isnull=True).update(
+        account_number=case_by_pk({pk: number for pk, (number, _) in accounts.items()}, models.CharField()),
+        bank_name=case_by_pk({pk: bank for pk, (_, bank) in accounts.items()}, models.CharField()),
+        updated_at=now,
+    )
+    return {
+        pk for pk, number in Wallet.objects.filter(pk__in=accounts).values_list('pk', 'account_number')
+        if number == accounts[pk][0]
+    }
+
+
+# -------------------------------------------------------------------
+# Depth and alarm
+# -------------------------------------------------------------------
+def pool_stats():
+    """
+    Pool depth figures for the admin dashboard and the `account_pool` command.
+    """
+    depth = available()
+    return {
+        'available': depth,
+        'assigned': ReservedAccount.objects.filter(wallet__isnull=False).count(),
+        'target': target(),
+        'refill_at': refill_at(),
+        'low_water': low_water(),
+        'is_low': depth <= low_water(),
+    }
+
+
+def needs_refill():
+    """
+    True once the pool has drained to MONNIFY_POOL_REFILL_AT. Raises the
+    low-water alarm on the way, at most once per ALARM_INTERVAL. A
+    MONNIFY_POOL_TARGET of 0 disables the pool.
+    """
+    if not target():
+        return False
+    depth = available()
+    if depth <= low_water() and cache.add(ALARM_CACHE_KEY, depth, timeout=ALARM_INTERVAL):
+        logger.warning(
+            "Reserved account pool low: %s available (low water %s, target %s)",
+            depth, low_water(), target(),
+        )
+    return depth <= refill_at()
+
+
+# -------------------------------------------------------------------
+# Refilling
+# -------------------------------------------------------------------
+def refill(limit=None, concurrency=None, client=None, on_reserved=None):
+    """
+    Reserves accounts until the pool holds MONNIFY_POOL_TARGET unassigned
+    rows (or `limit` new ones), with at most `concurrency` Monnify calls
+    in flight. Rows are stored as each call completes, so an interrupted
+    refill keeps what it already reserved, and `on_reserved(account)` is
+    called after each one. Stops early once the circuit breaker opens.
+
+    Returns `{'created', 'failed', 'available'}`.
+    """
+    client = client or get_client()
+    concurrency = concurrency or _setting('MONNIFY_POOL_REFILL_CONCURRENCY', 4)
+    shortfall = max(target() - available(), 0)
+    if limit is not None:
+        shortfall = min(shortfall, limit)
+
+    name = _setting('MONNIFY_POOL_ACCOUNT_NAME', 'Wallet Customer')
+    email = _setting('MONNIFY_POOL_ACCOUNT_EMAIL', 'wallets@example.com')
+
+    def reserve(reference):
+        return reference, client.reserve_account(reference, name, email)
+
+    created = 0
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = [executor.submit(reserve, f"pool-{uuid.uuid4().hex}") for _ in range(shortfall)]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            try:
+                reference, account = future.result()
+            except MonnifyUnavailable:
+                executor.shutdown(wait=False, cancel_futures=True)
+                continue
+            except MonnifyError as exc:
+                logger.warning("Reserved account pool refill call failed: %s", exc)
+                continue
+            try:
+                with transaction.atomic():
+                    pooled = ReservedAccount.objects.create(
+                        account_number=account['account_number'],
+                        bank_name=account['bank_name'],
+                        account_reference=reference,
+                    )
+            except IntegrityError:
+                logger.warning("Monnify returned account %s twice; skipped", account['account_number'])
+                continue
+            created += 1
+            if on_reserved:
+                on_reserved(pooled)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if created:
+        cache.delete(ALARM_CACHE_KEY)
+    return {'created': created, 'failed': shortfall - created, 'available': available()}
@@ -0,0 +1,280 @@
+# wallets/services/balance.py
+
+import random
+import time
+from decimal import Decimal, ROUND_DOWN
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from wallets.models import Wallet, WalletShard
+
+from . import balance_cache, counters
+
+CENT = Decimal('0.01')
+
+ATOMIC = 'atomic'
+OPTIMISTIC = 'optimistic'
+RETRY_BACKOFF = 0.002  # Seconds; doubled per retry, with full jitter
+
+
+class InsufficientFunds(Exception):
+    """
+    Raised when a conditional debit matches no row because the
+    wallet balance is lower than the requested amount.
+    """
+
+
+class WriteConflict(Exception):
+    """
+    Raised when an optimistic write still finds the wallet's version
+    changed after every retry.
+    """
+
+
+def concurrency_mode():
+    # ATOMIC: conditional F() updates; OPTIMISTIC: version-checked writes with retry
+    return getattr(settings, 'WALLET_CONCURRENCY', ATOMIC)
+
+
+def optimistic_retries():
+    return getattr(settings, 'WALLET_OPTIMISTIC_RETRIES', 5)
+
+
+def debit_wallet(wallet_id, amount):
+    """
+    Atomically subtracts `amount` from a wallet without taking a row lock.
+
+    Runs a single `UPDATE ... SET balance = balance - x
+    WHERE id = ? AND balance >= x`, so two concurrent debits can never
+    overdraw the wallet or lose an update. Raises InsufficientFunds when
+    no row was affected. Sharded wallets fall through to `_debit_sharded`.
+    The new balance is written through to the balance cache on commit.
+
+    Returns the new balance, for the Transaction's `balance_after`. The
+    wallet row stays locked by the update until commit, so no other write
+    can slip in between. Sharded wallets return None: their slots are
+    written without a common lock, so there is no exact balance to report.
+    """
+    amount = Decimal(amount)
+    updated = (
+        Wallet.objects
+        .filter(pk=wallet_id, balance__gte=amount, shard_count__lte=1)
+        .update(balance=F('balance') - amount, version=F('version') + 1, updated_at=timezone.now())
+    )
+    balance = None
+    if updated:
+        balance = balance_cache.write_through(wallet_id)
+    else:
+        wallet = Wallet.objects.only('id', 'shard_count').get(pk=wallet_id)
+        if not wallet.is_sharded:
+            raise InsufficientFunds("Insufficient funds.")
+        _debit_sharded(wallet, amount)
+    counters.add(balance=-amount)
+    return balance
+
+
+def credit_wallet(wallet_id, amount):
+    """
+    Atomically adds `amount` to a wallet with a single `F()` update.
+    Sharded wallets are credited on a randomly picked slot, or on the
+    wallet row (slot 0) when that shard row is missing. Returns the new
+    balance like `debit_wallet`.
+    """
+    amount = Decimal(amount)
+    updated = (
+        Wallet.objects
+        .filter(pk=wallet_id, shard_count__lte=1)
+        .update(balance=F('balance') + amount, version=F('version') + 1, updated_at=timezone.now())
+    )
+    if updated:
+        balance = balance_cache.write_through(wallet_id)
+        counters.add(balance=amount)
+        return balance
+
+    wallet = Wallet.objects.only('id', 'shard_count').get(pk=wallet_id)
+    slot = random.randrange(wallet.shard_count)
+    now = timezone.now()
+    credited = slot and WalletShard.objects.filter(wallet_id=wallet.pk, slot=slot).update(
+        balance=F('balance') + amount,
+        version=F('version') + 1,
+        updated_at=now,
+    )
+    if not credited:
+        Wallet.objects.filter(pk=wallet.pk).update(
+            balance=F('balance') + amount,
+            version=F('version') + 1,
+            updated_at=now,
+        )
+    counters.add(balance=amount)
+    return None
+
+
+def apply_versioned(wallet_id, amount, debit=False, record=None, retries=None):
+    """
+    Optimistic credit or debit: reads the balance and version without a
+    lock, computes the new balance, and writes it with
+    `UPDATE ... SET balance = new, version = version + 1
+    WHERE id = ? AND version = seen`. When another write got there first
+    no row matches, and the read-compute-write is retried after a short
+    jittered backoff, at most `retries` times (WALLET_OPTIMISTIC_RETRIES)
+    before WriteConflict. Raises InsufficientFunds when the balance read
+    does not cover a debit.
+
+    Each attempt is its own short transaction (a savepoint inside an outer
+    one). `record(balance)` runs in it right after the update succeeds,
+    so e.g. the Transaction row commits with the balance. Sharded wallets
+    have no single version to check and use credit_wallet/debit_wallet.
+    Returns the new balance.
+    """
+    amount = Decimal(amount)
+    retries = optimistic_retries() if retries is None else retries
+    for attempt in range(retries + 1):
+        balance, version, shard_count = (
+            Wallet.objects.filter(pk=wallet_id).values_list('balance', 'version', 'shard_count').get()
+        )
+        with transaction.atomic():
+            if shard_count > 1:
+                new_balance = (debit_wallet if debit else credit_wallet)(wallet_id, amount)
+                if record:
+                    record(new_balance)
+                return new_balance
+
+            new_balance = balance - amount if debit else balance + amount
+            if new_balance < 0:
+                raise InsufficientFunds("Insufficient funds.")
+            updated = Wallet.objects.filter(pk=wallet_id, version=version).update(
+                balance=new_balance,
+                version=version + 1,
+                updated_at=timezone.now(),
+            )
+            if updated:
+                transaction.on_commit(lambda: balance_cache.store(wallet_id, new_balance, version + 1))
+                counters.add(balance=-amount if debit else amount)
+                if record:
+                    record(new_balance)
+                return new_balance
+
+        if attempt < retries:
+            time.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** attempt))
+    raise WriteConflict("The wallet was changed concurrently; please retry.")
+
+
+# -------------------------------------------------------------------
+# Sharded hot wallets
+# -------------------------------------------------------------------
+# Every slot write bumps that row's own `version` and `updated_at`, so the
+# wallet's logical version (Wallet.logical_version) advances without
+# every write contending on the wallet row.
+def _debit_slot(wallet_id, slot, amount):
+    if slot == 0:
+        return Wallet.objects.filter(pk=wallet_id, balance__gte=amount).update(
+            balance=F('balance') - amount,
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+    return WalletShard.objects.filter(wallet_id=wallet_id, slot=slot, balance__gte=amount).update(
+        balance=F('balance') - amount,
+        version=F('version') + 1,
+        updated_at=timezone.now(),
+    )
+
+
+def _debit_sharded(wallet, amount):
+    """
+    Tries each slot with a conditional update, starting from a random one.
+    Only when no single slot covers `amount` are all slots locked (wallet
+    row first, then shards by slot) and drained in order.
+    """
+    slots = list(range(wallet.shard_count))
+    start = random.randrange(len(slots))
+    for slot in slots[start:] + slots[:start]:
+        if _debit_slot(wallet.pk, slot, amount):
+            return
+
+    with transaction.atomic():
+        locked = Wallet.objects.select_for_update(no_key=True).get(pk=wallet.pk)
+        shards = list(
+            WalletShard.objects.select_for_update(no_key=True)
+            .filter(wallet=locked)
+            .order_by('slot')
+        )
+        if locked.balance + sum(s.balance for s in shards) < amount:
+            raise InsufficientFunds("Insufficient funds.")
+
+        now = timezone.now()
+        remaining = amount
+        for shard in shards:
+            take = min(shard.balance, remaining)
+            if take:
+                WalletShard.objects.filter(pk=shard.pk).update(
+                    balance=F('balance') - take,
+                    version=F('version') + 1,
+                    updated_at=now,
+                )
+                remaining -= take
+            if not remaining:
+                break
+        if remaining:
+            Wallet.objects.filter(pk=locked.pk).update(
+                balance=F('balance') - remaining,
+                version=F('version') + 1,
+                updated_at=now,
+            )
+
+
+def consolidate_wallet(wallet_id):
+    """
+    Sums every slot of a sharded wallet and spreads the total evenly again,
+    so later debits are unlikely to need the borrowing path. Returns the
+    logical balance.
+    """
+    with transaction.atomic():
+        wallet = Wallet.objects.select_for_update(no_key=True).get(pk=wallet_id)
+        shards = list(
+            WalletShard.objects.select_for_update(no_key=True)
+            .filter(wallet=wallet)
+            .order_by('slot')
+        )
+        total = wallet.balance + sum(s.balance for s in shards)
+        if not shards:
+            return total
+
+        share = (total / (len(shards) + 1)).quantize(CENT, rounding=ROUND_DOWN)
+        for shard in shards:
+            shard.balance = share
+        WalletShard.objects.bulk_update(shards, ['balance'])
+        Wallet.objects.filter(pk=wallet.pk).update(
+            balance=total - share * len(shards),
+            updated_at=timezone.now(),
+        )
+        return total
+
+
+def set_shard_count(wallet_id, shard_count):
+    """
+    Switches a wallet between plain and sharded mode. Existing funds are
+    preserved and redistributed across the new set of slots.
+    """
+    shard_count = max(int(shard_count), 1)
+    with transaction.atomic():
+        wallet = Wallet.objects.select_for_update(no_key=True).get(pk=wallet_id)
+        shards = WalletShard.objects.select_for_update(no_key=True).filter(wallet=wallet)
+        total = wallet.balance + sum(s.balance for s in shards)
+        # Folded into the wallet row so the logical version never goes back
+        shard_versions = sum(s.version for s in shards)
+
+        shards.delete()
+        WalletShard.objects.bulk_create([
+            WalletShard(wallet=wallet, slot=slot) for slot in range(1, shard_count)
+        ])
+        Wallet.objects.filter(pk=wallet.pk).update(
+            balance=total,
+            shard_count=shard_count,
+            version=F('version') + shard_versions + 1,
+            updated_at=timezone.now(),
+        )
+        balance_cache.invalidate(wallet_id)
+    return consolidate_wallet(wallet_id)
@@ -0,0 +1,138 @@
+# wallets/services/balance_cache.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from config import caching
+from wallets.models import Wallet
+
+KEY = 'wallet_balance:{}'
+USER_KEY = 'wallet_id:user:{}'
+HITS_KEY = 'wallet_balance_cache:hits'
+MISSES_KEY = 'wallet_balance_cache:misses'
+
+LOCK_TIMEOUT = 5
+LOCK_WAIT = 0.005
+
+
+def enabled():
+    """
+    True when WALLET_BALANCE_CACHE is on and the cache backend is shared.
+    Webhook credits are applied by run_workers, so on a process-local
+    cache the web workers would keep serving the old balance until the
+    TTL; there the cache stays off and balances are read from the database.
+    """
+    return getattr(settings, 'WALLET_BALANCE_CACHE', False) and caching.is_shared()
+
+
+def _timeout():
+    # Backstop only: entries are refreshed on every write
+    return getattr(settings, 'WALLET_BALANCE_CACHE_TIMEOUT', 60 * 5)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def store(wallet_id, balance, version):
+    """
+    Caches `(version, balance)` unless a newer version is already cached.
+
+    The compare and the write run under a per-wallet lock (an atomic
+    `cache.add`), so two commits racing here cannot leave the older
+    version in place. A writer that cannot get the lock within
+    LOCK_TIMEOUT, by which time even a dead holder's lock has expired,
+    drops the entry so the next read goes to the database.
+    """
+    if not enabled():
+        return
+    key = KEY.format(wallet_id)
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            cache.delete(key)
+            return
+        time.sleep(LOCK_WAIT)
+    try:
+        current = cache.get(key)
+        if current is None or current[0] < version:
+            cache.set(key, (version, balance), timeout=_timeout())
+    finally:
+        cache.delete(lock_key)
+
+
+def write_through(wallet_id):
+    """
+    Called by the balance services right after they change a plain
+    wallet: reads back the new balance and version (the row is locked by
+    that update until commit) and caches them once the transaction commits.
+    Returns the new balance.
+    """
+    balance, version = Wallet.objects.filter(pk=wallet_id).values_list('balance', 'version').get()
+    if enabled():
+        transaction.on_commit(lambda: store(wallet_id, balance, version))
+    return balance
+
+
+def invalidate(wallet_id):
+    if enabled():
+        transaction.on_commit(lambda: cache.delete(KEY.format(wallet_id)))
+
+
+def wallet_id_for_user(user_id):
+    """
+    The user's wallet id, cached without expiry since it never changes.
+    Raises Wallet.DoesNotExist.
+    """
+    key = USER_KEY.format(user_id)
+    wallet_id = cache.get(key)
+    if wallet_id is None:
+        wallet_id = Wallet.objects.filter(user_id=user_id).values_list('pk', flat=True).get()
+        cache.set(key, wallet_id, timeout=None)
+    return wallet_id
+
+
+def get_balance(wallet_id, min_version=0):
+    """
+    Returns `(balance, version)` for a wallet, from the cache when it holds
+    `min_version` or newer. Clients pass the version from their last write
+    response as `min_version` to read their own writes.
+
+    Sharded wallets are never cached: their shard slots change without
+    touching the wallet row's version. With the cache off (see `enabled`)
+    every call reads the database.
+    """
+    if enabled():
+        cached = cache.get(KEY.format(wallet_id))
+        if cached is not None and cached[0] >= min_version:
+            _count(HITS_KEY)
+            return cached[1], cached[0]
+        _count(MISSES_KEY)
+
+    wallet = Wallet.objects.only('id', 'balance', 'version', 'shard_count').get(pk=wallet_id)
+    if wallet.is_sharded:
+        return wallet.logical_balance, wallet.logical_version
+    store(wallet.pk, wallet.balance, wallet.version)
+    return wallet.balance, wallet.version
+
+
+def stats():
+    """
+    Hit ratio of `get_balance` since the counters were last reset.
+    """
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
@@ -0,0 +1,21 @@
+# wallets/services/bulk.py
+
+from django.db.models.expressions import RawSQL
+
+BATCH_SIZE = 500
+
+
+def batches(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def case_by_pk(values, output_field):
+    """
+    `CASE id WHEN 1 THEN v1 WHEN 2 THEN v2 ... END` for an `update()` of
+    the rows in `values` ({pk: value}). The simple CASE form compiles and
+    evaluates far cheaper than a `Case` of one `When(pk=...)` per row.
+    """
+    sql = ' '.join('WHEN %s THEN %s' for _ in values)
+    params = [param for pk, value in values.items() for param in (pk, value)]
+    return RawSQL(f"CASE id {sql} END", params, output_field=output_field)
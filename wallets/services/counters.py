@@ -0,0 +1,85 @@
+# wallets/services/counters.py
+
+import random
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from wallets.models import DashboardCounter, Wallet, WalletShard
+
+CENT = Decimal('0.01')
+NAMES = (DashboardCounter.WALLETS, DashboardCounter.BALANCE)
+
+
+def slots():
+    return max(getattr(settings, 'DASHBOARD_COUNTER_SLOTS', 16), 1)
+
+
+def _ensure_slots():
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(name=name, slot=slot) for name in NAMES for slot in range(slots())],
+        ignore_conflicts=True,
+    )
+
+
+def _apply(deltas):
+    slot = random.randrange(slots())
+    for name, delta in deltas.items():
+        if not DashboardCounter.objects.filter(name=name, slot=slot).update(value=F('value') + delta):
+            _ensure_slots()
+            DashboardCounter.objects.filter(name=name, slot=slot).update(value=F('value') + delta)
+
+
+def add(wallets=0, balance=0):
+    """
+    Adds to the running totals once the caller's transaction commits, so
+    a rolled-back write never counts and no counter row stays locked for
+    the length of the caller's transaction. Each commit updates one random
+    slot with a single `F()` update.
+    """
+    deltas = {
+        name: Decimal(delta)
+        for name, delta in ((DashboardCounter.WALLETS, wallets), (DashboardCounter.BALANCE, balance))
+        if delta
+    }
+    if deltas:
+        transaction.on_commit(lambda: _apply(deltas))
+
+
+def totals():
+    """
+    `{'total_wallets', 'total_balance'}` summed over the counter slots:
+    one indexed read of at most 2 * DASHBOARD_COUNTER_SLOTS rows.
+    """
+    values = dict(
+        DashboardCounter.objects.values('name').annotate(total=Sum('value')).values_list('name', 'total')
+    )
+    return {
+        'total_wallets': int(values.get(DashboardCounter.WALLETS) or 0),
+        'total_balance': Decimal(values.get(DashboardCounter.BALANCE) or 0).quantize(CENT),
+    }
+
+
+def recompute():
+    """
+    Recounts wallets and balances exactly and resets the counters to the
+    result, correcting any drift (direct saves, a crash between a commit
+    and its counter update). Increments wait on the locked counter rows
+    while the totals are read; one whose write committed just before the
+    read is counted twice until the next run. Returns `totals()`.
+    """
+    _ensure_slots()
+    with transaction.atomic():
+        list(DashboardCounter.objects.select_for_update().order_by('name', 'slot'))
+        row = Wallet.objects.aggregate(count=Count('id'), balance=Sum('balance'))
+        shards = WalletShard.objects.aggregate(balance=Sum('balance'))['balance'] or 0
+        exact = {
+            DashboardCounter.WALLETS: row['count'],
+            DashboardCounter.BALANCE: (row['balance'] or 0) + shards,
+        }
+        DashboardCounter.objects.update(value=0)
+        for name, value in exact.items():
+            DashboardCounter.objects.filter(name=name, slot=0).update(value=value)
+    return totals()
@@ -0,0 +1,257 @@
+# wallets/services/ledger.py
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from wallets.models import (
+    BalanceCheckpoint,
+    JournalEntry,
+    JournalLeg,
+    LedgerAccount,
+    Transaction,
+)
+
+# Counter-account for each Transaction type; the wallet is always the other leg.
+CONTRA_ACCOUNTS = {
+    Transaction.TOPUP: LedgerAccount.FUNDING,
+    Transaction.WITHDRAW: LedgerAccount.PAYOUTS,
+    Transaction.PURCHASE: LedgerAccount.SALES,
+}
+
+
+class UnbalancedEntry(Exception):
+    """
+    Raised when the legs of a journal entry do not sum to zero.
+    """
+
+
+def checkpoint_interval():
+    return getattr(settings, 'LEDGER_CHECKPOINT_INTERVAL', 500)
+
+
+def settled_before():
+    # Legs younger than this may still have lower-id siblings in flight
+    return timezone.now() - timedelta(seconds=getattr(settings, 'LEDGER_CHECKPOINT_SETTLE_SECONDS', 300))
+
+
+def system_account(code):
+    account, _ = LedgerAccount.objects.get_or_create(code=code)
+    return account
+
+
+def wallet_account(wallet):
+    account, _ = LedgerAccount.objects.get_or_create(
+        wallet=wallet,
+        defaults={'code': f"wallet:{wallet.pk}"},
+    )
+    return account
+
+
+@transaction.atomic
+def post_entry(legs, description='', tx=None):
+    """
+    Appends a balanced JournalEntry.
+
+    `legs` is a list of (LedgerAccount, signed amount) pairs: positive
+    amounts credit the account, negative amounts debit it.
+    """
+    if sum((Decimal(amount) for _, amount in legs), Decimal('0')) != 0:
+        raise UnbalancedEntry("Journal legs must sum to zero.")
+
+    now = timezone.now()
+    entry = JournalEntry.objects.create(transaction=tx, description=description[:255], created_at=now)
+    JournalLeg.objects.bulk_create([
+        JournalLeg(entry=entry, account=account, amount=amount, created_at=now)
+        for account, amount in legs
+    ])
+
+    for account, _ in legs:
+        if account.wallet_id:
+            _maybe_checkpoint(account)
+    return entry
+
+
+def post_transaction(tx):
+    """
+    Mirrors a wallet Transaction into the ledger: top-ups credit the
+    wallet, withdrawals and purchases debit it.
+    """
+    amount = Decimal(tx.amount)
+    wallet_leg = amount if tx.transaction_type == Transaction.TOPUP else -amount
+    contra = system_account(CONTRA_ACCOUNTS[tx.transaction_type])
+    return post_entry(
+        [(wallet_account(tx.wallet), wallet_leg), (contra, -wallet_leg)],
+        description=tx.description or tx.get_transaction_type_display(),
+        tx=tx,
+    )
+
+
+@transaction.atomic
+def post_transactions(transactions, contra=None):
+    """
+    `post_transaction` for a batch saved with bulk_create, which skips
+    post_save: one entry per Transaction, with wallet accounts, entries
+    and legs bulk-inserted and wallet checkpoints checked in one query.
+    `contra` overrides the counter-account code for every row.
+    """
+    if not transactions:
+        return []
+    now = timezone.now()
+    accounts = wallet_accounts(tx.wallet_id for tx in transactions)
+    codes = {contra} if contra else {CONTRA_ACCOUNTS[tx.transaction_type] for tx in transactions}
+    contras = {code: system_account(code) for code in codes}
+
+    entries = JournalEntry.objects.bulk_create([
+        JournalEntry(
+            transaction=tx,
+            description=(tx.description or tx.get_transaction_type_display())[:255],
+            created_at=now,
+        )
+        for tx in transactions
+    ])
+    legs = []
+    for tx, entry in zip(transactions, entries):
+        amount = Decimal(tx.amount)
+        wallet_leg = amount if tx.transaction_type == Transaction.TOPUP else -amount
+        legs.append(JournalLeg(entry=entry, account=accounts[tx.wallet_id], amount=wallet_leg, created_at=now))
+        legs.append(JournalLeg(
+            entry=entry,
+            account=contras[contra or CONTRA_ACCOUNTS[tx.transaction_type]],
+            amount=-wallet_leg,
+            created_at=now,
+        ))
+    JournalLeg.objects.bulk_create(legs, batch_size=1000)
+
+    _maybe_checkpoints([account.pk for account in accounts.values()])
+    return entries
+
+
+def wallet_accounts(wallet_ids):
+    """
+    `{wallet_id: LedgerAccount}` for many wallets, creating the missing
+    ones with one insert.
+    """
+    wallet_ids = set(wallet_ids)
+    accounts = {account.wallet_id: account for account in LedgerAccount.objects.filter(wallet_id__in=wallet_ids)}
+    missing = wallet_ids - accounts.keys()
+    if missing:
+        LedgerAccount.objects.bulk_create(
+            [LedgerAccount(wallet_id=wallet_id, code=f"wallet:{wallet_id}") for wallet_id in missing],
+            ignore_conflicts=True,
+        )
+        accounts.update(
+            (account.wallet_id, account) for account in LedgerAccount.objects.filter(wallet_id__in=missing)
+        )
+    return accounts
+
+
+def _latest_checkpoint(account, at=None):
+    qs = BalanceCheckpoint.objects.filter(account=account)
+    if at is not None:
+        qs = qs.filter(created_at__lte=at)
+    return qs.order_by('-leg_id').first()
+
+
+def _maybe_checkpoint(account):
+    """
+    Writes a checkpoint once `checkpoint_interval()` settled legs have
+    been posted to the account since the previous one.
+    """
+    interval = checkpoint_interval()
+    last = _latest_checkpoint(account)
+    since = JournalLeg.objects.filter(account=account, created_at__lt=settled_before())
+    if last:
+        since = since.filter(id__gt=last.leg_id)
+    if since[:interval].count() < interval:
+        return None
+    return write_checkpoint(account)
+
+
+def _maybe_checkpoints(account_ids):
+    """
+    `_maybe_checkpoint` for many accounts: one grouped query finds those
+    with `checkpoint_interval()` legs since their last checkpoint.
+    """
+    last_leg = (
+        BalanceCheckpoint.objects.filter(account=OuterRef('account'))
+        .order_by('-leg_id')
+        .values('leg_id')[:1]
+    )
+    due = (
+        JournalLeg.objects.filter(account_id__in=account_ids, created_at__lt=settled_before())
+        .filter(id__gt=Coalesce(Subquery(last_leg), 0))
+        .values('account')
+        .annotate(legs=Count('id'))
+        .filter(legs__gte=checkpoint_interval())
+        .values_list('account', flat=True)
+    )
+    for account in LedgerAccount.objects.filter(pk__in=list(due)).order_by('pk'):
+        write_checkpoint(account)
+
+
+def write_checkpoint(account):
+    """
+    Checkpoints the account at its newest leg older than
+    LEDGER_CHECKPOINT_SETTLE_SECONDS. Legs are posted without locking the
+    account, so a younger leg may have a lower-id sibling still
+    uncommitted; a checkpoint past it would leave that leg out of
+    `account_balance` for good. Legs after the checkpoint are still summed
+    live, so younger ones are not lost, only not folded in yet.
+    """
+    last = _latest_checkpoint(account)
+    tail = JournalLeg.objects.filter(account=account)
+    if last:
+        tail = tail.filter(id__gt=last.leg_id)
+    newest = tail.filter(created_at__lt=settled_before()).order_by('-id').values('id', 'created_at').first()
+    if newest is None:
+        return last
+
+    delta = tail.filter(id__lte=newest['id']).aggregate(total=Sum('amount'))['total'] or 0
+    return BalanceCheckpoint.objects.create(
+        account=account,
+        leg_id=newest['id'],
+        balance=(last.balance if last else 0) + delta,
+        created_at=newest['created_at'],
+    )
+
+
+def account_balance(account, at=None):
+    """
+    Balance of a LedgerAccount, optionally as of timestamp `at`.
+    Reads the latest checkpoint and sums only the legs posted after it.
+    """
+    checkpoint = _latest_checkpoint(account, at=at)
+    legs = JournalLeg.objects.filter(account=account)
+    if checkpoint:
+        legs = legs.filter(id__gt=checkpoint.leg_id)
+    if at is not None:
+        legs = legs.filter(created_at__lte=at)
+    delta = legs.aggregate(total=Sum('amount'))['total'] or 0
+    return (checkpoint.balance if checkpoint else Decimal('0.00')) + delta
+
+
+def wallet_balance(wallet, at=None):
+    return account_balance(wallet_account(wallet), at=at)
+
+
+def statement(wallet, start, end):
+    """
+    Returns (opening_balance, legs, closing_balance) for a wallet between
+    `start` and `end`. `legs` is a lazy queryset ordered by id.
+    """
+    account = wallet_account(wallet)
+    opening = account_balance(account, at=start)
+    legs = (
+        JournalLeg.objects
+        .filter(account=account, created_at__gt=start, created_at__lte=end)
+        .select_related('entry')
+        .order_by('id')
+    )
+    closing = account_balance(account, at=end)
+    return opening, legs, closing
@@ -0,0 +1,181 @@
+# wallets/services/provisioning.py
+
+import contextlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from services.monnify import MonnifyError, RateLimiter, get_client
+from wallets.models import ProvisioningRun, Wallet
+
+from . import account_pool, counters
+
+logger = logging.getLogger('monnify')
+
+_signal_suppressed = ContextVar('wallet_signal_suppressed', default=False)
+
+
+@contextlib.contextmanager
+def suppress_wallet_signal():
+    """
+    Stops `create_wallet_for_new_user` from creating a wallet for every
+    user saved inside the block. For bulk imports, which then run
+    `provision_wallets` once for the whole batch:
+
+        with suppress_wallet_signal():
+            for row in rows:
+                User.objects.create_user(**row)
+    """
+    token = _signal_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _signal_suppressed.reset(token)
+
+
+def signal_suppressed():
+    return _signal_suppressed.get()
+
+
+def unprovisioned_users(user_ids=None):
+    """
+    Users with no wallet, or whose wallet has no account number yet.
+    """
+    users = get_user_model().objects.filter(Q(wallet__isnull=True) | Q(wallet__account_number__isnull=True))
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    return users
+
+
+def start_run(user_ids=None):
+    """
+    Opens a checkpoint covering every user unprovisioned right now (or
+    those of `user_ids`). Users created later belong to the next run.
+    """
+    max_user_id = unprovisioned_users(user_ids).aggregate(Max('pk'))['pk__max'] or 0
+    return ProvisioningRun.objects.create(user_ids=user_ids, max_user_id=max_user_id)
+
+
+def resumable_run():
+    return ProvisioningRun.objects.filter(status=ProvisioningRun.RUNNING).order_by('-pk').first()
+
+
+def provision(run, batch_size=500, concurrency=None, rate=None, client=None, on_batch=None):
+    """
+    Creates wallets and virtual accounts for the users of `run`, one batch
+    of `batch_size` users at a time:
+
+    - wallets are inserted with one bulk_create per batch;
+    - pooled accounts are handed out first, without network I/O;
+    - the rest are reserved with Monnify by `concurrency` threads,
+      throttled to `rate` calls per second;
+    - accounts are only written to wallets still without one, and
+      reservations left unused that way are released again;
+    - accounts Monnify fails to reserve are left to the
+      provision_virtual_account job, which retries with backoff.
+
+    The checkpoint is saved after every batch, and `on_batch(run, stats,
+    seconds)` is called with that batch's figures.
+    """
+    client = client or get_client()
+    concurrency = concurrency or getattr(settings, 'MONNIFY_PROVISION_CONCURRENCY', 8)
+    rate = rate if rate is not None else getattr(settings, 'MONNIFY_PROVISION_RATE', 10)
+    limiter = RateLimiter(rate, burst=concurrency) if rate else None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            users = list(
+                unprovisioned_users(run.user_ids)
+                .filter(pk__gt=run.last_user_id, pk__lte=run.max_user_id)
+                .order_by('pk')
+                .only('pk', 'email', 'phone_number', 'full_name')[:batch_size]
+            )
+            if not users:
+                break
+
+            started = time.perf_counter()
+            stats = _provision_batch(users, client, limiter, executor)
+            run.last_user_id = users[-1].pk
+            run.wallets_created += stats['created']
+            run.from_pool += stats['from_pool']
+            run.reserved += stats['reserved']
+            run.deferred += stats['deferred']
+            run.save()
+            if on_batch:
+                on_batch(run, stats, time.perf_counter() - started)
+
+    run.status = ProvisioningRun.DONE
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at', 'updated_at'])
+    return run
+
+
+def _provision_batch(users, client, limiter, executor):
+    from wallets.tasks import provision_virtual_account
+
+    users_by_id = {user.pk: user for user in users}
+    before = Wallet.objects.filter(user__in=users).count()
+    Wallet.objects.bulk_create([Wallet(user=user) for user in users], ignore_conflicts=True)
+    wallets = list(Wallet.objects.filter(user__in=users, account_number__isnull=True).order_by('user_id'))
+
+    from_pool = account_pool.assign_many(wallets)
+    pending = [wallet for wallet in wallets if not wallet.account_number]
+
+    def reserve(wallet):
+        if limiter:
+            limiter.acquire()
+        try:
+            return wallet, client.create_virtual_account(users_by_id[wallet.user_id])
+        except MonnifyError as exc:
+            logger.warning("Could not reserve an account for wallet %s: %s", wallet.pk, exc)
+            return wallet, None
+
+    accounts, deferred = {}, []
+    for wallet, account in executor.map(reserve, pending):
+        if account is None:
+            deferred.append(wallet)
+            continue
+        accounts[wallet.pk] = (account['account_number'], account['bank_name'])
+
+    # A wallet provision_virtual_account got to first keeps its account
+    written = account_pool.write_accounts(accounts, timezone.now())
+    _release_unused(client, [wallet for wallet in pending if wallet.pk in accounts and wallet.pk not in written], accounts)
+    for wallet in deferred:
+        provision_virtual_account.enqueue(wallet_id=wallet.pk)
+
+    # bulk_create skips post_save, so count_saved_wallet never ran
+    created = len(users) - before
+    counters.add(wallets=created)
+    return {
+        'users': len(users),
+        'created': created,
+        'from_pool': from_pool,
+        'reserved': len(written),
+        'deferred': len(deferred),
+        'calls': len(pending),
+    }
+
+
+def _release_unused(client, wallets, accounts):
+    """
+    Hands back the Monnify accounts reserved for `wallets` that were not
+    written because provision_virtual_account provisioned the wallet first.
+    That job reserves under the same per-user reference, so an account it
+    already stored is the same one and is kept.
+    """
+    if not wallets:
+        return
+    current = dict(Wallet.objects.filter(pk__in=[wallet.pk for wallet in wallets]).values_list('pk', 'account_number'))
+    for wallet in wallets:
+        if current.get(wallet.pk) == accounts[wallet.pk][0]:
+            continue
+        try:
+            client.release_virtual_account(wallet.user_id)
+        except MonnifyError as exc:
+            logger.warning("Could not release unused account %s of wallet %s: %s", accounts[wallet.pk][0], wallet.pk, exc)
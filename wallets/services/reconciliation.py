@@ -0,0 +1,212 @@
+# wallets/services/reconciliation.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import BigIntegerField, BooleanField, ExpressionWrapper, F, Max, Min, Q, Sum
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from wallets.models import ReconciliationCheckpoint, Transaction, Wallet, WalletShard
+
+CENT = Decimal('0.01')
+NO_ID = np.iinfo(np.int64).max
+
+
+def settle_seconds():
+    # Transactions younger than this may still have lower-id siblings in flight
+    return getattr(settings, 'RECONCILE_SETTLE_SECONDS', 300)
+
+
+def chunks(chunk_size):
+    """
+    `(lo, hi)` wallet id ranges of `chunk_size` ids covering every wallet.
+    """
+    bounds = Wallet.objects.aggregate(lo=Min('id'), hi=Max('id'))
+    if bounds['lo'] is None:
+        return []
+    return [(lo, lo + chunk_size) for lo in range(bounds['lo'], bounds['hi'] + 1, chunk_size)]
+
+
+def cents(field):
+    """
+    `field` in integer kobo, computed by the database, so rows arrive
+    ready for an int64 array instead of as Decimals multiplied one by one.
+    Rounded first: SQLite stores decimals as floats.
+    """
+    return Cast(Round(F(field) * 100), BigIntegerField())
+
+
+def _money(cents):
+    return str((Decimal(int(cents)) / 100).quantize(CENT))
+
+
+def reconcile_chunk(lo, hi, settled_before, full=False):
+    """
+    Checks every wallet with `lo <= id < hi` against the signed sum of its
+    Transactions, reading only transactions past each wallet's checkpoint.
+    Wallets and transactions are read in one snapshot so concurrent writes
+    cannot show up in one and not the other.
+
+    Checkpoints advance over transactions older than `settled_before`
+    only, and never past a younger one, so a transaction whose id was
+    taken before a later sibling committed is still counted next time.
+    Returns counts, the mismatching wallets and the new checkpoints for
+    `save_checkpoints`; chunks only read, so workers never contend on
+    writes.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+
+        wallet_rows = list(
+            Wallet.objects.filter(id__gte=lo, id__lt=hi).order_by('id').values_list('id', cents('balance'))
+        )
+        if not wallet_rows:
+            return {'wallets': 0, 'transactions': 0, 'mismatches': [], 'checkpoints': []}
+        wallet_rows = np.array(wallet_rows, dtype=np.int64)
+        wallet_ids, balances = wallet_rows[:, 0], wallet_rows[:, 1]
+        shard_rows = (
+            WalletShard.objects.filter(wallet_id__gte=lo, wallet_id__lt=hi)
+            .values('wallet_id').annotate(total=Sum('balance')).values_list('wallet_id', 'total')
+        )
+        for wallet_id, total in shard_rows:
+            balances[np.searchsorted(wallet_ids, wallet_id)] += int(total * 100)
+
+        totals = np.zeros(len(wallet_ids), dtype=np.int64)
+        last_ids = np.zeros(len(wallet_ids), dtype=np.int64)
+        if not full:
+            checkpoints = ReconciliationCheckpoint.objects.filter(
+                wallet_id__gte=lo, wallet_id__lt=hi
+            ).values_list('wallet_id', 'transaction_total', 'last_transaction_id')
+            for wallet_id, total, last_id in checkpoints:
+                i = np.searchsorted(wallet_ids, wallet_id)
+                totals[i], last_ids[i] = int(total * 100), last_id
+
+        tx_query = Transaction.objects.filter(wallet_id__gte=lo, wallet_id__lt=hi, id__gt=int(last_ids.min()))
+        if not full:
+            # The chunk's lowest checkpoint only bounds the index scan; each
+            # wallet's own checkpoint decides which of its rows are new
+            tx_query = tx_query.filter(
+                Q(wallet__reconciliation__isnull=True)
+                | Q(id__gt=F('wallet__reconciliation__last_transaction_id'))
+            )
+        tx_rows = list(
+            tx_query
+            .annotate(settled=ExpressionWrapper(Q(timestamp__lt=settled_before), output_field=BooleanField()))
+            .values_list('wallet_id', 'id', 'transaction_type', cents('amount'), 'settled')
+        )
+
+        read, expected = len(tx_rows), totals.copy()
+        if tx_rows:
+            tx_wallet, tx_ids, types, amounts, settled = zip(*tx_rows)
+            idx = np.searchsorted(wallet_ids, np.array(tx_wallet, dtype=np.int64))
+            tx_ids = np.array(tx_ids, dtype=np.int64)
+            signed = np.where(np.array(types) == Transaction.TOPUP, 1, -1) * np.array(amounts, dtype=np.int64)
+            settled = np.array(settled, dtype=bool)
+            np.add.at(expected, idx, signed)
+
+            first_unsettled = np.full(len(wallet_ids), NO_ID, dtype=np.int64)
+            np.minimum.at(first_unsettled, idx[~settled], tx_ids[~settled])
+            counted = tx_ids < first_unsettled[idx]
+            np.add.at(totals, idx, np.where(counted, signed, 0))
+            np.maximum.at(last_ids, idx[counted], tx_ids[counted])
+
+            # Every row below the chunk's first unsettled one has been counted,
+            # so all its wallets, idle ones included, are reconciled that far
+            # and the next run's floor moves up with them
+            below = tx_ids < first_unsettled.min()
+            if below.any():
+                np.maximum(last_ids, tx_ids[below].max(), out=last_ids)
+
+    wrong = np.flatnonzero(balances != expected)
+    return {
+        'wallets': len(wallet_ids),
+        'transactions': read,
+        'mismatches': [
+            {
+                'wallet_id': int(wallet_ids[i]),
+                'balance': _money(balances[i]),
+                'expected': _money(expected[i]),
+                'difference': _money(balances[i] - expected[i]),
+            }
+            for i in wrong
+        ],
+        'checkpoints': list(zip(wallet_ids.tolist(), totals.tolist(), last_ids.tolist())),
+    }
+
+
+def save_checkpoints(rows, checked_at):
+    """
+    Upserts `(wallet_id, total_cents, last_transaction_id)` rows.
+    """
+    ReconciliationCheckpoint.objects.bulk_create(
+        [
+            ReconciliationCheckpoint(
+                wallet_id=wallet_id,
+                transaction_total=Decimal(total) / 100,
+                last_transaction_id=last_id,
+                checked_at=checked_at,
+            )
+            for wallet_id, total, last_id in rows
+        ],
+        update_conflicts=True,
+        unique_fields=['wallet'],
+        update_fields=['transaction_total', 'last_transaction_id', 'checked_at'],
+    )
+
+
+def init_worker():
+    # Forked children must open their own connections; spawned ones need Django set up
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def reconcile(chunk_size=5000, processes=None, full=False, on_chunk=None):
+    """
+    Reconciles every wallet, fanning id-range chunks out over `processes`
+    worker processes (default: one per CPU; 1 runs in this process).
+    `full` ignores the checkpoints and re-reads every transaction.
+    `on_chunk(result)` is called as each chunk finishes.
+
+    Returns a JSON-serialisable report with the mismatching wallets.
+    """
+    started = time.perf_counter()
+    checked_at = timezone.now()
+    processes = processes or os.cpu_count() or 1
+    settled_before = checked_at - timedelta(seconds=settle_seconds())
+    ranges = chunks(chunk_size)
+
+    report = {'wallets': 0, 'transactions': 0, 'mismatches': []}
+
+    def collect(result):
+        save_checkpoints(result.pop('checkpoints'), checked_at)
+        report['wallets'] += result['wallets']
+        report['transactions'] += result['transactions']
+        report['mismatches'].extend(result['mismatches'])
+        if on_chunk:
+            on_chunk(result)
+
+    if processes == 1:
+        for lo, hi in ranges:
+            collect(reconcile_chunk(lo, hi, settled_before, full))
+    else:
+        # Children must not inherit the parent's open DB connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker) as executor:
+            futures = [executor.submit(reconcile_chunk, lo, hi, settled_before, full) for lo, hi in ranges]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    report['mismatches'].sort(key=lambda row: row['wallet_id'])
+    report['chunks'] = len(ranges)
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,307 @@
+# wallets/services/rollups.py
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DecimalField, F, PositiveBigIntegerField, Q, Sum
+from django.db.models.functions import Collate, Trunc
+from django.utils import timezone
+
+from marketplace.models import Product
+from wallets.models import Transaction, TransactionRollup
+
+from .bulk import BATCH_SIZE, batches, case_by_pk
+
+GRAINS = (TransactionRollup.HOUR, TransactionRollup.DAY)
+CENT = Decimal('0.01')
+BULK_ROWS = 50  # Rollup rows a batch touches before it switches to set-based updates
+
+
+def bucket_start(moment, grain):
+    """
+    Start of the local hour or local day containing `moment`.
+    """
+    local = timezone.localtime(moment)
+    if grain == TransactionRollup.HOUR:
+        return local.replace(minute=0, second=0, microsecond=0)
+    return local.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def resolve_range(params):
+    """
+    Parses the dashboard's `range` query parameter ("7", "30", "custom" with
+    start_date/end_date) into aware (start, end) datetimes. Defaults to 7 days.
+    """
+    range_value = params.get("range", "7")
+    try:
+        if range_value == "custom":
+            start_dt = datetime.fromisoformat(params["start_date"])
+            end_dt = datetime.fromisoformat(params["end_date"])
+            start_date = timezone.make_aware(datetime.combine(start_dt, datetime.min.time()))
+            end_date = timezone.make_aware(datetime.combine(end_dt, datetime.max.time()))
+        else:
+            days = int(range_value)
+            end_date = timezone.now()
+            start_date = end_date - timedelta(days=days)
+    except Exception:
+        end_date = timezone.now()
+        start_date = end_date - timedelta(days=7)
+    return range_value, start_date, end_date
+
+
+# -------------------------------------------------------------------
+# Write path
+# -------------------------------------------------------------------
+def _dimensions(tx, providers):
+    yield TransactionRollup.ALL, ''
+    yield TransactionRollup.TYPE, tx.transaction_type
+    yield TransactionRollup.WALLET, str(tx.wallet_id)
+    provider = providers.get(tx.bundle_id)
+    if provider:
+        yield TransactionRollup.PROVIDER, provider
+
+
+def _providers(transactions):
+    # One lookup for the batch instead of a `tx.bundle` query per purchase
+    bundle_ids = {tx.bundle_id for tx in transactions if tx.bundle_id}
+    if not bundle_ids:
+        return {}
+    return dict(Product.objects.filter(pk__in=bundle_ids).values_list('pk', 'provider'))
+
+
+def record_transactions(transactions):
+    """
+    Adds each Transaction to every rollup row it belongs to. Rows are
+    grouped first, so a batch touches each bucket once.
+
+    The increments are applied once the caller's transaction commits, in
+    a short transaction of their own, like the dashboard counters: every
+    money movement hits the shared all/type rows, and holding their locks
+    until the caller commits would queue all wallet writes (and a whole
+    bulk transfer) behind them. A rolled-back write never counts; one lost
+    between its commit and the increments is corrected by `rebuild`.
+    """
+    providers = _providers(transactions)
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    for tx in transactions:
+        for grain in GRAINS:
+            bucket = bucket_start(tx.timestamp, grain)
+            for dimension, key in _dimensions(tx, providers):
+                delta = deltas[(grain, dimension, key, bucket)]
+                delta[0] += 1
+                delta[1] += Decimal(tx.amount)
+    if deltas:
+        transaction.on_commit(lambda: _apply(dict(deltas)))
+
+
+def record_transaction(tx):
+    record_transactions([tx])
+
+
+@transaction.atomic
+def _apply(deltas):
+    if len(deltas) > BULK_ROWS:
+        _increment_many(deltas)
+        return
+    # Sorted so concurrent writers take row locks in the same order
+    for (grain, dimension, key, bucket), (count, volume) in sorted(deltas.items()):
+        _increment(grain, dimension, key, bucket, count, volume)
+
+
+def _increment(grain, dimension, key, bucket, count, volume):
+    lookup = dict(grain=grain, dimension=dimension, key=key, bucket=bucket)
+    changes = dict(count=F('count') + count, volume=F('volume') + volume)
+    if TransactionRollup.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            TransactionRollup.objects.create(count=count, volume=volume, **lookup)
+    except IntegrityError:
+        # Another writer created the bucket first
+        TransactionRollup.objects.filter(**lookup).update(**changes)
+
+
+@transaction.atomic
+def _increment_many(deltas):
+    """
+    `_increment` for a large batch (bulk transfers touch two rows per
+    wallet): missing rows are created empty with one conflict-ignoring
+    insert, the rows are locked with SELECT ... FOR UPDATE, then every row
+    gets its delta from an `UPDATE ... SET count = count + CASE id ... END`
+    per batch.
+
+    Inserts and locks follow `(grain, dimension, key, bucket)`, the order
+    `_apply` takes rows in one at a time, so a large batch and
+    ordinary writes queue behind each other instead of deadlocking. Keys
+    are compared bytewise ("C" collation) on PostgreSQL to match Python's
+    sort.
+    """
+    lookups = sorted(deltas)
+    TransactionRollup.objects.bulk_create(
+        [
+            TransactionRollup(grain=grain, dimension=dimension, key=key, bucket=bucket)
+            for grain, dimension, key, bucket in lookups
+        ],
+        ignore_conflicts=True,
+        batch_size=BATCH_SIZE,
+    )
+
+    groups = defaultdict(lambda: defaultdict(set))
+    for grain, dimension, key, bucket in lookups:
+        groups[(grain, dimension)][key].add(bucket)
+    key_order = Collate('key', 'C') if connection.vendor == 'postgresql' else 'key'
+
+    by_id = {}
+    for (grain, dimension), buckets_by_key in sorted(groups.items()):
+        for keys in batches(sorted(buckets_by_key)):
+            rows = (
+                TransactionRollup.objects.select_for_update()
+                .filter(
+                    grain=grain,
+                    dimension=dimension,
+                    key__in=keys,
+                    bucket__in=set().union(*(buckets_by_key[key] for key in keys)),
+                )
+                .order_by(key_order, 'bucket')
+                .values_list('pk', 'key', 'bucket')
+            )
+            for pk, key, bucket in rows:
+                delta = deltas.get((grain, dimension, key, bucket))
+                if delta is not None:
+                    by_id[pk] = delta
+
+    for batch in batches(sorted(by_id)):
+        TransactionRollup.objects.filter(pk__in=batch).update(
+            count=F('count') + case_by_pk({pk: by_id[pk][0] for pk in batch}, PositiveBigIntegerField()),
+            volume=F('volume') + case_by_pk(
+                {pk: by_id[pk][1] for pk in batch},
+                DecimalField(max_digits=16, decimal_places=2),
+            ),
+        )
+
+
+# -------------------------------------------------------------------
+# Read path
+# -------------------------------------------------------------------
+def _totals(qs):
+    row = qs.aggregate(count=Sum('count'), volume=Sum('volume'))
+    return row['count'] or 0, Decimal(row['volume'] or 0).quantize(CENT)
+
+
+def range_filter(start, end):
+    """
+    Q selecting the rollup rows that cover `start`..`end` at hour
+    resolution: whole local days come from day rows and the partial days at
+    either edge from hour rows, so the cost is O(days) rather than
+    O(transactions).
+    """
+    HOUR, DAY = TransactionRollup.HOUR, TransactionRollup.DAY
+    first_hour = bucket_start(start, HOUR)
+    first_full_day = bucket_start(start, DAY)
+    if first_full_day < timezone.localtime(start):
+        first_full_day += timedelta(days=1)
+    last_day = bucket_start(end, DAY)
+
+    if first_full_day >= last_day:
+        return Q(grain=HOUR, bucket__gte=first_hour, bucket__lte=end)
+    return (
+        Q(grain=DAY, bucket__gte=first_full_day, bucket__lt=last_day)
+        | Q(grain=HOUR, bucket__gte=first_hour, bucket__lt=first_full_day)
+        | Q(grain=HOUR, bucket__gte=last_day, bucket__lte=end)
+    )
+
+
+def day_filter(day):
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return Q(grain=TransactionRollup.DAY, bucket=start)
+
+
+def totals(start, end, dimension=TransactionRollup.ALL, key=''):
+    """
+    (count, volume) between `start` and `end`, read from rollup rows.
+    """
+    return _totals(TransactionRollup.objects.filter(range_filter(start, end), dimension=dimension, key=key))
+
+
+def day_totals(day, dimension=TransactionRollup.ALL, key=''):
+    """
+    (count, volume) for a single local calendar day.
+    """
+    return _totals(TransactionRollup.objects.filter(day_filter(day), dimension=dimension, key=key))
+
+
+def daily_series(start, end, dimension=TransactionRollup.ALL, key=''):
+    """
+    {iso_date: volume} for every local day between `start` and `end` that
+    had activity.
+    """
+    rows = TransactionRollup.objects.filter(
+        grain=TransactionRollup.DAY,
+        dimension=dimension,
+        key=key,
+        bucket__gte=bucket_start(start, TransactionRollup.DAY),
+        bucket__lte=end,
+    ).order_by('bucket').values_list('bucket', 'volume')
+    return {
+        timezone.localtime(bucket).date().isoformat(): float(volume)
+        for bucket, volume in rows
+    }
+
+
+# -------------------------------------------------------------------
+# Rebuild
+# -------------------------------------------------------------------
+DIMENSION_FIELDS = {
+    TransactionRollup.ALL: None,
+    TransactionRollup.TYPE: 'transaction_type',
+    TransactionRollup.PROVIDER: 'bundle__provider',
+    TransactionRollup.WALLET: 'wallet_id',
+}
+
+
+@transaction.atomic
+def rebuild(since=None, batch_size=1000):
+    """
+    Recomputes rollups from Transaction rows with GROUP BY queries,
+    replacing every bucket from `since` (a local day start) onwards.
+    Returns the number of rollup rows written.
+    """
+    tx_qs = Transaction.objects.all()
+    stale = TransactionRollup.objects.all()
+    if since is not None:
+        since = bucket_start(since, TransactionRollup.DAY)
+        tx_qs = tx_qs.filter(timestamp__gte=since)
+        stale = stale.filter(bucket__gte=since)
+    stale.delete()
+
+    tzinfo = timezone.get_current_timezone()
+    written = 0
+    for grain in GRAINS:
+        for dimension, field in DIMENSION_FIELDS.items():
+            qs = tx_qs
+            group = {'bucket_start': Trunc('timestamp', grain, tzinfo=tzinfo)}
+            if field:
+                qs = qs.filter(**{f"{field}__isnull": False})
+                group['dimension_key'] = F(field)
+            rows = (
+                qs.annotate(**group)
+                .values(*group)
+                .annotate(n=Count('id'), total=Sum('amount'))
+                .order_by()
+            )
+            batch = [
+                TransactionRollup(
+                    grain=grain,
+                    dimension=dimension,
+                    key=str(row.get('dimension_key', '')),
+                    bucket=row['bucket_start'],
+                    count=row['n'],
+                    volume=row['total'] or 0,
+                )
+                for row in rows.iterator()
+            ]
+            TransactionRollup.objects.bulk_create(batch, batch_size=batch_size)
+            written += len(batch)
+    return written
@@ -0,0 +1,115 @@
+# wallets/services/running_balance.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection, connections, transaction
+
+from wallets.models import Transaction, Wallet
+
+from . import ledger
+from .reconciliation import cents, chunks, init_worker
+
+
+def balance_at(wallet, at):
+    """
+    `(balance, transaction_id)` of a wallet as of `at`: the `balance_after`
+    of its last Transaction at or before `at`, found with one seek on the
+    (wallet, -timestamp, -id) index. `(0.00, None)` before its first
+    transaction. Rows written while the wallet was sharded carry no
+    running balance; those fall back to the ledger.
+    """
+    rows = list(
+        Transaction.objects
+        .filter(wallet=wallet, timestamp__lte=at)
+        .order_by('-timestamp', '-id')
+        .values_list('id', 'balance_after')[:1]
+    )
+    if not rows:
+        return Decimal('0.00'), None
+    tx_id, balance = rows[0]
+    if balance is None:
+        balance = ledger.wallet_balance(wallet, at=at)
+    return balance, tx_id
+
+
+def replay_wallet(wallet_id):
+    """
+    Rewrites `balance_after` on every Transaction of one wallet, oldest
+    first. The replay is anchored on the current balance, so the newest
+    row always matches it and any drift (see `reconcile_wallets`) lands
+    in the opening balance. The wallet row is locked meanwhile so no new
+    transaction interleaves. Returns the number of rows written.
+    """
+    with transaction.atomic():
+        wallet = Wallet.objects.select_for_update(no_key=True).only('id', 'balance', 'shard_count').get(pk=wallet_id)
+        rows = list(
+            Transaction.objects.filter(wallet_id=wallet_id)
+            .order_by('timestamp', 'id')
+            .values_list('id', 'transaction_type', cents('amount'))
+        )
+        if not rows:
+            return 0
+        ids, types, amounts = zip(*rows)
+        signed = np.where(np.array(types) == Transaction.TOPUP, 1, -1) * np.array(amounts, dtype=np.int64)
+        running = np.cumsum(signed)
+        opening = int(wallet.logical_balance * 100) - int(running[-1])
+
+        Transaction.objects.bulk_update(
+            [
+                Transaction(pk=tx_id, balance_after=Decimal(opening + int(cents)) / 100)
+                for tx_id, cents in zip(ids, running.tolist())
+            ],
+            ['balance_after'],
+            batch_size=1000,
+        )
+        return len(rows)
+
+
+def backfill_chunk(lo, hi, everything=False):
+    """
+    Replays every wallet with `lo <= id < hi` that has a Transaction
+    without `balance_after` (every wallet with `everything`).
+    Returns `(wallets, transactions)` replayed.
+    """
+    wallets = Transaction.objects.filter(wallet_id__gte=lo, wallet_id__lt=hi)
+    if not everything:
+        wallets = wallets.filter(balance_after__isnull=True)
+    wallet_ids = sorted(set(wallets.values_list('wallet_id', flat=True)))
+    written = sum(replay_wallet(wallet_id) for wallet_id in wallet_ids)
+    return len(wallet_ids), written
+
+
+def backfill(chunk_size=1000, processes=None, everything=False, on_chunk=None):
+    """
+    Fills `balance_after` for existing history, fanning wallet id-range
+    chunks out over `processes` worker processes (default: one per CPU).
+    SQLite allows one writer at a time, so it always runs in this process.
+    `on_chunk(wallets, transactions)` is called as each chunk finishes.
+    Returns `(wallets, transactions)` replayed.
+    """
+    processes = processes or os.cpu_count() or 1
+    if connection.vendor == 'sqlite':
+        processes = 1
+    totals = [0, 0]
+
+    def collect(result):
+        totals[0] += result[0]
+        totals[1] += result[1]
+        if on_chunk:
+            on_chunk(*result)
+
+    ranges = chunks(chunk_size)
+    if processes == 1:
+        for lo, hi in ranges:
+            collect(backfill_chunk(lo, hi, everything))
+    else:
+        # Children must not inherit the parent's open DB connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker) as executor:
+            futures = [executor.submit(backfill_chunk, lo, hi, everything) for lo, hi in ranges]
+            for future in as_completed(futures):
+                collect(future.result())
+    return tuple(totals)
@@ -0,0 +1,67 @@
+# wallets/services/search.py
+
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+# The full-text table (migration 0021) and the Transaction lookups it indexes
+TABLE = 'wallets_transaction_search'
+FIELDS = {'description': 'description', 'bundle__name': 'bundle'}
+MAX_TERMS = 8
+
+_WEIGHTS = {'description': 'A', 'bundle': 'B'}
+
+
+def available():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def indexed(lookups):
+    """
+    True if every ORM lookup in `lookups` (SearchFilter/admin
+    `search_fields` style) is covered by the full-text table.
+    """
+    return bool(lookups) and all(lookup in FIELDS for lookup in lookups)
+
+
+def terms(text):
+    """
+    Lower-cased word tokens of `text`. Punctuation never reaches the
+    FTS5/tsquery syntax, so user input cannot form an operator.
+    """
+    return re.findall(r'[^\W_]+', text.lower())[:MAX_TERMS]
+
+
+def matching_ids(text, lookups=tuple(FIELDS)):
+    """
+    Subquery of ids of Transactions where every term of `text` prefixes a
+    word in any of `lookups` — the full-text take on SearchFilter's
+    "each term icontains some field". None when `text` has no terms.
+    """
+    words = terms(text)
+    if not words:
+        return None
+    columns = [FIELDS[lookup] for lookup in lookups]
+
+    if connection.vendor == 'sqlite':
+        query = ' '.join(f'"{word}"*' for word in words)
+        if len(columns) < len(_WEIGHTS):
+            query = f"{{{' '.join(columns)}}} : ({query})"
+        return RawSQL(f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s", [query])
+
+    weights = ''.join(_WEIGHTS[column] for column in columns)
+    query = ' & '.join(f"{word}:*{weights}" for word in words)
+    return RawSQL(
+        f"SELECT transaction_id FROM {TABLE} WHERE document @@ to_tsquery('simple', %s)", [query]
+    )
+
+
+def search(queryset, text, lookups=tuple(FIELDS)):
+    """
+    Narrows a Transaction queryset to full-text matches of `text`.
+    """
+    ids = matching_ids(text, lookups)
+    if ids is None:
+        return queryset
+    return queryset.filter(pk__in=ids)
@@ -0,0 +1,160 @@
+# wallets/services/statements.py
+
+import csv
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from config.exports import DEFAULT_CHUNK_SIZE, Echo
+from wallets.models import Transaction
+
+from .running_balance import balance_at
+
+CSV_HEADER = ['Date', 'Reference', 'Type', 'Description', 'Credit', 'Debit', 'Balance']
+
+
+def month_range(today=None):
+    """
+    First and last day of the month containing `today`.
+    """
+    today = today or timezone.localdate()
+    first = today.replace(day=1)
+    last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return first, last
+
+
+class Statement:
+    """
+    A wallet statement for the local days `start`..`end` inclusive.
+
+    `entries()` is a generator pipeline: transaction rows are read in
+    chunks with a server-side cursor, running totals are added as each row
+    passes, and the CSV/NDJSON encoders write each entry as it arrives, so
+    memory stays flat however long the range is. The totals are complete
+    once `entries()` has been consumed; `closing()` reports them.
+    """
+
+    def __init__(self, wallet, start, end, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.wallet = wallet
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+        self.start_at = timezone.make_aware(datetime.combine(start, datetime.min.time()))
+        self.end_at = timezone.make_aware(datetime.combine(end, datetime.max.time()))
+        self.opening_balance, _ = balance_at(wallet, self.start_at - timedelta(microseconds=1))
+        self.balance = self.opening_balance
+        self.credits = Decimal('0.00')
+        self.debits = Decimal('0.00')
+        self.count = 0
+
+    def rows(self):
+        return (
+            Transaction.objects
+            .filter(wallet=self.wallet, timestamp__gte=self.start_at, timestamp__lte=self.end_at)
+            .order_by('timestamp', 'id')
+            .values_list('id', 'timestamp', 'transaction_type', 'description', 'amount')
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+    def entries(self):
+        for tx_id, timestamp, transaction_type, description, amount in self.rows():
+            credit = amount if transaction_type == Transaction.TOPUP else None
+            debit = None if credit is not None else amount
+            if credit is not None:
+                self.credits += credit
+                self.balance += credit
+            else:
+                self.debits += debit
+                self.balance -= debit
+            self.count += 1
+            yield {
+                'timestamp': timestamp,
+                'reference': tx_id,
+                'type': transaction_type,
+                'description': description or '',
+                'credit': credit,
+                'debit': debit,
+                'balance': self.balance,
+            }
+
+    def opening(self):
+        return {
+            'wallet': self.wallet.pk,
+            'start': self.start,
+            'end': self.end,
+            'opening_balance': self.opening_balance,
+        }
+
+    def closing(self):
+        return {
+            'count': self.count,
+            'credits': self.credits,
+            'debits': self.debits,
+            'closing_balance': self.balance,
+        }
+
+    # ---------------------------------------------------------------
+    # Encoders
+    # ---------------------------------------------------------------
+    def csv_lines(self):
+        writer = csv.writer(Echo())
+        yield writer.writerow(CSV_HEADER).encode('utf-8')
+        yield writer.writerow([self.start, '', 'opening', 'Opening balance', '', '', self.opening_balance]).encode('utf-8')
+        for entry in self.entries():
+            yield writer.writerow([
+                timezone.localtime(entry['timestamp']).isoformat(),
+                entry['reference'],
+                entry['type'],
+                entry['description'],
+                '' if entry['credit'] is None else entry['credit'],
+                '' if entry['debit'] is None else entry['debit'],
+                entry['balance'],
+            ]).encode('utf-8')
+        yield writer.writerow([
+            self.end, '', 'closing', 'Closing balance', self.credits, self.debits, self.balance,
+        ]).encode('utf-8')
+
+    def ndjson_lines(self):
+        def line(kind, payload):
+            return (json.dumps({'kind': kind, **payload}, cls=DjangoJSONEncoder) + '\n').encode('utf-8')
+
+        yield line('opening', self.opening())
+        for entry in self.entries():
+            yield line('transaction', entry)
+        yield line('closing', self.closing())
+
+
+def parse_range(params):
+    """
+    `(start, end)` dates from `start`/`end` query parameters
+    (YYYY-MM-DD); either defaults to the current month's bound.
+    Raises ValueError on malformed dates or a reversed range.
+    """
+    default_start, default_end = month_range()
+    start = date.fromisoformat(params['start']) if params.get('start') else default_start
+    end = date.fromisoformat(params['end']) if params.get('end') else default_end
+    if start > end:
+        raise ValueError("start is after end")
+    return start, end
+
+
+def last_transaction_id(wallet, end):
+    """
+    Id of the wallet's last Transaction up to the end of `end`, or 0. A
+    statement with the same range and this id has the same content, so it
+    keys cached PDFs.
+    """
+    end_at = timezone.make_aware(datetime.combine(end, datetime.max.time()))
+    rows = list(
+        Transaction.objects.filter(wallet=wallet, timestamp__lte=end_at)
+        .order_by('-timestamp', '-id')
+        .values_list('id', flat=True)[:1]
+    )
+    return rows[0] if rows else 0
+
+
+def pdf_path(wallet_id, start, end, last_id):
+    return f"statements/wallet_{wallet_id}_{start:%Y%m%d}_{end:%Y%m%d}_{last_id}.pdf"
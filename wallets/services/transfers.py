@@ -0,0 +1,149 @@
+# wallets/services/transfers.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F
+from django.utils import timezone
+
+from wallets.models import LedgerAccount, Transaction, Wallet
+
+from . import balance_cache, counters, ledger, rollups
+from .balance import debit_wallet
+from .bulk import BATCH_SIZE, batches, case_by_pk
+
+CREDITED = 'credited'
+FAILED = 'failed'
+
+
+def _lock(wallet_ids):
+    """
+    Locks the wallet rows in ascending id order, so overlapping batches
+    queue behind each other instead of deadlocking. Returns
+    `{id: (balance, version, shard_count)}` as read under the lock.
+    """
+    locked = {}
+    for batch in batches(sorted(set(wallet_ids))):
+        rows = (
+            Wallet.objects.select_for_update(no_key=True)
+            .filter(pk__in=batch)
+            .order_by('pk')
+            .values_list('pk', 'balance', 'version', 'shard_count')
+        )
+        locked.update((pk, rest) for pk, *rest in rows)
+    return locked
+
+
+def _credit(credits, now):
+    # One UPDATE per batch: balance = balance + CASE id WHEN ... THEN amount END
+    for batch in batches(sorted(credits)):
+        Wallet.objects.filter(pk__in=batch).update(
+            balance=F('balance') + case_by_pk(
+                {wallet_id: credits[wallet_id] for wallet_id in batch},
+                DecimalField(max_digits=12, decimal_places=2),
+            ),
+            version=F('version') + 1,
+            updated_at=now,
+        )
+
+
+def distribute(source_wallet_id, lines):
+    """
+    Moves funds from one wallet to many in a single DB transaction.
+
+    `lines` is a list of `(recipient phone number, amount)`. A line whose
+    recipient has no wallet, or is the source itself, fails on its own;
+    the others go through together, or not at all when the source cannot
+    cover their total (InsufficientFunds).
+
+    Every wallet involved is locked first (see `_lock`). The source is
+    debited once for the total and the recipients are credited with
+    batched `UPDATE ... CASE` statements. The source gets one withdrawal
+    Transaction for the batch and each line a top-up on its recipient,
+    all bulk-inserted, so the ledger (cleared through the transfers
+    account), rollups and the balance cache are written here explicitly.
+
+    Returns the source's new balance, the total moved and a result per
+    line in input order.
+    """
+    numbers = sorted({phone for phone, _ in lines})
+    recipients = {}
+    for batch in batches(numbers):
+        recipients.update(
+            Wallet.objects.filter(user__phone_number__in=batch).values_list('user__phone_number', 'pk')
+        )
+    source_phone = Wallet.objects.filter(pk=source_wallet_id).values_list('user__phone_number', flat=True).get()
+
+    results = []
+    accepted = []
+    for index, (phone, amount) in enumerate(lines):
+        result = {'line': index, 'recipient': phone, 'amount': Decimal(amount), 'status': FAILED}
+        wallet_id = recipients.get(phone)
+        if wallet_id is None:
+            result['error'] = "No wallet for this phone number."
+        elif wallet_id == source_wallet_id:
+            result['error'] = "Cannot transfer to the source wallet."
+        else:
+            accepted.append((result, wallet_id))
+        results.append(result)
+
+    credits = defaultdict(Decimal)
+    for result, wallet_id in accepted:
+        credits[wallet_id] += result['amount']
+    total = sum(credits.values(), Decimal('0.00'))
+    report = {'total': total, 'credited': len(accepted), 'failed': len(lines) - len(accepted), 'lines': results}
+    if not accepted:
+        report['balance'] = Wallet.objects.get(pk=source_wallet_id).logical_balance
+        return report
+
+    with transaction.atomic():
+        locked = _lock([source_wallet_id, *credits])
+        balance = debit_wallet(source_wallet_id, total)
+        now = timezone.now()
+        _credit(credits, now)
+        counters.add(balance=total)
+
+        # Replays the lines over the balances read under the lock; sharded
+        # wallets have no exact running balance to record
+        running = {
+            wallet_id: locked[wallet_id][0] for wallet_id in credits if locked[wallet_id][2] <= 1
+        }
+        rows = [Transaction(
+            wallet_id=source_wallet_id,
+            transaction_type=Transaction.WITHDRAW,
+            amount=total,
+            balance_after=balance,
+            description=f"Bulk transfer to {len(credits)} wallet(s)",
+        )]
+        for result, wallet_id in accepted:
+            if wallet_id in running:
+                running[wallet_id] += result['amount']
+            rows.append(Transaction(
+                wallet_id=wallet_id,
+                transaction_type=Transaction.TOPUP,
+                amount=result['amount'],
+                balance_after=running.get(wallet_id),
+                description=f"Transfer from {source_phone}",
+            ))
+
+        rows = Transaction.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        ledger.post_transactions(rows, contra=LedgerAccount.TRANSFERS)
+        rollups.record_transactions(rows)
+
+        for (result, _), tx in zip(accepted, rows[1:]):
+            result.update(status=CREDITED, transaction=tx.pk)
+
+        cached = {wallet_id: (value, locked[wallet_id][1] + 1) for wallet_id, value in running.items()}
+        sharded = [wallet_id for wallet_id in credits if wallet_id not in running]
+        transaction.on_commit(lambda: _store_balances(cached))
+        for wallet_id in sharded:
+            balance_cache.invalidate(wallet_id)
+
+    report['balance'] = balance if balance is not None else Wallet.objects.get(pk=source_wallet_id).logical_balance
+    return report
+
+
+def _store_balances(balances):
+    for wallet_id, (balance, version) in balances.items():
+        balance_cache.store(wallet_id, balance, version)
@@ -0,0 +1,132 @@
+# wallets/services/webhooks.py
+
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from wallets.models import Transaction, Wallet, WebhookEvent
+
+from . import ledger, rollups
+from .balance import credit_wallet
+
+CREDIT_EVENTS = ('SUCCESSFUL_TRANSACTION',)
+
+CENT = Decimal('0.01')
+MAX_AMOUNT = Decimal('9999999999.99')  # WebhookEvent.amount: 12 digits, 2 decimal places
+
+
+def parse_amount(value):
+    """
+    Returns a delivery's amount as a Decimal, or None unless it is a
+    finite number above zero that fits WebhookEvent.amount in whole kobo.
+    """
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    if not amount.is_finite() or not CENT <= amount <= MAX_AMOUNT or amount != amount.quantize(CENT):
+        return None
+    return amount
+
+
+def store_event(reference, event_type, account_number, amount, payload, provider='monnify'):
+    """
+    Saves a verified delivery to the inbox. Returns `(event, created)`;
+    a redelivery of a known reference returns the existing row.
+    """
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.create(
+                provider=provider,
+                reference=reference,
+                event_type=event_type,
+                account_number=account_number or '',
+                amount=amount,
+                payload=payload,
+            )
+        return event, True
+    except IntegrityError:
+        return WebhookEvent.objects.get(provider=provider, reference=reference), False
+
+
+@transaction.atomic
+def apply_events(events):
+    """
+    Credits a batch of inbox events. Each wallet gets a single `F()`
+    update for the sum of its events, and the Transaction rows are
+    bulk-inserted. bulk_create skips post_save, so the ledger and rollups
+    are written here explicitly.
+    """
+    now = timezone.now()
+    numbers = {event.account_number for event in events if event.account_number}
+    wallets = {
+        wallet.account_number: wallet
+        for wallet in Wallet.objects.filter(account_number__in=numbers).only('id', 'account_number')
+    }
+
+    totals = defaultdict(Decimal)
+    credited = []
+    for event in events:
+        event.processed_at = now
+        wallet = wallets.get(event.account_number)
+        if event.event_type not in CREDIT_EVENTS or wallet is None:
+            event.status = WebhookEvent.FAILED
+            event.error = 'wallet not found' if wallet is None else f"unhandled event {event.event_type}"
+            continue
+        totals[wallet.pk] += event.amount
+        event.status = WebhookEvent.APPLIED
+        event.transaction = Transaction(
+            wallet=wallet,
+            transaction_type=Transaction.TOPUP,
+            amount=event.amount,
+            description='Monnify webhook credit',
+        )
+        credited.append(event)
+
+    # Sorted so concurrent consumers take wallet row locks in the same order
+    running = {}
+    for wallet_id, amount in sorted(totals.items()):
+        balance = credit_wallet(wallet_id, amount)
+        if balance is not None:
+            running[wallet_id] = balance - amount
+
+    # Replays each wallet's credits in event order from its pre-batch balance
+    for event in credited:
+        tx = event.transaction
+        if tx.wallet_id in running:
+            running[tx.wallet_id] += tx.amount
+            tx.balance_after = running[tx.wallet_id]
+
+    transactions = Transaction.objects.bulk_create([event.transaction for event in credited])
+    ledger.post_transactions(transactions)
+    rollups.record_transactions(transactions)
+
+    WebhookEvent.objects.bulk_update(events, ['status', 'error', 'processed_at', 'transaction'])
+    return len(credited)
+
+
+def apply_pending(batch_size=500):
+    """
+    Applies up to `batch_size` pending events, oldest first. Concurrent
+    consumers skip rows another consumer has locked where the database
+    supports it. Returns the number of events processed.
+    """
+    with transaction.atomic():
+        pending = WebhookEvent.objects.filter(status=WebhookEvent.PENDING).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        events = list(pending[:batch_size])
+        if events:
+            apply_events(events)
+    return len(events)
+
+
+def drain(batch_size=500):
+    total = 0
+    while True:
+        processed = apply_pending(batch_size)
+        total += processed
+        if processed < batch_size:
+            return total
@@ -1,9 +1,36 @@
-from django.core.cache import cache
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import Wallet, Transaction
+from .services import balance_cache, counters
+from .services.ledger import post_transaction
+from .services.rollups import record_transaction
+
+@receiver(post_save, sender=Wallet)
+def count_saved_wallet(sender, instance, created, **kwargs):
+    if created:
+        counters.add(wallets=1, balance=instance.balance)
+    else:
+        # A direct save (admin edit) changes the balance by an unknown amount
+        from .tasks import recompute_dashboard_counters
+        recompute_dashboard_counters.enqueue_once()
+
+@receiver(post_delete, sender=Wallet)
+def count_deleted_wallet(sender, instance, **kwargs):
+    from .tasks import recompute_dashboard_counters
+    counters.add(wallets=-1)
+    recompute_dashboard_counters.enqueue_once()
 
 @receiver([post_save, post_delete], sender=Wallet)
-@receiver([post_save, post_delete], sender=Transaction)
-def invalidate_dashboard_cache(sender, **kwargs):
-    cache.delete('wallet_dashboard_metrics')
\ No newline at end of file
+def invalidate_balance_cache(sender, instance, **kwargs):
+    # Direct saves (admin edits) bypass the versioned balance services
+    balance_cache.invalidate(instance.pk)
+
+@receiver(post_save, sender=Transaction)
+def post_transaction_to_ledger(sender, instance, created, **kwargs):
+    if created:
+        post_transaction(instance)
+
+@receiver(post_save, sender=Transaction)
+def add_transaction_to_rollups(sender, instance, created, **kwargs):
+    if created:
+        record_transaction(instance)
\ No newline at end of file
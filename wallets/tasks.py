@@ -0,0 +1,139 @@
+# wallets/tasks.py
+
+import uuid
+from datetime import date
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.utils import timezone
+
+from jobs.queue import keep_lease, task
+from services.monnify import MonnifyError, create_virtual_account
+
+from .models import ProvisioningRun, Wallet
+from .services import account_pool, counters, provisioning, rollups, statements, webhooks
+from .services.metrics import WalletMetricsService
+
+
+@task(priority=10, max_attempts=8)
+def provision_virtual_account(wallet_id):
+    """
+    Reserves a Monnify virtual account for a wallet created at signup
+    while the pool was empty, taking a pooled one if it has refilled since.
+    Safe to retry: a wallet that already has an account number is skipped.
+    """
+    wallet = Wallet.objects.select_related('user').get(pk=wallet_id)
+    if wallet.account_number:
+        return {'account_number': wallet.account_number, 'skipped': True}
+    pooled = account_pool.assign(wallet)
+    if pooled is not None:
+        return {'account_number': pooled.account_number, 'bank_name': pooled.bank_name}
+
+    account = create_virtual_account(wallet.user)
+    Wallet.objects.filter(pk=wallet.pk, account_number__isnull=True).update(
+        account_number=account['account_number'],
+        bank_name=account['bank_name'],
+        updated_at=timezone.now(),
+    )
+    return account
+
+
+@task(priority=5, max_attempts=8)
+def refill_account_pool():
+    """
+    Tops the reserved account pool back up to MONNIFY_POOL_TARGET. Fails,
+    and so retries with backoff, while the pool is still at low water.
+    The lease is renewed per account, so a slow refill is not reclaimed
+    and run a second time past the target.
+    """
+    result = account_pool.refill(on_reserved=keep_lease)
+    if result['failed'] and result['available'] <= account_pool.low_water():
+        raise MonnifyError(f"Reserved account pool refill short by {result['failed']}")
+    return result
+
+
+@task(priority=5, max_attempts=3)
+def provision_wallets(run_id):
+    """
+    Runs a bulk provisioning checkpoint to completion. A retry resumes
+    after the last committed batch. The lease is renewed per batch, so a
+    long run is not reclaimed by a second worker while it is still going.
+    """
+    run = provisioning.provision(ProvisioningRun.objects.get(pk=run_id), on_batch=keep_lease)
+    return {
+        'wallets_created': run.wallets_created,
+        'from_pool': run.from_pool,
+        'reserved': run.reserved,
+        'deferred': run.deferred,
+    }
+
+
+@task(priority=15)
+def apply_webhook_events(batch_size=500):
+    """
+    Applies every pending webhook inbox event in batches of `batch_size`.
+    """
+    return {'processed': webhooks.drain(batch_size)}
+
+
+@task(priority=5)
+def recompute_dashboard_counters(reschedule=False):
+    """
+    Resets the dashboard wallet counters to exact totals. With
+    `reschedule` it queues its next run DASHBOARD_COUNTERS_RECOMPUTE_INTERVAL
+    seconds out, so one scheduled job keeps correcting drift.
+    """
+    totals = counters.recompute()
+    if reschedule:
+        recompute_dashboard_counters.enqueue_once(
+            delay=settings.DASHBOARD_COUNTERS_RECOMPUTE_INTERVAL, reschedule=True,
+        )
+    return {'total_wallets': totals['total_wallets'], 'total_balance': str(totals['total_balance'])}
+
+
+@task(max_attempts=3)
+def render_dashboard_pdf(params, base_url):
+    """
+    Renders the wallet dashboard PDF for the range in `params` and stores
+    it in default storage. Returns the stored file's path.
+    """
+    from weasyprint import HTML
+
+    context = {
+        **WalletMetricsService(*rollups.resolve_range(params)).get_metrics(),
+        'chart_url': base_url.rstrip('/') + static('chart.png'),
+        'now': timezone.now(),
+    }
+    html_string = render_to_string('dashboard_pdf.html', context)
+    pdf_file = HTML(string=html_string, base_url=base_url).write_pdf()
+
+    path = default_storage.save(f"reports/wallet_report_{uuid.uuid4().hex}.pdf", ContentFile(pdf_file))
+    return {'path': path}
+
+
+@task(priority=5, max_attempts=3)
+def render_statement_pdf(wallet_id, start, end, last_transaction_id, base_url=''):
+    """
+    Renders a wallet statement PDF for the ISO dates `start`..`end` into
+    default storage. The path is derived from the wallet, range and last
+    transaction id, so an unchanged statement is rendered once and later
+    requests are served the stored file.
+    """
+    path = statements.pdf_path(wallet_id, date.fromisoformat(start), date.fromisoformat(end), last_transaction_id)
+    if default_storage.exists(path):
+        return {'path': path, 'cached': True}
+
+    from weasyprint import HTML
+
+    wallet = Wallet.objects.select_related('user').get(pk=wallet_id)
+    statement = statements.Statement(wallet, date.fromisoformat(start), date.fromisoformat(end))
+    html_string = render_to_string('statement_pdf.html', {
+        'wallet': wallet,
+        'statement': statement,
+        'now': timezone.now(),
+    })
+    pdf_file = HTML(string=html_string, base_url=base_url or None).write_pdf()
+    return {'path': default_storage.save(path, ContentFile(pdf_file))}
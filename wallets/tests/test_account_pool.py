@@ -0,0 +1,120 @@
+# wallets/tests/test_account_pool.py
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from jobs.models import Job
+from services.monnify import CircuitBreaker, MonnifyClient
+from services.monnify_stub import start_stub
+from wallets.models import ReservedAccount, Wallet
+from wallets.services import account_pool
+from wallets.tasks import provision_virtual_account, refill_account_pool
+
+User = get_user_model()
+
+
+@override_settings(MONNIFY_POOL_TARGET=6, MONNIFY_POOL_REFILL_AT=3, MONNIFY_POOL_LOW_WATER=1)
+class AccountPoolTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server, cls.state = start_stub()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.state.fail_next = self.state.requests = 0
+        self.client_ = MonnifyClient(
+            base_url=f"http://127.0.0.1:{self.server.server_port}",
+            api_key='pool', secret_key='pool', contract_code='pool',
+            max_retries=0, backoff=0, breaker=CircuitBreaker(threshold=2),
+        )
+
+    def tearDown(self):
+        self.client_.close()
+
+    def _stock(self, count):
+        for i in range(count):
+            ReservedAccount.objects.create(
+                account_number=f'90000000{i:02d}', bank_name='Stub Bank', account_reference=f'pool-test-{i}',
+            )
+
+    def test_signup_takes_pooled_account_without_provisioning_job(self):
+        self._stock(5)
+        user = User.objects.create_user(phone_number='+2348000000301', password='pass')
+
+        wallet = Wallet.objects.get(user=user)
+        self.assertEqual(wallet.account_number, '9000000000')
+        self.assertEqual(wallet.bank_name, 'Stub Bank')
+        self.assertEqual(ReservedAccount.objects.get(wallet=wallet).account_number, '9000000000')
+        self.assertFalse(Job.objects.filter(task=provision_virtual_account.name).exists())
+        self.assertFalse(Job.objects.filter(task=refill_account_pool.name).exists())
+
+    def test_empty_pool_falls_back_to_provisioning_job_and_refill(self):
+        user = User.objects.create_user(phone_number='+2348000000302', password='pass')
+
+        self.assertIsNone(Wallet.objects.get(user=user).account_number)
+        self.assertTrue(Job.objects.filter(task=provision_virtual_account.name).exists())
+        self.assertEqual(Job.objects.filter(task=refill_account_pool.name, status=Job.QUEUED).count(), 1)
+
+        User.objects.create_user(phone_number='+2348000000303', password='pass')
+        self.assertEqual(Job.objects.filter(task=refill_account_pool.name, status=Job.QUEUED).count(), 1)
+
+    def test_each_account_is_assigned_once(self):
+        self._stock(2)
+        wallets = [
+            Wallet.objects.get(user=User.objects.create_user(phone_number=f'+23480000003{i:02d}', password='pass'))
+            for i in range(10, 13)
+        ]
+        numbers = [wallet.account_number for wallet in wallets]
+
+        self.assertEqual(sorted(filter(None, numbers)), ['9000000000', '9000000001'])
+        self.assertIsNone(numbers[2])
+        self.assertEqual(account_pool.available(), 0)
+
+    def test_refill_tops_up_to_target(self):
+        self._stock(2)
+        result = account_pool.refill(concurrency=3, client=self.client_)
+
+        self.assertEqual(result, {'created': 4, 'failed': 0, 'available': 6})
+        references = ReservedAccount.objects.values_list('account_reference', flat=True)
+        self.assertEqual(len(set(references)), 6)
+
+    def test_refill_stops_when_breaker_opens(self):
+        self.state.fail_next = 100
+        result = account_pool.refill(concurrency=1, client=self.client_)
+
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(result['failed'], 6)
+        self.assertLess(self.state.requests, 6)
+
+    def test_low_water_alarm_is_rate_limited(self):
+        self._stock(1)
+        with self.assertLogs('monnify', level='WARNING') as logs:
+            self.assertTrue(account_pool.needs_refill())
+            self.assertTrue(account_pool.needs_refill())
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('1 available', logs.output[0])
+
+    def test_command_reports_depth(self):
+        self._stock(4)
+        out = StringIO()
+        call_command('account_pool', stdout=out)
+        self.assertIn('4 available / 6 target', out.getvalue())
+
+    def test_provisioning_job_prefers_refilled_pool(self):
+        user = User.objects.create_user(phone_number='+2348000000304', password='pass')
+        self._stock(1)
+
+        result = provision_virtual_account(wallet_id=user.wallet.pk)
+
+        self.assertEqual(result['account_number'], '9000000000')
+        self.assertEqual(Wallet.objects.get(user=user).account_number, '9000000000')
@@ -0,0 +1,123 @@
+# wallets/tests/test_balance_cache.py
+
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from wallets import checks
+from wallets.models import Wallet
+from wallets.services import balance_cache
+from wallets.services.balance import credit_wallet, debit_wallet, set_shard_count
+
+User = get_user_model()
+
+BALANCE_URL = '/api/v1/wallet/balance/'
+
+# Any backend every process can see; the file cache needs no server
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'wallet-balance-cache-tests'),
+    }
+}
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=SHARED_CACHES, WALLET_BALANCE_CACHE=True)
+class BalanceCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(phone_number='+2348000000501', password='pass')
+        self.client.force_authenticate(self.user)
+        self.wallet = self.user.wallet
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('100.00'))
+
+    def test_polls_are_served_from_cache(self):
+        self.assertEqual(self.client.get(BALANCE_URL).data['balance'], '100.00')
+
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(3):
+                response = self.client.get(BALANCE_URL)
+        self.assertEqual(response.data, {'balance': '100.00', 'version': 0})
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(balance_cache.stats(), {'hits': 3, 'misses': 1, 'hit_ratio': 0.75})
+
+    def test_writes_update_cache_on_commit(self):
+        self.client.get(BALANCE_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            credit_wallet(self.wallet.pk, Decimal('50.00'))
+            debit_wallet(self.wallet.pk, Decimal('20.00'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(BALANCE_URL)
+        self.assertEqual(response.data, {'balance': '130.00', 'version': 2})
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_uncommitted_write_is_not_cached(self):
+        self.client.get(BALANCE_URL)
+        with self.captureOnCommitCallbacks(execute=False):
+            credit_wallet(self.wallet.pk, Decimal('50.00'))
+        self.assertEqual(cache.get(balance_cache.KEY.format(self.wallet.pk)), (0, Decimal('100.00')))
+
+    def test_older_version_never_replaces_newer(self):
+        balance_cache.store(self.wallet.pk, Decimal('80.00'), 5)
+        balance_cache.store(self.wallet.pk, Decimal('90.00'), 4)
+        self.assertEqual(balance_cache.get_balance(self.wallet.pk), (Decimal('80.00'), 5))
+
+    def test_store_without_the_lock_drops_the_entry(self):
+        balance_cache.store(self.wallet.pk, Decimal('80.00'), 5)
+        key = balance_cache.KEY.format(self.wallet.pk)
+        cache.add(f"{key}:lock", 1)
+        with mock.patch.object(balance_cache, 'LOCK_TIMEOUT', 0):
+            balance_cache.store(self.wallet.pk, Decimal('90.00'), 6)
+        self.assertIsNone(cache.get(key))
+        cache.delete(f"{key}:lock")
+        self.assertEqual(balance_cache.get_balance(self.wallet.pk), (Decimal('100.00'), 0))
+
+    def test_min_version_reads_own_write(self):
+        self.client.get(BALANCE_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/wallet/top-up/', {'amount': '25.00'})
+        version = response.data['version']
+        self.assertEqual(version, 1)
+
+        # A cache entry left behind by a lost write-through is bypassed
+        cache.set(balance_cache.KEY.format(self.wallet.pk), (0, Decimal('100.00')))
+        response = self.client.get(BALANCE_URL, {'min_version': version})
+        self.assertEqual(response.data, {'balance': '125.00', 'version': 1})
+
+    def test_sharded_wallet_is_read_from_database(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            set_shard_count(self.wallet.pk, 3)
+        credit_wallet(self.wallet.pk, Decimal('10.00'))
+
+        self.assertEqual(self.client.get(BALANCE_URL).data['balance'], '110.00')
+        credit_wallet(self.wallet.pk, Decimal('10.00'))
+        self.assertEqual(self.client.get(BALANCE_URL).data['balance'], '120.00')
+
+    def test_direct_save_invalidates(self):
+        self.client.get(BALANCE_URL)
+        self.wallet.refresh_from_db()
+        self.wallet.balance = Decimal('1.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wallet.save()
+        self.assertEqual(self.client.get(BALANCE_URL).data['balance'], '1.00')
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_process_local_backend_is_refused(self):
+        self.assertFalse(balance_cache.enabled())
+        self.assertEqual([error.id for error in checks.balance_cache_backend(None)], ['wallets.E001'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            credit_wallet(self.wallet.pk, Decimal('5.00'))
+        self.assertIsNone(cache.get(balance_cache.KEY.format(self.wallet.pk)))
+        self.assertEqual(self.client.get(BALANCE_URL).data['balance'], '105.00')
+        self.assertIsNone(cache.get(balance_cache.KEY.format(self.wallet.pk)))
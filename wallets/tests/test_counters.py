@@ -0,0 +1,71 @@
+# wallets/tests/test_counters.py
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from jobs.models import Job
+from wallets.models import DashboardCounter, Wallet
+from wallets.services import counters
+from wallets.services.balance import credit_wallet, debit_wallet, set_shard_count
+from wallets.tasks import recompute_dashboard_counters
+
+User = get_user_model()
+
+
+@override_settings(MONNIFY_POOL_TARGET=0, DASHBOARD_COUNTER_SLOTS=4)
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(phone_number='+2348000000801')
+        self.wallet = self.user.wallet
+
+    def test_balance_writes_update_counters_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            credit_wallet(self.wallet.pk, Decimal('100.00'))
+            debit_wallet(self.wallet.pk, Decimal('30.00'))
+        self.assertEqual(counters.totals(), {'total_wallets': 1, 'total_balance': Decimal('70.00')})
+        self.assertLessEqual(DashboardCounter.objects.count(), 2 * 4)
+
+    def test_rolled_back_write_is_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            credit_wallet(self.wallet.pk, Decimal('100.00'))
+        self.assertEqual(counters.totals()['total_balance'], Decimal('0.00'))
+
+    def test_sharded_wallet_writes_are_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            set_shard_count(self.wallet.pk, 3)
+            for _ in range(5):
+                credit_wallet(self.wallet.pk, Decimal('10.00'))
+            debit_wallet(self.wallet.pk, Decimal('45.00'))
+        self.assertEqual(counters.totals()['total_balance'], Decimal('5.00'))
+
+    def test_direct_save_queues_recompute(self):
+        self.wallet.balance = Decimal('12.00')
+        self.wallet.save()
+        self.assertEqual(Job.objects.filter(task=recompute_dashboard_counters.name).count(), 1)
+
+        recompute_dashboard_counters()
+        self.assertEqual(counters.totals(), {'total_wallets': 1, 'total_balance': Decimal('12.00')})
+
+    def test_recompute_corrects_drift(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            credit_wallet(self.wallet.pk, Decimal('40.00'))
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('25.00'))
+        DashboardCounter.objects.filter(name=DashboardCounter.WALLETS).update(value=7)
+
+        self.assertEqual(counters.recompute(), {'total_wallets': 1, 'total_balance': Decimal('25.00')})
+        self.assertEqual(DashboardCounter.objects.exclude(slot=0).exclude(value=0).count(), 0)
+
+    def test_scheduled_recompute_reschedules_itself(self):
+        recompute_dashboard_counters(reschedule=True)
+        recompute_dashboard_counters(reschedule=True)
+        job = Job.objects.get(task=recompute_dashboard_counters.name)
+        self.assertEqual(job.kwargs, {'reschedule': True})
+        self.assertEqual(job.status, Job.QUEUED)
+
+    def test_deleted_wallet_is_uncounted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wallet.delete()
+        self.assertEqual(counters.totals()['total_wallets'], 0)
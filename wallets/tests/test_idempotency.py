@@ -0,0 +1,106 @@
+# wallets/tests/test_idempotency.py
+
+import hashlib
+import hmac
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from jobs import queue
+from wallets.models import IdempotencyKey, Transaction, Wallet
+
+User = get_user_model()
+
+ACCOUNT_NUMBER = '0123456789'
+
+
+class IdempotentWalletTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(phone_number='+2348000000020', password='pass')
+        self.client.force_authenticate(self.user)
+        self.wallet = self.user.wallet
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('100.00'))
+
+    def test_retried_top_up_applies_once(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'topup-1'}
+        first = self.client.post('/api/v1/wallet/top-up/', {'amount': '25.00'}, **headers)
+        second = self.client.post('/api/v1/wallet/top-up/', {'amount': '25.00'}, **headers)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data['balance'], first.data['balance'])
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('125.00'))
+        self.assertEqual(Transaction.objects.filter(wallet=self.wallet).count(), 1)
+
+    def test_replay_served_from_database_when_cache_is_cold(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'withdraw-1'}
+        self.client.post('/api/v1/wallet/withdraw/', {'amount': '10.00'}, **headers)
+        cache.clear()
+        again = self.client.post('/api/v1/wallet/withdraw/', {'amount': '10.00'}, **headers)
+
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('90.00'))
+
+    def test_insufficient_funds_response_is_replayed(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'withdraw-2'}
+        first = self.client.post('/api/v1/wallet/withdraw/', {'amount': '500.00'}, **headers)
+        again = self.client.post('/api/v1/wallet/withdraw/', {'amount': '500.00'}, **headers)
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(again.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+
+    def test_key_reused_with_different_body(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'topup-2'}
+        self.client.post('/api/v1/wallet/top-up/', {'amount': '5.00'}, **headers)
+        resp = self.client.post('/api/v1/wallet/top-up/', {'amount': '6.00'}, **headers)
+        self.assertEqual(resp.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_requests_without_key_are_not_stored(self):
+        self.client.post('/api/v1/wallet/top-up/', {'amount': '5.00'})
+        self.client.post('/api/v1/wallet/top-up/', {'amount': '5.00'})
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('110.00'))
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+@override_settings(MONNIFY_SECRET_KEY='test-secret', MONNIFY_POOL_TARGET=0)
+class IdempotentWebhookTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(phone_number='+2348000000021', password='pass')
+        Wallet.objects.filter(user=self.user).update(account_number=ACCOUNT_NUMBER)
+        self.wallet = self.user.wallet
+
+    def _deliver(self, payload):
+        body = json.dumps(payload).encode()
+        signature = hmac.new(b'test-secret', body, hashlib.sha512).hexdigest()
+        return self.client.generic(
+            'POST', '/webhook/monnify/', body,
+            content_type='application/json', HTTP_MONNIFY_SIGNATURE=signature,
+        )
+
+    def test_redelivered_event_credits_once(self):
+        payload = {
+            'eventType': 'SUCCESSFUL_TRANSACTION',
+            'eventData': {
+                'transactionReference': 'MNFY|REF|1',
+                'amount': '75.00',
+                'accountDetails': {'accountNumber': ACCOUNT_NUMBER},
+            },
+        }
+        self.assertEqual(self._deliver(payload).status_code, 200)
+        self.assertEqual(self._deliver(payload).status_code, 200)
+        queue.drain()
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('75.00'))
+        self.assertEqual(Transaction.objects.filter(wallet=self.wallet).count(), 1)
@@ -0,0 +1,95 @@
+# wallets/tests/test_ledger.py
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from wallets.models import (
+    BalanceCheckpoint,
+    JournalLeg,
+    LedgerAccount,
+    LedgerImmutableError,
+    Transaction,
+)
+from wallets.services.ledger import (
+    UnbalancedEntry,
+    post_entry,
+    statement,
+    system_account,
+    wallet_account,
+    wallet_balance,
+)
+
+User = get_user_model()
+
+
+@override_settings(LEDGER_CHECKPOINT_INTERVAL=3, LEDGER_CHECKPOINT_SETTLE_SECONDS=0)
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(phone_number='+2348000000010', password='pass')
+        self.wallet = self.user.wallet
+
+    def _tx(self, kind, amount):
+        return Transaction.objects.create(wallet=self.wallet, transaction_type=kind, amount=Decimal(amount))
+
+    def test_transaction_posts_balanced_entry(self):
+        tx = self._tx(Transaction.TOPUP, '50.00')
+        legs = list(tx.journal_entry.legs.values_list('account__code', 'amount'))
+        self.assertIn((f"wallet:{self.wallet.pk}", Decimal('50.00')), legs)
+        self.assertIn((LedgerAccount.FUNDING, Decimal('-50.00')), legs)
+
+    def test_wallet_balance_follows_transactions(self):
+        self._tx(Transaction.TOPUP, '100.00')
+        self._tx(Transaction.WITHDRAW, '30.00')
+        self._tx(Transaction.PURCHASE, '20.00')
+        self.assertEqual(wallet_balance(self.wallet), Decimal('50.00'))
+
+    def test_checkpoint_written_every_interval(self):
+        for _ in range(7):
+            self._tx(Transaction.TOPUP, '10.00')
+        account = wallet_account(self.wallet)
+        checkpoints = list(BalanceCheckpoint.objects.filter(account=account).order_by('leg_id'))
+        self.assertEqual([c.balance for c in checkpoints], [Decimal('30.00'), Decimal('60.00')])
+        self.assertEqual(wallet_balance(self.wallet), Decimal('70.00'))
+
+    @override_settings(LEDGER_CHECKPOINT_SETTLE_SECONDS=3600)
+    def test_unsettled_legs_are_not_checkpointed(self):
+        for _ in range(4):
+            self._tx(Transaction.TOPUP, '10.00')
+        account = wallet_account(self.wallet)
+        self.assertFalse(BalanceCheckpoint.objects.filter(account=account).exists())
+        self.assertEqual(wallet_balance(self.wallet), Decimal('40.00'))
+
+        # Once they have settled, the next post folds them in
+        with override_settings(LEDGER_CHECKPOINT_SETTLE_SECONDS=0):
+            self._tx(Transaction.TOPUP, '10.00')
+        self.assertEqual(BalanceCheckpoint.objects.get(account=account).balance, Decimal('50.00'))
+
+    def test_point_in_time_balance_and_statement(self):
+        self._tx(Transaction.TOPUP, '40.00')
+        midpoint = timezone.now()
+        self._tx(Transaction.WITHDRAW, '15.00')
+
+        self.assertEqual(wallet_balance(self.wallet, at=midpoint), Decimal('40.00'))
+        opening, legs, closing = statement(self.wallet, midpoint, timezone.now() + timedelta(seconds=1))
+        self.assertEqual(opening, Decimal('40.00'))
+        self.assertEqual([leg.amount for leg in legs], [Decimal('-15.00')])
+        self.assertEqual(closing, Decimal('25.00'))
+
+    def test_unbalanced_entry_rejected(self):
+        with self.assertRaises(UnbalancedEntry):
+            post_entry([(wallet_account(self.wallet), Decimal('5.00'))])
+
+    def test_legs_are_append_only(self):
+        self._tx(Transaction.TOPUP, '10.00')
+        leg = JournalLeg.objects.first()
+        leg.amount = Decimal('999.00')
+        with self.assertRaises(LedgerImmutableError):
+            leg.save()
+        with self.assertRaises(LedgerImmutableError):
+            JournalLeg.objects.all().delete()
+        with self.assertRaises(LedgerImmutableError):
+            system_account(LedgerAccount.FUNDING).legs.update(amount=0)
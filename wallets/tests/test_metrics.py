@@ -0,0 +1,66 @@
+# wallets/tests/test_metrics.py
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from wallets.admin_site import CustomAdminSite
+from wallets.models import Transaction
+from wallets.services.balance import credit_wallet
+from wallets.services.metrics import WalletMetricsService
+
+User = get_user_model()
+
+
+class WalletMetricsServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(phone_number='+2348000000060', password='pass')
+            credit_wallet(self.user.wallet.pk, Decimal('500.00'))
+            Transaction.objects.create(wallet=self.user.wallet, transaction_type=Transaction.TOPUP, amount=Decimal('120.00'))
+            Transaction.objects.create(wallet=self.user.wallet, transaction_type=Transaction.WITHDRAW, amount=Decimal('20.00'))
+        self.factory = RequestFactory()
+
+    def _service(self, query='?range=7'):
+        return WalletMetricsService.from_request(self.factory.get(f'/admin/dashboard/{query}'))
+
+    def test_figures(self):
+        metrics = self._service().get_metrics()
+        self.assertEqual(metrics['total_wallets'], 1)
+        self.assertEqual(metrics['total_balance'], Decimal('500.00'))
+        self.assertEqual((metrics['range_count'], metrics['range_volume']), (2, Decimal('140.00')))
+        self.assertEqual((metrics['today_count'], metrics['today_volume']), (2, Decimal('140.00')))
+        self.assertEqual(list(metrics['chart_data'].values()), [140.0])
+
+    def test_range_and_today_in_one_rollup_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._service().get_metrics()
+        rollup_queries = [q for q in ctx.captured_queries if 'wallets_transactionrollup' in q['sql']]
+        # One conditional aggregate plus the chart series
+        self.assertEqual(len(rollup_queries), 2)
+
+    def test_cached_per_normalised_range(self):
+        self._service().get_metrics()
+        # Only the live counter read
+        with self.assertNumQueries(1):
+            self._service().get_metrics()
+        with self.assertNumQueries(3):
+            self._service('?range=30').get_metrics()
+
+    def test_dashboard_and_csv_share_figures(self):
+        site = CustomAdminSite(name='metrics_admin')
+        request = self.factory.get('/admin/dashboard/?range=7')
+        request.user = self.user
+        self.assertEqual(site.dashboard_view(request).status_code, 200)
+
+        request = self.factory.get('/admin/dashboard/export-csv/?range=7')
+        request.user = self.user
+        with self.assertNumQueries(1):
+            response = site.export_dashboard_csv(request)
+        row = response.content.decode('utf-8').splitlines()[1].split(',')
+        self.assertEqual(row[3:], ['1', '500.00', '2', '140.00', '2', '140.00'])
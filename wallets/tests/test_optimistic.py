@@ -0,0 +1,111 @@
+# wallets/tests/test_optimistic.py
+
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F, QuerySet
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from wallets.models import Transaction, Wallet
+from wallets.services import balance_cache
+from wallets.services.balance import InsufficientFunds, WriteConflict, apply_versioned
+
+User = get_user_model()
+
+
+class ApplyVersionedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.wallet = User.objects.create_user(phone_number='+2348000001301').wallet
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('50.00'))
+        self.wallet.refresh_from_db()
+
+    def concurrent_writes(self, times):
+        """
+        Bumps the wallet's version right after each of the first `times`
+        reads, as if another request committed in between.
+        """
+        original_get = QuerySet.get
+        calls = []
+
+        def get(queryset, *args, **kwargs):
+            row = original_get(queryset, *args, **kwargs)
+            if queryset.model is Wallet and len(calls) < times:
+                calls.append(row)
+                Wallet.objects.filter(pk=self.wallet.pk).update(version=F('version') + 1)
+            return row
+        return mock.patch.object(QuerySet, 'get', get)
+
+    def test_credit_and_debit_bump_version_and_record(self):
+        recorded = []
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(apply_versioned(self.wallet.pk, '20.00', record=recorded.append), Decimal('70.00'))
+            apply_versioned(self.wallet.pk, '5.00', debit=True, record=recorded.append)
+
+        self.assertEqual(recorded, [Decimal('70.00'), Decimal('65.00')])
+        version = self.wallet.version
+        self.wallet.refresh_from_db()
+        self.assertEqual((self.wallet.balance, self.wallet.version), (Decimal('65.00'), version + 2))
+        self.assertEqual(balance_cache.get_balance(self.wallet.pk), (Decimal('65.00'), version + 2))
+
+    def test_overdraft_is_refused(self):
+        with self.assertRaises(InsufficientFunds):
+            apply_versioned(self.wallet.pk, '50.01', debit=True)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('50.00'))
+
+    @mock.patch('wallets.services.balance.time.sleep')
+    def test_conflicts_are_retried_then_reported(self, sleep):
+        with self.concurrent_writes(times=2):
+            self.assertEqual(apply_versioned(self.wallet.pk, '1.00', retries=2), Decimal('51.00'))
+        self.assertEqual(sleep.call_count, 2)
+
+        with self.concurrent_writes(times=3), self.assertRaises(WriteConflict):
+            apply_versioned(self.wallet.pk, '1.00', retries=2)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('51.00'))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_wallet_concurrency', '--threads', '1', '--ops=4', stdout=out)
+        rows = [line.split() for line in out.getvalue().splitlines()[2:]]
+        self.assertEqual([row[0] for row in rows], ['locked', 'atomic', 'optimistic'])
+        self.assertEqual({row[-1] for row in rows}, {'True'})
+
+
+@override_settings(WALLET_CONCURRENCY='optimistic')
+class OptimisticViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(phone_number='+2348000001302')
+        self.client.force_authenticate(self.user)
+        self.wallet = self.user.wallet
+
+    def test_top_up_and_withdraw(self):
+        self.client.post('/api/v1/wallet/top-up/', {'amount': '30.00'})
+        response = self.client.post('/api/v1/wallet/withdraw/', {'amount': '12.50'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.data['balance']), Decimal('17.50'))
+        self.assertEqual(response.data['version'], self.wallet.version + 2)
+        self.assertEqual(
+            list(Transaction.objects.filter(wallet=self.wallet).order_by('id').values_list('balance_after', flat=True)),
+            [Decimal('30.00'), Decimal('17.50')],
+        )
+        overdraft = self.client.post('/api/v1/wallet/withdraw/', {'amount': '100.00'})
+        self.assertEqual(overdraft.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_conflict_does_not_consume_the_idempotency_key(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'optimistic-1'}
+        with mock.patch('wallets.views.apply_versioned', side_effect=WriteConflict("busy")):
+            conflict = self.client.post('/api/v1/wallet/top-up/', {'amount': '5.00'}, **headers)
+        self.assertEqual(conflict.status_code, status.HTTP_409_CONFLICT)
+
+        retry = self.client.post('/api/v1/wallet/top-up/', {'amount': '5.00'}, **headers)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(retry.data['balance']), Decimal('5.00'))
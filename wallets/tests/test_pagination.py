@@ -0,0 +1,88 @@
+# wallets/tests/test_pagination.py
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from wallets.models import Transaction
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(APITestCase):
+    url = '/api/v1/transactions/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(phone_number='+2348000000030', password='pass')
+        self.client.force_authenticate(self.user)
+        wallet = self.user.wallet
+
+        base = timezone.now() - timedelta(days=1)
+        txs = Transaction.objects.bulk_create([
+            Transaction(
+                wallet=wallet,
+                transaction_type=Transaction.WITHDRAW if i % 3 == 0 else Transaction.TOPUP,
+                amount=Decimal(i + 1),
+                description=f"tx {i}",
+            )
+            for i in range(12)
+        ])
+        # Pairs of rows share a timestamp so the id tie-breaker is exercised
+        for i, tx in enumerate(txs):
+            tx.timestamp = base + timedelta(minutes=i // 2)
+        Transaction.objects.bulk_update(txs, ['timestamp'])
+        self.expected = list(
+            Transaction.objects.filter(wallet=wallet).order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+
+    def _walk(self, params):
+        seen = []
+        resp = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', resp.data)
+            seen.extend(row['id'] for row in resp.data['results'])
+            if not resp.data['next']:
+                return seen, resp
+            resp = self.client.get(resp.data['next'])
+
+    def test_walks_every_row_once_in_order(self):
+        seen, _ = self._walk({'pagination': 'cursor', 'limit': 5})
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(self.url, {'pagination': 'cursor', 'limit': 5})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [row['id'] for row in back.data['results']],
+            [row['id'] for row in first.data['results']],
+        )
+
+    def test_respects_filter_and_ordering(self):
+        seen, _ = self._walk({'pagination': 'cursor', 'limit': 2, 'transaction_type': Transaction.TOPUP, 'ordering': 'amount'})
+        expected = list(
+            Transaction.objects.filter(wallet=self.user.wallet, transaction_type=Transaction.TOPUP)
+            .order_by('amount', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, {'pagination': 'cursor', 'limit': 5})
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in ctx.captured_queries))
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_limit_offset_still_default(self):
+        resp = self.client.get(self.url, {'limit': 5, 'offset': 5})
+        self.assertEqual(resp.data['count'], 12)
+        self.assertEqual([row['id'] for row in resp.data['results']], self.expected[5:10])
@@ -0,0 +1,127 @@
+# wallets/tests/test_provisioning.py
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from jobs.models import Job
+from services.monnify import CircuitBreaker, MonnifyClient
+from services.monnify_stub import start_stub
+from wallets.models import ProvisioningRun, ReservedAccount, Wallet
+from wallets.services import account_pool, provisioning
+from wallets.tasks import provision_virtual_account
+
+User = get_user_model()
+
+
+class Interrupted(Exception):
+    pass
+
+
+@override_settings(MONNIFY_POOL_TARGET=0)
+class ProvisionWalletsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server, cls.state = start_stub()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.state.fail_next = self.state.requests = 0
+        self.client_ = MonnifyClient(
+            base_url=f"http://127.0.0.1:{self.server.server_port}",
+            api_key='bulk', secret_key='bulk', contract_code='bulk',
+            max_retries=0, backoff=0, breaker=CircuitBreaker(threshold=2),
+        )
+        with provisioning.suppress_wallet_signal():
+            self.users = [
+                User.objects.create_user(phone_number=f'+23480000004{i:02d}')
+                for i in range(5)
+            ]
+
+    def tearDown(self):
+        self.client_.close()
+
+    def test_suppressed_signal_creates_no_wallets(self):
+        self.assertFalse(Wallet.objects.exists())
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(provisioning.unprovisioned_users().count(), 5)
+
+        User.objects.create_user(phone_number='+2348000000499', password='pass')
+        self.assertEqual(Wallet.objects.count(), 1)
+
+    def test_provision_uses_pool_then_monnify(self):
+        for i in range(2):
+            ReservedAccount.objects.create(account_number=f'80000000{i:02d}', bank_name='Stub Bank', account_reference=f'pool-{i}')
+
+        run = provisioning.provision(provisioning.start_run(), batch_size=2, concurrency=3, rate=0, client=self.client_)
+
+        self.assertEqual(run.status, ProvisioningRun.DONE)
+        self.assertEqual((run.wallets_created, run.from_pool, run.reserved, run.deferred), (5, 2, 3, 0))
+        self.assertFalse(Wallet.objects.filter(account_number__isnull=True).exists())
+        self.assertEqual(provisioning.unprovisioned_users().count(), 0)
+        self.assertFalse(Job.objects.filter(task=provision_virtual_account.name).exists())
+
+    def test_account_set_meanwhile_is_kept_and_reservation_released(self):
+        write_accounts = account_pool.write_accounts
+
+        def job_got_there_first(accounts, now):
+            # provision_virtual_account hands the first wallet a pooled account
+            Wallet.objects.filter(user=self.users[0]).update(account_number='8000000099', bank_name='Pool Bank')
+            return write_accounts(accounts, now)
+
+        with patch.object(account_pool, 'write_accounts', side_effect=job_got_there_first):
+            run = provisioning.provision(provisioning.start_run(), concurrency=1, rate=0, client=self.client_)
+
+        self.assertEqual((run.wallets_created, run.reserved), (5, 4))
+        self.assertEqual(Wallet.objects.get(user=self.users[0]).account_number, '8000000099')
+        self.assertEqual(self.state.released, [f'user-{self.users[0].pk}'])
+
+    def test_monnify_failures_are_left_to_retry_job(self):
+        self.state.fail_next = 100
+        run = provisioning.provision(provisioning.start_run(), concurrency=1, rate=0, client=self.client_)
+
+        self.assertEqual((run.wallets_created, run.reserved, run.deferred), (5, 0, 5))
+        self.assertEqual(Job.objects.filter(task=provision_virtual_account.name).count(), 5)
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        def stop_after_first_batch(run, stats, seconds):
+            raise Interrupted
+
+        run = provisioning.start_run()
+        with self.assertRaises(Interrupted):
+            provisioning.provision(run, batch_size=2, rate=0, client=self.client_, on_batch=stop_after_first_batch)
+
+        run = provisioning.resumable_run()
+        self.assertEqual(run.last_user_id, self.users[1].pk)
+        self.assertEqual(run.reserved, 2)
+
+        run = provisioning.provision(run, batch_size=2, rate=0, client=self.client_)
+        self.assertEqual((run.wallets_created, run.reserved), (5, 5))
+        self.assertIsNone(provisioning.resumable_run())
+
+    def test_run_covers_only_users_present_at_start(self):
+        run = provisioning.start_run()
+        with provisioning.suppress_wallet_signal():
+            late = User.objects.create_user(phone_number='+2348000000498', password='pass')
+
+        provisioning.provision(run, rate=0, client=self.client_)
+        self.assertFalse(Wallet.objects.filter(user=late).exists())
+
+    def test_command_reports_throughput(self):
+        out = StringIO()
+        with patch('wallets.services.provisioning.get_client', return_value=self.client_):
+            call_command('provision_wallets', '--batch-size', '3', '--rate', '0', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('wallets/s', output)
+        self.assertIn('5 wallets created', output)
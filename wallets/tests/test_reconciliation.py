@@ -0,0 +1,123 @@
+# wallets/tests/test_reconciliation.py
+
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from wallets.models import ReconciliationCheckpoint, Transaction, Wallet
+from wallets.services.balance import credit_wallet, debit_wallet, set_shard_count
+from wallets.services.reconciliation import reconcile
+
+User = get_user_model()
+
+
+@override_settings(RECONCILE_SETTLE_SECONDS=0)
+class ReconcileWalletsTests(TestCase):
+    def setUp(self):
+        self.wallets = [
+            User.objects.create_user(phone_number=f'+23480000009{i:02d}').wallet for i in range(3)
+        ]
+
+    def _record(self, wallet, transaction_type, amount):
+        amount = Decimal(amount)
+        if transaction_type == Transaction.TOPUP:
+            credit_wallet(wallet.pk, amount)
+        else:
+            debit_wallet(wallet.pk, amount)
+        Transaction.objects.create(wallet=wallet, transaction_type=transaction_type, amount=amount)
+
+    def _reconcile(self, **kwargs):
+        return reconcile(chunk_size=2, processes=1, **kwargs)
+
+    def test_consistent_wallets_have_no_mismatches(self):
+        self._record(self.wallets[0], Transaction.TOPUP, '100.00')
+        self._record(self.wallets[0], Transaction.PURCHASE, '30.50')
+        self._record(self.wallets[1], Transaction.TOPUP, '10.00')
+        self._record(self.wallets[1], Transaction.WITHDRAW, '10.00')
+
+        report = self._reconcile()
+        self.assertEqual((report['wallets'], report['transactions'], report['mismatches']), (3, 4, []))
+        self.assertEqual(report['chunks'], 2)
+        checkpoint = ReconciliationCheckpoint.objects.get(wallet=self.wallets[0])
+        self.assertEqual(checkpoint.transaction_total, Decimal('69.50'))
+
+    def test_amounts_are_exact_in_kobo(self):
+        # 1.15 * 100 is 114.999... in floating point
+        for amount in ('1.15', '0.29', '4.35'):
+            self._record(self.wallets[0], Transaction.TOPUP, amount)
+        self._record(self.wallets[0], Transaction.PURCHASE, '1.15')
+
+        self.assertEqual(self._reconcile()['mismatches'], [])
+        self.assertEqual(ReconciliationCheckpoint.objects.get(wallet=self.wallets[0]).transaction_total, Decimal('4.64'))
+
+    def test_drift_is_reported(self):
+        self._record(self.wallets[2], Transaction.TOPUP, '50.00')
+        Wallet.objects.filter(pk=self.wallets[2].pk).update(balance=Decimal('55.25'))
+
+        self.assertEqual(self._reconcile()['mismatches'], [{
+            'wallet_id': self.wallets[2].pk,
+            'balance': '55.25',
+            'expected': '50.00',
+            'difference': '5.25',
+        }])
+
+    def test_incremental_run_reads_only_new_transactions(self):
+        self._record(self.wallets[0], Transaction.TOPUP, '100.00')
+        self._record(self.wallets[1], Transaction.TOPUP, '20.00')
+        self._reconcile()
+
+        self._record(self.wallets[0], Transaction.WITHDRAW, '40.00')
+        report = self._reconcile()
+        self.assertEqual((report['transactions'], report['mismatches']), (1, []))
+        self.assertEqual(self._reconcile(full=True)['transactions'], 3)
+
+    def test_idle_wallet_does_not_pull_the_chunk_history_back_in(self):
+        for _ in range(50):
+            self._record(self.wallets[0], Transaction.TOPUP, '1.00')
+        self.assertEqual(self._reconcile()['transactions'], 50)
+        last_id = Transaction.objects.latest('id').pk
+        idle = ReconciliationCheckpoint.objects.get(wallet=self.wallets[1])
+        self.assertEqual(idle.last_transaction_id, last_id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            report = self._reconcile()
+        self.assertEqual((report['transactions'], report['mismatches']), (0, []))
+        tx_queries = [q['sql'] for q in ctx.captured_queries if 'FROM "wallets_transaction"' in q['sql']]
+        with connection.cursor() as cursor:
+            for sql in tx_queries:
+                cursor.execute(sql)
+                self.assertEqual(cursor.fetchall(), [])
+
+        # A wallet without a checkpoint yet is filtered per wallet, not by the chunk floor
+        ReconciliationCheckpoint.objects.filter(wallet=self.wallets[1]).delete()
+        self.assertEqual(self._reconcile()['transactions'], 0)
+
+    def test_unsettled_transactions_are_counted_but_not_checkpointed(self):
+        self._record(self.wallets[0], Transaction.TOPUP, '100.00')
+        with override_settings(RECONCILE_SETTLE_SECONDS=3600):
+            self.assertEqual(self._reconcile()['mismatches'], [])
+        checkpoint = ReconciliationCheckpoint.objects.get(wallet=self.wallets[0])
+        self.assertEqual((checkpoint.transaction_total, checkpoint.last_transaction_id), (0, 0))
+
+        self.assertEqual(self._reconcile()['transactions'], 1)
+
+    def test_sharded_balances_are_included(self):
+        self._record(self.wallets[0], Transaction.TOPUP, '90.00')
+        set_shard_count(self.wallets[0].pk, 3)
+        self._record(self.wallets[0], Transaction.TOPUP, '15.00')
+        self.assertEqual(self._reconcile()['mismatches'], [])
+
+    def test_command_writes_json_report(self):
+        self._record(self.wallets[1], Transaction.TOPUP, '5.00')
+        Wallet.objects.filter(pk=self.wallets[1].pk).update(balance=0)
+
+        out = StringIO()
+        call_command('reconcile_wallets', '--processes=1', stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        self.assertEqual([row['wallet_id'] for row in report['mismatches']], [self.wallets[1].pk])
@@ -0,0 +1,112 @@
+# wallets/tests/test_rollups.py
+
+import csv
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from marketplace.models import Product
+from wallets.admin_site import CustomAdminSite
+from wallets.models import Transaction, TransactionRollup
+from wallets.services import rollups
+
+User = get_user_model()
+
+
+class TransactionRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(phone_number='+2348000000050', password='pass')
+        self.wallet = self.user.wallet
+        self.product = Product.objects.create(
+            name='MTN 1GB', code='MTN1GB', product_type=Product.DATA,
+            provider=Product.MTN, value=1024, price=Decimal('300.00'),
+        )
+
+    def _tx(self, kind, amount, **extra):
+        # Rollup increments are applied on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return Transaction.objects.create(wallet=self.wallet, transaction_type=kind, amount=Decimal(amount), **extra)
+
+    def _row(self, grain, dimension, key=''):
+        return TransactionRollup.objects.get(
+            grain=grain, dimension=dimension, key=key,
+            bucket=rollups.bucket_start(timezone.now(), grain),
+        )
+
+    def test_insert_updates_every_dimension(self):
+        self._tx(Transaction.TOPUP, '100.00')
+        self._tx(Transaction.PURCHASE, '300.00', bundle=self.product)
+
+        for grain in rollups.GRAINS:
+            total = self._row(grain, TransactionRollup.ALL)
+            self.assertEqual((total.count, total.volume), (2, Decimal('400.00')))
+            purchases = self._row(grain, TransactionRollup.TYPE, Transaction.PURCHASE)
+            self.assertEqual((purchases.count, purchases.volume), (1, Decimal('300.00')))
+            provider = self._row(grain, TransactionRollup.PROVIDER, Product.MTN)
+            self.assertEqual(provider.count, 1)
+            wallet = self._row(grain, TransactionRollup.WALLET, str(self.wallet.pk))
+            self.assertEqual(wallet.count, 2)
+
+    def test_increments_wait_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Transaction.objects.create(
+                wallet=self.wallet, transaction_type=Transaction.PURCHASE, amount=Decimal('300.00'), bundle=self.product,
+            )
+        # Nothing is locked or counted while the write's transaction is open
+        self.assertFalse(TransactionRollup.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self._row(TransactionRollup.DAY, TransactionRollup.PROVIDER, Product.MTN).count, 1)
+
+    def test_provider_lookup_is_one_query_per_batch(self):
+        self._tx(Transaction.PURCHASE, '300.00', bundle=self.product)
+        self._tx(Transaction.PURCHASE, '300.00', bundle=self.product)
+        transactions = list(Transaction.objects.all())
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks():
+            rollups.record_transactions(transactions)
+
+    def test_totals_and_today(self):
+        self._tx(Transaction.TOPUP, '40.00')
+        self._tx(Transaction.WITHDRAW, '10.00')
+        now = timezone.now()
+
+        self.assertEqual(rollups.totals(now - timedelta(days=7), now), (2, Decimal('50.00')))
+        self.assertEqual(rollups.day_totals(timezone.localdate()), (2, Decimal('50.00')))
+        self.assertEqual(
+            rollups.daily_series(now - timedelta(days=1), now),
+            {timezone.localdate().isoformat(): 50.0},
+        )
+
+    def test_totals_spanning_full_days(self):
+        tx = self._tx(Transaction.TOPUP, '25.00')
+        Transaction.objects.filter(pk=tx.pk).update(timestamp=timezone.now() - timedelta(days=3))
+        self._tx(Transaction.TOPUP, '5.00')
+        rollups.rebuild()
+
+        now = timezone.now()
+        self.assertEqual(rollups.totals(now - timedelta(days=10), now), (2, Decimal('30.00')))
+        self.assertEqual(rollups.totals(now - timedelta(days=1), now), (1, Decimal('5.00')))
+
+    def test_rebuild_matches_incremental(self):
+        self._tx(Transaction.TOPUP, '100.00')
+        self._tx(Transaction.PURCHASE, '300.00', bundle=self.product)
+        incremental = set(TransactionRollup.objects.values_list('grain', 'dimension', 'key', 'bucket', 'count', 'volume'))
+
+        rollups.rebuild()
+        rebuilt = set(TransactionRollup.objects.values_list('grain', 'dimension', 'key', 'bucket', 'count', 'volume'))
+        self.assertEqual(rebuilt, incremental)
+
+    def test_dashboard_csv_reads_rollups(self):
+        self._tx(Transaction.TOPUP, '70.00')
+        request = RequestFactory().get('/admin/dashboard/export-csv/?range=7')
+        request.user = self.user
+        response = CustomAdminSite(name='rollup_admin').export_dashboard_csv(request)
+
+        rows = list(csv.reader(io.StringIO(response.content.decode('utf-8'))))
+        self.assertEqual(rows[1][5:], ['1', '70.00', '1', '70.00'])
@@ -0,0 +1,89 @@
+# wallets/tests/test_running_balance.py
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from wallets.models import Transaction, Wallet
+from wallets.services.balance import set_shard_count
+
+User = get_user_model()
+
+BALANCE_AT_URL = '/api/v1/wallet/balance-at/'
+
+
+class RunningBalanceTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(phone_number='+2348000001001')
+        self.client.force_authenticate(self.user)
+        self.wallet = self.user.wallet
+
+    def _at(self, tx, moment):
+        Transaction.objects.filter(pk=tx.pk).update(timestamp=moment)
+
+    def test_mutations_record_balance_after(self):
+        self.client.post('/api/v1/wallet/top-up/', {'amount': '100.00'})
+        self.client.post('/api/v1/wallet/withdraw/', {'amount': '30.00'})
+        self.client.post('/api/v1/wallet/top-up/', {'amount': '5.50'})
+
+        rows = Transaction.objects.filter(wallet=self.wallet).order_by('id')
+        self.assertEqual(
+            list(rows.values_list('balance_after', flat=True)),
+            [Decimal('100.00'), Decimal('70.00'), Decimal('75.50')],
+        )
+        listing = self.client.get('/api/v1/transactions/')
+        self.assertIn('balance_after', listing.data[0])
+
+    def test_balance_at_is_one_indexed_lookup(self):
+        self.client.post('/api/v1/wallet/top-up/', {'amount': '100.00'})
+        self.client.post('/api/v1/wallet/withdraw/', {'amount': '40.00'})
+        first, second = Transaction.objects.filter(wallet=self.wallet).order_by('id')
+        noon = timezone.make_aware(datetime(2026, 3, 1, 12, 0))
+        self._at(first, noon)
+        self._at(second, noon + timedelta(days=1))
+
+        with self.assertNumQueries(2):
+            # wallet id, then the seek on (wallet, -timestamp, -id)
+            response = self.client.get(BALANCE_AT_URL, {'at': '2026-03-01T18:00:00'})
+        self.assertEqual((response.data['balance'], response.data['transaction']), ('100.00', first.pk))
+
+        self.assertEqual(self.client.get(BALANCE_AT_URL, {'at': '2026-03-02'}).data['balance'], '60.00')
+        before = self.client.get(BALANCE_AT_URL, {'at': '2026-02-28'}).data
+        self.assertEqual((before['balance'], before['transaction']), ('0.00', None))
+
+    def test_invalid_at_is_rejected(self):
+        for value in ('', 'yesterday', '2026-13-40'):
+            self.assertEqual(self.client.get(BALANCE_AT_URL, {'at': value}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sharded_rows_fall_back_to_ledger(self):
+        set_shard_count(self.wallet.pk, 3)
+        self.client.post('/api/v1/wallet/top-up/', {'amount': '25.00'})
+        self.assertIsNone(Transaction.objects.get(wallet=self.wallet).balance_after)
+
+        response = self.client.get(BALANCE_AT_URL, {'at': timezone.now().isoformat()})
+        self.assertEqual(response.data['balance'], '25.00')
+
+    def test_backfill_replays_history_from_current_balance(self):
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('65.00'))
+        Transaction.objects.bulk_create([
+            Transaction(wallet=self.wallet, transaction_type=Transaction.TOPUP, amount=Decimal('50.00')),
+            Transaction(wallet=self.wallet, transaction_type=Transaction.PURCHASE, amount=Decimal('15.00')),
+            Transaction(wallet=self.wallet, transaction_type=Transaction.TOPUP, amount=Decimal('20.00')),
+        ])
+        untouched = User.objects.create_user(phone_number='+2348000001002').wallet
+        Transaction.objects.create(
+            wallet=untouched, transaction_type=Transaction.TOPUP, amount=Decimal('1.00'), balance_after=Decimal('9.00'),
+        )
+
+        call_command('backfill_balance_after', '--chunk-size=1', stdout=StringIO())
+        self.assertEqual(
+            list(Transaction.objects.filter(wallet=self.wallet).order_by('id').values_list('balance_after', flat=True)),
+            [Decimal('60.00'), Decimal('45.00'), Decimal('65.00')],
+        )
+        self.assertEqual(Transaction.objects.get(wallet=untouched).balance_after, Decimal('9.00'))
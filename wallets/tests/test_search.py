@@ -0,0 +1,107 @@
+# wallets/tests/test_search.py
+
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APITestCase
+
+from marketplace.models import Product
+from wallets.models import Transaction
+from wallets.services import search
+
+User = get_user_model()
+
+
+def ids(queryset):
+    return set(queryset.values_list('id', flat=True))
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.wallet = User.objects.create_user(phone_number='+2348000001201').wallet
+        self.product = Product.objects.create(
+            name='MTN 1GB', code='MTN1GB', product_type=Product.DATA,
+            provider=Product.MTN, value=1024, price=Decimal('300.00'),
+        )
+
+    def tx(self, description, **kwargs):
+        return Transaction.objects.create(wallet=self.wallet, amount=Decimal('1.00'), description=description, **kwargs)
+
+    def test_inserts_updates_and_deletes_are_indexed(self):
+        rent = self.tx('Rent for March')
+        bulk = Transaction.objects.bulk_create([
+            Transaction(wallet=self.wallet, amount=Decimal('1.00'), description='School fees'),
+        ])[0]
+        everything = Transaction.objects.all()
+
+        self.assertEqual(ids(search.search(everything, 'rent')), {rent.pk})
+        self.assertEqual(ids(search.search(everything, 'SCHOOL fee')), {bulk.pk})
+
+        Transaction.objects.filter(pk=rent.pk).update(description='Salary')
+        self.assertEqual(ids(search.search(everything, 'rent')), set())
+        self.assertEqual(ids(search.search(everything, 'sal')), {rent.pk})
+
+        Transaction.objects.filter(pk=bulk.pk).delete()
+        self.assertEqual(ids(search.search(everything, 'school')), set())
+
+    def test_bundle_name_follows_renames(self):
+        purchase = self.tx('Data purchase', bundle=self.product, transaction_type=Transaction.PURCHASE)
+        everything = Transaction.objects.all()
+        self.assertEqual(ids(search.search(everything, 'mtn 1gb')), {purchase.pk})
+        self.assertEqual(ids(search.search(everything, 'mtn', ['description'])), set())
+
+        Product.objects.filter(pk=self.product.pk).update(name='Airtel 1GB')
+        self.assertEqual(ids(search.search(everything, 'airtel')), {purchase.pk})
+        self.assertEqual(ids(search.search(everything, 'mtn')), set())
+
+    def test_operators_in_input_are_plain_words(self):
+        tx = self.tx('Refund "NEAR" OR*')
+        everything = Transaction.objects.all()
+        self.assertEqual(ids(search.search(everything, '"near" OR ( -*')), {tx.pk})
+        self.assertEqual(search.search(everything, '*:() "'), everything)
+
+    def test_admin_matches_bundle_name_or_owner_phone(self):
+        purchase = self.tx('Data purchase', bundle=self.product, transaction_type=Transaction.PURCHASE)
+        other = Transaction.objects.create(
+            wallet=User.objects.create_user(phone_number='+2348000001202').wallet,
+            amount=Decimal('1.00'), description='Top-up',
+        )
+        model_admin = site._registry[Transaction]
+        request = RequestFactory().get('/')
+        for term, expected in (('mtn', {purchase.pk}), ('+2348000001202', {other.pk})):
+            results, may_have_duplicates = model_admin.get_search_results(request, Transaction.objects.all(), term)
+            self.assertEqual(ids(results), expected)
+            self.assertFalse(may_have_duplicates)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_transaction_search', '--rows=40', '--repeat=1', '--term=salary', stdout=out)
+        lines = out.getvalue().splitlines()
+        api, admin = [line.split() for line in lines[-2:]]
+        self.assertEqual((api[0], admin[0]), ('api', 'admin'))
+        self.assertEqual(Transaction.objects.count(), 0)
+
+
+class TransactionSearchApiTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(phone_number='+2348000001203')
+        self.client.force_authenticate(self.user)
+        for description in ('Electricity token', 'Cable subscription', 'Electric bike deposit'):
+            Transaction.objects.create(wallet=self.user.wallet, amount=Decimal('1.00'), description=description)
+        Transaction.objects.create(
+            wallet=User.objects.create_user(phone_number='+2348000001204').wallet,
+            amount=Decimal('1.00'), description='Electricity token',
+        )
+
+    def test_search_uses_word_prefixes_within_the_wallet(self):
+        response = self.client.get('/api/v1/transactions/', {'search': 'electric'})
+        self.assertEqual(
+            sorted(row['description'] for row in response.data),
+            ['Electric bike deposit', 'Electricity token'],
+        )
+        response = self.client.get('/api/v1/transactions/', {'search': 'electric token'})
+        self.assertEqual([row['description'] for row in response.data], ['Electricity token'])
@@ -0,0 +1,147 @@
+# wallets/tests/test_services.py
+
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from wallets.models import Wallet, Transaction
+from wallets.services.balance import (
+    InsufficientFunds,
+    consolidate_wallet,
+    credit_wallet,
+    debit_wallet,
+    set_shard_count,
+)
+
+User = get_user_model()
+
+
+class DebitWalletTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(phone_number='+2348000000001', password='pass')
+        self.wallet = self.user.wallet
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('100.00'))
+
+    def test_debit_subtracts_amount(self):
+        debit_wallet(self.wallet.pk, Decimal('30.00'))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('70.00'))
+
+    def test_debit_full_balance(self):
+        debit_wallet(self.wallet.pk, Decimal('100.00'))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('0.00'))
+
+    def test_debit_insufficient_leaves_balance(self):
+        with self.assertRaises(InsufficientFunds):
+            debit_wallet(self.wallet.pk, Decimal('100.01'))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('100.00'))
+
+    def test_credit_adds_amount(self):
+        credit_wallet(self.wallet.pk, Decimal('25.50'))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('125.50'))
+
+    def test_negative_balance_rejected_by_database(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('-1.00'))
+
+
+class WithdrawEndpointTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(phone_number='+2348000000002', password='pass')
+        self.client.force_authenticate(self.user)
+        self.wallet = self.user.wallet
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('100.00'))
+
+    def test_withdraw_debits_and_logs_transaction(self):
+        resp = self.client.post('/api/v1/wallet/withdraw/', {'amount': '40.00'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(resp.data['balance']), Decimal('60.00'))
+        self.assertTrue(
+            Transaction.objects.filter(wallet=self.wallet, transaction_type=Transaction.WITHDRAW).exists()
+        )
+
+    def test_withdraw_insufficient(self):
+        resp = self.client.post('/api/v1/wallet/withdraw/', {'amount': '150.00'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Insufficient funds', resp.data['detail'])
+        self.assertFalse(Transaction.objects.filter(wallet=self.wallet).exists())
+
+    def test_top_up_credits(self):
+        resp = self.client.post('/api/v1/wallet/top-up/', {'amount': '10.00'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(resp.data['balance']), Decimal('110.00'))
+
+
+class ShardedWalletTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(phone_number='+2348000000003', password='pass')
+        self.client.force_authenticate(self.user)
+        self.wallet = self.user.wallet
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('100.00'))
+        set_shard_count(self.wallet.pk, 4)
+        self.wallet.refresh_from_db()
+
+    def test_enabling_shards_spreads_balance(self):
+        self.assertEqual(self.wallet.shards.count(), 3)
+        self.assertEqual(self.wallet.balance, Decimal('25.00'))
+        self.assertEqual(self.wallet.logical_balance, Decimal('100.00'))
+
+    def test_credit_and_debit_keep_logical_sum(self):
+        credit_wallet(self.wallet.pk, Decimal('10.00'))
+        debit_wallet(self.wallet.pk, Decimal('5.00'))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.logical_balance, Decimal('105.00'))
+
+    def test_slot_writes_advance_logical_version(self):
+        versions = [self.wallet.logical_version]
+        with mock.patch('wallets.services.balance.random.randrange', return_value=2):
+            credit_wallet(self.wallet.pk, Decimal('10.00'))
+            versions.append(Wallet.objects.get(pk=self.wallet.pk).logical_version)
+            debit_wallet(self.wallet.pk, Decimal('5.00'))
+            versions.append(Wallet.objects.get(pk=self.wallet.pk).logical_version)
+        debit_wallet(self.wallet.pk, Decimal('90.00'))  # Borrows across slots
+        versions.append(Wallet.objects.get(pk=self.wallet.pk).logical_version)
+        set_shard_count(self.wallet.pk, 2)
+        versions.append(Wallet.objects.get(pk=self.wallet.pk).logical_version)
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_credit_to_missing_shard_lands_on_wallet_row(self):
+        self.wallet.shards.filter(slot=2).delete()
+        with mock.patch('wallets.services.balance.random.randrange', return_value=2):
+            credit_wallet(self.wallet.pk, Decimal('10.00'))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('35.00'))
+        self.assertEqual(self.wallet.logical_balance, Decimal('85.00'))
+
+    def test_debit_borrows_across_slots(self):
+        debit_wallet(self.wallet.pk, Decimal('90.00'))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.logical_balance, Decimal('10.00'))
+
+    def test_debit_more_than_logical_balance(self):
+        with self.assertRaises(InsufficientFunds):
+            debit_wallet(self.wallet.pk, Decimal('100.01'))
+        self.assertEqual(self.wallet.logical_balance, Decimal('100.00'))
+
+    def test_consolidate_rebalances_slots(self):
+        debit_wallet(self.wallet.pk, Decimal('60.00'))
+        consolidate_wallet(self.wallet.pk)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('10.00'))
+        self.assertEqual(
+            sorted(self.wallet.shards.values_list('balance', flat=True)),
+            [Decimal('10.00')] * 3,
+        )
+
+    def test_wallet_me_reports_logical_balance(self):
+        resp = self.client.get('/api/v1/wallet/me/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(resp.data['balance']), Decimal('100.00'))
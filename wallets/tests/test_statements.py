@@ -0,0 +1,101 @@
+# wallets/tests/test_statements.py
+
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from jobs.models import Job
+from wallets.models import Transaction
+from wallets.services import statements
+from wallets.tasks import render_statement_pdf
+
+User = get_user_model()
+
+STATEMENT_URL = '/api/v1/wallet/statement/'
+MARCH = {'start': '2026-03-01', 'end': '2026-03-31'}
+
+
+class StatementTests(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.user = User.objects.create_user(phone_number='+2348000001101')
+        self.client.force_authenticate(self.user)
+        self.wallet = self.user.wallet
+
+        # February's top-up becomes March's opening balance
+        for day, path, amount in [
+            (datetime(2026, 2, 20, 9), 'top-up', '100.00'),
+            (datetime(2026, 3, 2, 9), 'withdraw', '30.00'),
+            (datetime(2026, 3, 15, 9), 'top-up', '12.50'),
+            (datetime(2026, 4, 1, 9), 'top-up', '1.00'),
+        ]:
+            self.client.post(f'/api/v1/wallet/{path}/', {'amount': amount})
+            tx = Transaction.objects.filter(wallet=self.wallet).latest('id')
+            Transaction.objects.filter(pk=tx.pk).update(timestamp=timezone.make_aware(day))
+
+    def _body(self, response):
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_streams_running_balances(self):
+        response = self.client.get(STATEMENT_URL, MARCH)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('statement_20260301_20260331.csv', response['Content-Disposition'])
+
+        rows = [line.split(',') for line in self._body(response).splitlines()]
+        self.assertEqual(rows[0], statements.CSV_HEADER)
+        self.assertEqual(rows[1][-1], '100.00')
+        self.assertEqual([row[-1] for row in rows[2:4]], ['70.00', '82.50'])
+        self.assertEqual(rows[4][2:], ['closing', 'Closing balance', '12.50', '30.00', '82.50'])
+
+    def test_ndjson_opening_entries_and_closing(self):
+        response = self.client.get(STATEMENT_URL, {**MARCH, 'output': 'ndjson'})
+        lines = [json.loads(line) for line in self._body(response).splitlines()]
+        self.assertEqual([line['kind'] for line in lines], ['opening', 'transaction', 'transaction', 'closing'])
+        self.assertEqual(lines[0]['opening_balance'], '100.00')
+        self.assertEqual((lines[1]['debit'], lines[1]['credit']), ('30.00', None))
+        self.assertEqual(lines[-1], {
+            'kind': 'closing', 'count': 2, 'credits': '12.50', 'debits': '30.00', 'closing_balance': '82.50',
+        })
+
+    def test_invalid_requests(self):
+        for params in ({'start': '2026-03-31', 'end': '2026-03-01'}, {'start': 'March'}, {'output': 'xlsx'}):
+            self.assertEqual(self.client.get(STATEMENT_URL, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pdf_is_rendered_once_per_range_and_last_transaction(self):
+        with override_settings(MEDIA_ROOT=self.media):
+            first = self.client.get(STATEMENT_URL, {**MARCH, 'output': 'pdf'})
+            again = self.client.get(STATEMENT_URL, {**MARCH, 'output': 'pdf'})
+            self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(again.data['job'], first.data['job'])
+
+            job = Job.objects.get(pk=first.data['job'])
+            self.assertEqual(job.task, render_statement_pdf.name)
+            march_last = Transaction.objects.filter(wallet=self.wallet, amount='12.50').get().pk
+            self.assertEqual(job.kwargs['last_transaction_id'], march_last)
+
+            path = statements.pdf_path(self.wallet.pk, datetime(2026, 3, 1), datetime(2026, 3, 31), march_last)
+            default_storage.save(path, ContentFile(b'%PDF-1.7'))
+            response = self.client.get(STATEMENT_URL, {**MARCH, 'output': 'pdf'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.7')
+            self.assertEqual(render_statement_pdf(**job.kwargs)['cached'], True)
+
+    def test_command_writes_statement(self):
+        out = StringIO()
+        call_command(
+            'statement', f'--wallet={self.wallet.pk}', '--start=2026-03-01', '--end=2026-03-31',
+            '--format=ndjson', stdout=out, stderr=StringIO(),
+        )
+        self.assertEqual(json.loads(out.getvalue().splitlines()[-1])['closing_balance'], '82.50')
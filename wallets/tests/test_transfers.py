@@ -0,0 +1,119 @@
+# wallets/tests/test_transfers.py
+
+import re
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from wallets.models import LedgerAccount, Transaction, TransactionRollup, Wallet
+from wallets.services import balance_cache, counters, ledger, rollups
+
+User = get_user_model()
+
+TRANSFER_URL = '/api/v1/wallet/bulk-transfer/'
+
+
+class BulkTransferTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.agent = User.objects.create_user(phone_number='+2348000001401', is_agent=True)
+        self.client.force_authenticate(self.agent)
+        self.source = self.agent.wallet
+        Wallet.objects.filter(pk=self.source.pk).update(balance=Decimal('100.00'))
+        self.subs = [User.objects.create_user(phone_number=f'+23480000014{i:02d}') for i in range(10, 13)]
+
+    def lines(self, *pairs):
+        return {'lines': [{'recipient': phone, 'amount': amount} for phone, amount in pairs]}
+
+    def balance(self, user):
+        return Wallet.objects.get(user=user).balance
+
+    def test_distributes_and_reports_each_line(self):
+        a, b = self.subs[0].phone_number, self.subs[1].phone_number
+        totals = counters.totals()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(TRANSFER_URL, self.lines(
+                (a, '10.00'), ('+2348099999999', '5.00'), (b, '20.00'), (a, '2.50'), (self.agent.phone_number, '1.00'),
+            ), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.data['balance'], response.data['total'], response.data['credited'], response.data['failed']),
+            ('67.50', '32.50', 3, 2),
+        )
+        statuses = [(line['line'], line['status']) for line in response.data['lines']]
+        self.assertEqual(statuses, [(0, 'credited'), (1, 'failed'), (2, 'credited'), (3, 'credited'), (4, 'failed')])
+        self.assertIn('error', response.data['lines'][1])
+
+        self.assertEqual([self.balance(sub) for sub in self.subs], [Decimal('12.50'), Decimal('20.00'), Decimal('0.00')])
+        source_tx = Transaction.objects.get(wallet=self.source)
+        self.assertEqual((source_tx.amount, source_tx.balance_after), (Decimal('32.50'), Decimal('67.50')))
+        credited = Transaction.objects.get(pk=response.data['lines'][3]['transaction'])
+        self.assertEqual((credited.amount, credited.balance_after), (Decimal('2.50'), Decimal('12.50')))
+
+        # bulk_create skips post_save: ledger, cache and counters were written by the engine
+        self.assertEqual(ledger.wallet_balance(self.source), Decimal('-32.50'))
+        self.assertEqual(ledger.wallet_balance(Wallet.objects.get(user=self.subs[0])), Decimal('12.50'))
+        transfers = LedgerAccount.objects.get(code=LedgerAccount.TRANSFERS)
+        self.assertEqual(ledger.account_balance(transfers), 0)
+        self.assertEqual(balance_cache.get_balance(self.subs[0].wallet.pk)[0], Decimal('12.50'))
+        # Money moved between wallets: the dashboard total stays put
+        self.assertEqual(counters.totals(), totals)
+
+    def test_insufficient_funds_changes_nothing(self):
+        response = self.client.post(TRANSFER_URL, self.lines(
+            (self.subs[0].phone_number, '60.00'), (self.subs[1].phone_number, '40.01'),
+        ), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.balance(self.agent), Decimal('100.00'))
+        self.assertFalse(Transaction.objects.exists())
+
+    @override_settings(BULK_TRANSFER_MAX_LINES=2)
+    def test_invalid_requests(self):
+        phone = self.subs[0].phone_number
+        for body in ({'lines': []}, self.lines((phone, '0.00')), self.lines((phone, '1'), (phone, '1'), (phone, '1'))):
+            self.assertEqual(self.client.post(TRANSFER_URL, body, format='json').status_code, 400)
+
+        self.client.force_authenticate(self.subs[0])
+        response = self.client.post(TRANSFER_URL, self.lines((self.subs[1].phone_number, '1.00')), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_large_batches_match_rebuilt_rollups(self):
+        with mock.patch.object(rollups, 'BULK_ROWS', 0), self.captureOnCommitCallbacks(execute=True):
+            self.client.post(TRANSFER_URL, self.lines(
+                *[(sub.phone_number, '3.00') for sub in self.subs], (self.subs[0].phone_number, '1.00'),
+            ), format='json')
+        fields = ('grain', 'dimension', 'key', 'bucket', 'count', 'volume')
+        incremental = sorted(TransactionRollup.objects.values_list(*fields))
+        rollups.rebuild()
+        self.assertEqual(incremental, sorted(TransactionRollup.objects.values_list(*fields)))
+        wallet_row = [row for row in incremental if row[1] == TransactionRollup.WALLET and row[2] == str(self.subs[0].wallet.pk)]
+        self.assertEqual([(row[4], row[5]) for row in wallet_row], [(2, Decimal('4.00'))] * 2)
+
+    def test_large_batches_lock_rollup_rows_in_bucket_order(self):
+        with mock.patch.object(rollups, 'BULK_ROWS', 0), CaptureQueriesContext(connection) as ctx, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.post(TRANSFER_URL, self.lines(*[(sub.phone_number, '3.00') for sub in self.subs]), format='json')
+        locks = [
+            query['sql'] for query in ctx.captured_queries
+            if query['sql'].startswith('SELECT "wallets_transactionrollup"."id"')
+        ]
+        groups = [re.search(r'"dimension" = \'(\w+)\' AND .*"grain" = \'(\w+)\'', sql).groups()[::-1] for sql in locks]
+        # Same (grain, dimension, key, bucket) order as the row-at-a-time path
+        self.assertEqual(groups, sorted(groups))
+        self.assertTrue(locks and all(' ORDER BY ' in sql for sql in locks))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_bulk_transfer', '--recipients=5', stdout=out)
+        self.assertIn('5 recipients', out.getvalue())
+        self.assertIn('consistent: True', out.getvalue())
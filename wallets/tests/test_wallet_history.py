@@ -0,0 +1,47 @@
+# wallets/tests/test_wallet_history.py
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from wallets.models import Transaction, Wallet
+
+User = get_user_model()
+
+
+@override_settings(WALLET_HISTORY_MAX=5)
+class WalletHistoryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(phone_number='+2348000000701', password='pass')
+        self.client.force_authenticate(self.user)
+        self.wallet = self.user.wallet
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('100.00'))
+        Transaction.objects.bulk_create([
+            Transaction(wallet=self.wallet, transaction_type=Transaction.TOPUP, amount=Decimal(i), description=f'tx {i}')
+            for i in range(1, 9)
+        ])
+
+    def test_history_is_opt_in(self):
+        response = self.client.get('/api/v1/wallet/me/')
+        self.assertNotIn('history', response.data)
+
+        response = self.client.get('/api/v1/wallet/me/', {'history': 3})
+        self.assertEqual([tx['description'] for tx in response.data['history']], ['tx 8', 'tx 7', 'tx 6'])
+
+    def test_history_is_capped(self):
+        response = self.client.get('/api/v1/wallet/me/', {'history': 1000})
+        self.assertEqual(len(response.data['history']), 5)
+
+    def test_history_query_is_sliced_and_projected(self):
+        with self.assertNumQueries(3):
+            # validator, wallet, history; `user` is dropped by ?fields=
+            response = self.client.get('/api/v1/wallet/me/', {'history': 2, 'fields': 'balance,history'})
+        self.assertEqual(set(response.data), {'balance', 'history'})
+
+    def test_mutation_returns_only_requested_fields(self):
+        response = self.client.post('/api/v1/wallet/withdraw/?fields=balance,version', {'amount': '10.00'})
+        self.assertEqual(response.data, {'balance': '90.00', 'version': 1})
@@ -0,0 +1,124 @@
+# wallets/tests/test_webhooks.py
+
+import hashlib
+import hmac
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from jobs import queue
+from jobs.models import Job
+from wallets.models import JournalLeg, Transaction, TransactionRollup, Wallet, WebhookEvent
+from wallets.services import webhooks
+from wallets.tasks import apply_webhook_events
+
+User = get_user_model()
+
+
+@override_settings(MONNIFY_SECRET_KEY='test-secret', MONNIFY_POOL_TARGET=0)
+class WebhookInboxTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.wallets = []
+        for i in range(2):
+            user = User.objects.create_user(phone_number=f'+23480000001{i:02d}', password='pass')
+            Wallet.objects.filter(user=user).update(account_number=f'10000000{i:02d}')
+            self.wallets.append(Wallet.objects.get(user=user))
+
+    def _deliver(self, reference, amount, account_number, secret=b'test-secret'):
+        body = json.dumps({
+            'eventType': 'SUCCESSFUL_TRANSACTION',
+            'eventData': {
+                'transactionReference': reference,
+                'amount': amount,
+                'accountDetails': {'accountNumber': account_number},
+            },
+        }).encode()
+        signature = hmac.new(secret, body, hashlib.sha512).hexdigest()
+        return self.client.generic(
+            'POST', '/webhook/monnify/', body,
+            content_type='application/json', HTTP_MONNIFY_SIGNATURE=signature,
+        )
+
+    def test_ack_stores_event_without_crediting(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._deliver('REF-1', '50.00', self.wallets[0].account_number)
+        self.assertEqual(response.json(), {'status': 'received'})
+        self.assertFalse(any('wallets_wallet' in q['sql'] for q in ctx.captured_queries))
+
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.PENDING)
+        self.wallets[0].refresh_from_db()
+        self.assertEqual(self.wallets[0].balance, Decimal('0.00'))
+
+    def test_burst_is_collapsed_into_one_job(self):
+        for i in range(5):
+            self._deliver(f'REF-{i}', '10.00', self.wallets[0].account_number)
+        self.assertEqual(Job.objects.filter(task=apply_webhook_events.name).count(), 1)
+
+    def test_invalid_amounts_are_rejected_before_storing(self):
+        for i, amount in enumerate(['NaN', 'Infinity', '-5.00', '0', '0.001', '1e20', 'abc', None, True]):
+            response = self._deliver(f'BAD-{i}', amount, self.wallets[0].account_number)
+            self.assertEqual(response.status_code, 400, amount)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_bad_signature_is_not_stored(self):
+        response = self._deliver('REF-X', '10.00', self.wallets[0].account_number, secret=b'wrong')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_batch_groups_credits_per_wallet(self):
+        first, second = self.wallets
+        for i in range(3):
+            self._deliver(f'A-{i}', '10.00', first.account_number)
+        self._deliver('B-0', '7.50', second.account_number)
+        self._deliver('A-0', '10.00', first.account_number)  # redelivery
+        self._deliver('C-0', '5.00', '9999999999')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(webhooks.drain(), 5)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.balance, Decimal('30.00'))
+        self.assertEqual(second.balance, Decimal('7.50'))
+        self.assertEqual(
+            list(Transaction.objects.filter(wallet=first).order_by('id').values_list('balance_after', flat=True)),
+            [Decimal('10.00'), Decimal('20.00'), Decimal('30.00')],
+        )
+        self.assertEqual(WebhookEvent.objects.filter(status=WebhookEvent.APPLIED, transaction__isnull=False).count(), 4)
+        self.assertEqual(WebhookEvent.objects.get(reference='C-0').error, 'wallet not found')
+
+        # bulk_create bypasses post_save; the ledger and rollups must still see every credit
+        self.assertEqual(JournalLeg.objects.filter(account__wallet=first).count(), 3)
+        rollup = TransactionRollup.objects.get(grain=TransactionRollup.DAY, dimension=TransactionRollup.ALL)
+        self.assertEqual((rollup.count, rollup.volume), (4, Decimal('37.50')))
+
+    def test_wallet_updates_do_not_grow_with_batch(self):
+        for i in range(10):
+            self._deliver(f'A-{i}', '1.00', self.wallets[0].account_number)
+        with CaptureQueriesContext(connection) as ctx:
+            webhooks.drain()
+        wallet_updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "wallets_wallet"')]
+        self.assertEqual(len(wallet_updates), 1)
+
+    def test_worker_applies_events(self):
+        self._deliver('REF-1', '12.00', self.wallets[0].account_number)
+        queue.drain()
+        self.wallets[0].refresh_from_db()
+        self.assertEqual(self.wallets[0].balance, Decimal('12.00'))
+
+    @override_settings(MONNIFY_WEBHOOK_INBOX=False)
+    def test_inline_mode_credits_in_request(self):
+        response = self._deliver('REF-1', '12.00', self.wallets[0].account_number)
+        self.assertEqual(response.json(), {'status': 'wallet credited'})
+        self.wallets[0].refresh_from_db()
+        self.assertEqual(self.wallets[0].balance, Decimal('12.00'))
+
+        response = self._deliver('REF-2', '12.00', '9999999999')
+        self.assertEqual(response.status_code, 404)
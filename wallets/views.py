@@ -1,33 +1,61 @@
 import json
 import hmac
 import hashlib
-from decimal import Decimal
+from datetime import datetime
 
 from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery, Sum
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse, JsonResponse
-from django.template.loader import render_to_string
-from django.templatetags.static import static
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
-from rest_framework.pagination import LimitOffsetPagination
 
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, DateFromToRangeFilter
 from drf_yasg.utils import swagger_auto_schema
 
-from .models import Wallet, Transaction
+from config.conditional import conditional_get
+from config.permissions import IsAgent
+from jobs.models import Job
+
+from .models import Wallet, WalletShard, Transaction
 from .serializers import (
     WalletSerializer,
+    WalletBalanceSerializer,
+    WalletBalanceAtSerializer,
     TransactionSerializer,
     TopUpSerializer,
     WithdrawSerializer,
+    BulkTransferSerializer,
+    BulkTransferResultSerializer,
+)
+from .pagination import TransactionPagination
+from .idempotency import fingerprint, idempotent
+from .tasks import apply_webhook_events, render_dashboard_pdf, render_statement_pdf
+from .services import balance_cache, search, statements, transfers, webhooks
+from .services.running_balance import balance_at
+from .services.balance import (
+    OPTIMISTIC,
+    InsufficientFunds,
+    WriteConflict,
+    apply_versioned,
+    concurrency_mode,
+    credit_wallet,
+    debit_wallet,
 )
 
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The wallet was changed concurrently; please retry."
+    default_code = 'conflict'
+
 # -------------------------------------------------------------------
 # TransactionFilter for DjangoFilterBackend
 # -------------------------------------------------------------------
@@ -41,17 +69,66 @@ class TransactionFilter(FilterSet):
             'timestamp': ['exact', 'gte', 'lte'],
         }
 
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter answered from the transaction full-text index when every
+    `search_fields` entry is indexed, instead of an `icontains` scan per
+    field. Terms match word prefixes rather than any substring. Falls
+    back to SearchFilter on databases without the index.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_terms or not search.available() or not search.indexed(search_fields):
+            return super().filter_queryset(request, queryset, view)
+        return search.search(queryset, ' '.join(search_terms), search_fields)
+
+def wallet_validator(request, *args, **kwargs):
+    """
+    Conditional GET state for the user's wallet and its transactions:
+    every balance change bumps `version` and `updated_at` on the row it
+    writes (the wallet or one of its shards), and every new transaction
+    raises the newest id. One query, no serialization.
+    """
+    last_transaction = Transaction.objects.filter(wallet=OuterRef('pk')).order_by('-id').values('id')[:1]
+    shards = WalletShard.objects.filter(wallet=OuterRef('pk')).values('wallet')
+    rows = list(
+        Wallet.objects.filter(user=request.user)
+        .annotate(
+            last_transaction_id=Subquery(last_transaction),
+            shard_version=Subquery(shards.annotate(total=Sum('version')).values('total')),
+            shard_updated_at=Subquery(shards.annotate(latest=Max('updated_at')).values('latest')),
+        )
+        .values_list('pk', 'version', 'updated_at', 'last_transaction_id', 'shard_version', 'shard_updated_at')[:1]
+    )
+    if not rows:
+        return None, None
+    pk, version, updated_at, last_transaction_id, shard_version, shard_updated_at = rows[0]
+    if shard_updated_at and shard_updated_at > updated_at:
+        updated_at = shard_updated_at
+    return (pk, version + (shard_version or 0), updated_at, last_transaction_id), updated_at
+
 # -------------------------------------------------------------------
 # WalletViewSet: View & mutate the authenticated user’s wallet
 # -------------------------------------------------------------------
 class WalletViewSet(viewsets.GenericViewSet):
     """
     me:
-      GET /wallet/me/         → get current user’s wallet
+      GET /wallet/me/         → get current user’s wallet (ETag / 304 aware)
+    balance:
+      GET /wallet/balance/    → cached balance for polling clients
+    balance_at:
+      GET /wallet/balance-at/?at=<datetime or date> → balance as of a moment
+    statement:
+      GET /wallet/statement/?start=&end=&output=csv|ndjson|pdf → statement download
     top_up:
       POST /wallet/top-up/    → deposit funds
     withdraw:
       POST /wallet/withdraw/  → withdraw funds
+    bulk_transfer:
+      POST /wallet/bulk-transfer/ → agents: fund many wallets in one request
     """
     serializer_class = WalletSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -60,72 +137,225 @@ class WalletViewSet(viewsets.GenericViewSet):
         return get_object_or_404(Wallet, user=self.request.user)
 
     @swagger_auto_schema(
-        operation_description="Retrieve the authenticated user's wallet.",
+        operation_description=(
+            "Retrieve the authenticated user's wallet. ?history=N embeds the latest N transactions "
+            "(at most WALLET_HISTORY_MAX); ?fields=balance,version returns only the listed fields."
+        ),
         responses={200: WalletSerializer},
         tags=["Wallet Operations"],
     )
     @action(detail=False, methods=['get'], url_path='me')
+    @conditional_get(wallet_validator)
     def me(self, request):
         wallet = self.get_object()
         serializer = self.get_serializer(wallet, context={'request': request})
         return Response(serializer.data)
 
     @swagger_auto_schema(
-        operation_description="Deposit funds into the authenticated user's wallet.",
+        operation_description=(
+            "Current balance of the authenticated user's wallet, served from the write-through "
+            "balance cache when WALLET_BALANCE_CACHE is on. Pass ?min_version=<version from your last write> to read your own writes."
+        ),
+        responses={200: WalletBalanceSerializer},
+        tags=["Wallet Operations"],
+    )
+    @action(detail=False, methods=['get'], url_path='balance')
+    def balance(self, request):
+        try:
+            wallet_id = balance_cache.wallet_id_for_user(request.user.pk)
+        except Wallet.DoesNotExist:
+            raise Http404
+        min_version = request.query_params.get('min_version', '')
+        balance, version = balance_cache.get_balance(wallet_id, int(min_version) if min_version.isdigit() else 0)
+        return Response(WalletBalanceSerializer({'balance': balance, 'version': version}).data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Balance of the authenticated user's wallet as of ?at=<ISO datetime>. A bare date "
+            "(YYYY-MM-DD) means the end of that day. Read from the running balance stored on the "
+            "last transaction at or before that moment."
+        ),
+        responses={200: WalletBalanceAtSerializer, 400: "Missing or invalid ?at."},
+        tags=["Wallet Operations"],
+    )
+    @action(detail=False, methods=['get'], url_path='balance-at')
+    def balance_at(self, request):
+        raw = request.query_params.get('at', '')
+        try:
+            day = parse_date(raw)
+            at = datetime.combine(day, datetime.max.time()) if day else parse_datetime(raw)
+        except ValueError:
+            at = None
+        if at is None:
+            return Response(
+                {"detail": "Pass ?at= as an ISO datetime or YYYY-MM-DD date."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(at):
+            at = timezone.make_aware(at)
+
+        wallet = get_object_or_404(Wallet.objects.only('id'), user=request.user)
+        balance, tx_id = balance_at(wallet, at)
+        return Response(WalletBalanceAtSerializer({'balance': balance, 'at': at, 'transaction': tx_id}).data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Statement of the authenticated user's wallet for ?start=YYYY-MM-DD&end=YYYY-MM-DD "
+            "(default: the current month) with opening, running and closing balances. "
+            "?output=csv (default) or ndjson streams the rows as they are read; ?output=pdf is "
+            "rendered in the background: 202 with the job until the file is ready, then the PDF."
+        ),
+        responses={200: "CSV, NDJSON or PDF file", 202: "PDF rendering", 400: "Invalid range or output."},
+        tags=["Wallet Operations"],
+    )
+    @action(detail=False, methods=['get'], url_path='statement')
+    def statement(self, request):
+        output = request.query_params.get('output', 'csv')
+        try:
+            start, end = statements.parse_range(request.query_params)
+        except ValueError:
+            return Response(
+                {"detail": "start and end must be YYYY-MM-DD dates with start <= end."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        wallet = get_object_or_404(Wallet.objects.only('id'), user=request.user)
+        filename = f"statement_{start:%Y%m%d}_{end:%Y%m%d}"
+
+        if output == 'pdf':
+            return self._statement_pdf(request, wallet, start, end, filename)
+        if output not in ('csv', 'ndjson'):
+            return Response({"detail": "output must be csv, ndjson or pdf."}, status=status.HTTP_400_BAD_REQUEST)
+
+        statement = statements.Statement(wallet, start, end)
+        if output == 'csv':
+            response = StreamingHttpResponse(statement.csv_lines(), content_type='text/csv')
+        else:
+            response = StreamingHttpResponse(statement.ndjson_lines(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+        return response
+
+    def _statement_pdf(self, request, wallet, start, end, filename):
+        last_id = statements.last_transaction_id(wallet, end)
+        path = statements.pdf_path(wallet.pk, start, end, last_id)
+        if default_storage.exists(path):
+            return FileResponse(
+                default_storage.open(path, 'rb'),
+                as_attachment=True,
+                filename=f"{filename}.pdf",
+                content_type='application/pdf',
+            )
+
+        # Polling the same URL finds the queued job instead of adding another
+        job = render_statement_pdf.enqueue_once(
+            wallet_id=wallet.pk,
+            start=start.isoformat(),
+            end=end.isoformat(),
+            last_transaction_id=last_id,
+            base_url=request.build_absolute_uri('/'),
+        )
+        return Response(
+            {'job': job.pk, 'status': job.status, 'url': request.build_absolute_uri()},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @swagger_auto_schema(
+        operation_description="Deposit funds into the authenticated user's wallet. Supports ?fields=balance,version.",
         request_body=TopUpSerializer,
-        responses={200: WalletSerializer},
+        responses={200: WalletSerializer, 409: "Concurrent write conflict; retry."},
         tags=["Wallet Operations"],
     )
     @action(detail=False, methods=['post'], url_path='top-up')
-    @transaction.atomic
+    @idempotent('wallet-top-up')
     def top_up(self, request):
-        wallet = Wallet.objects.select_for_update().get(user=request.user)
         ser = TopUpSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
-        amount = ser.validated_data['amount']
-
-        wallet.balance += amount
-        wallet.save()
-
-        Transaction.objects.create(
-            wallet=wallet,
-            transaction_type=Transaction.TOPUP,
-            amount=amount,
-            description='Wallet top-up'
-        )
-
-        out = WalletSerializer(wallet, context={'request': request})
-        return Response(out.data, status=status.HTTP_200_OK)
+        return self._move(request, ser.validated_data['amount'], Transaction.TOPUP, 'Wallet top-up')
 
     @swagger_auto_schema(
-        operation_description="Withdraw funds from the authenticated user's wallet.",
+        operation_description="Withdraw funds from the authenticated user's wallet. Supports ?fields=balance,version.",
         request_body=WithdrawSerializer,
-        responses={200: WalletSerializer, 400: "Insufficient funds."},
+        responses={200: WalletSerializer, 400: "Insufficient funds.", 409: "Concurrent write conflict; retry."},
         tags=["Wallet Operations"],
     )
     @action(detail=False, methods=['post'], url_path='withdraw')
-    @transaction.atomic
+    @idempotent('wallet-withdraw')
     def withdraw(self, request):
-        wallet = Wallet.objects.select_for_update().get(user=request.user)
         ser = WithdrawSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
-        amount = ser.validated_data['amount']
+        return self._move(request, ser.validated_data['amount'], Transaction.WITHDRAW, 'Wallet withdrawal')
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Agents only: move funds from the authenticated agent's wallet to up to "
+            "BULK_TRANSFER_MAX_LINES wallets, given as {recipient: phone number, amount} lines. "
+            "Lines with an unknown recipient fail on their own; the rest are applied together, "
+            "or not at all when the wallet cannot cover their total."
+        ),
+        request_body=BulkTransferSerializer,
+        responses={
+            200: BulkTransferResultSerializer,
+            400: "Invalid lines or insufficient funds.",
+            403: "Not an agent.",
+        },
+        tags=["Wallet Operations"],
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk-transfer',
+        permission_classes=[permissions.IsAuthenticated, IsAgent],
+    )
+    @idempotent('wallet-bulk-transfer')
+    def bulk_transfer(self, request):
+        ser = BulkTransferSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        wallet = self.get_object()
+        lines = [(line['recipient'], line['amount']) for line in ser.validated_data['lines']]
 
-        if wallet.balance < amount:
+        try:
+            result = transfers.distribute(wallet.pk, lines)
+        except InsufficientFunds:
             return Response(
                 {"detail": "Insufficient funds."},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        return Response(BulkTransferResultSerializer(result).data, status=status.HTTP_200_OK)
+
+    def _move(self, request, amount, transaction_type, description):
+        """
+        Credits or debits the wallet and records the Transaction in one
+        short DB transaction; input is validated before it starts. With
+        WALLET_CONCURRENCY = 'optimistic' the balance is written with a
+        version check and retried on conflict instead of the conditional
+        F() update.
+        """
+        wallet = self.get_object()
+        debit = transaction_type == Transaction.WITHDRAW
 
-        wallet.balance -= amount
-        wallet.save()
+        def record(balance_after):
+            Transaction.objects.create(
+                wallet=wallet,
+                transaction_type=transaction_type,
+                amount=amount,
+                balance_after=balance_after,
+                description=description
+            )
+            wallet.refresh_from_db(fields=['balance', 'version', 'updated_at'])
 
-        Transaction.objects.create(
-            wallet=wallet,
-            transaction_type=Transaction.WITHDRAW,
-            amount=amount,
-            description='Wallet withdrawal'
-        )
+        try:
+            if concurrency_mode() == OPTIMISTIC:
+                apply_versioned(wallet.pk, amount, debit=debit, record=record)
+            else:
+                with transaction.atomic():
+                    record(debit_wallet(wallet.pk, amount) if debit else credit_wallet(wallet.pk, amount))
+        except InsufficientFunds:
+            return Response(
+                {"detail": "Insufficient funds."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except WriteConflict as exc:
+            # Raised, not returned, so an Idempotency-Key claim rolls back and the same key can retry
+            raise Conflict(str(exc))
 
         out = WalletSerializer(wallet, context={'request': request})
         return Response(out.data, status=status.HTTP_200_OK)
@@ -137,15 +367,16 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
     """
     list:
       GET /transactions/      → list, filter, search, paginate
+                                (?pagination=cursor for keyset pages)
     retrieve:
       GET /transactions/{id}/ → detail
     """
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = LimitOffsetPagination
+    pagination_class = TransactionPagination
     filter_backends = (
         DjangoFilterBackend,
-        filters.SearchFilter,
+        FullTextSearchFilter,
         filters.OrderingFilter,
     )
     filterset_class = TransactionFilter
@@ -162,6 +393,7 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
         responses={200: TransactionSerializer(many=True)},
         tags=["Transaction History"],
     )
+    @conditional_get(wallet_validator)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -170,6 +402,7 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
         responses={200: TransactionSerializer},
         tags=["Transaction History"],
     )
+    @conditional_get(wallet_validator)
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
@@ -197,23 +430,26 @@ def monnify_webhook(request):
 
     if event_type == 'SUCCESSFUL_TRANSACTION':
         account_number = payment_info.get('accountDetails', {}).get('accountNumber')
-        amount = Decimal(payment_info.get('amount', 0))
-
-        try:
-            wallet = Wallet.objects.get(account_number=account_number)
-            wallet.balance += amount
-            wallet.save(update_fields=['balance'])
-
-            Transaction.objects.create(
-                wallet=wallet,
-                transaction_type=Transaction.TOPUP,
-                amount=amount,
-                description='Monnify webhook credit'
-            )
-
-            return JsonResponse({'status': 'wallet credited'}, status=200)
-        except Wallet.DoesNotExist:
-            return JsonResponse({'status': 'wallet not found'}, status=404)
+        amount = webhooks.parse_amount(payment_info.get('amount'))
+        if amount is None:
+            return JsonResponse({'status': 'invalid amount'}, status=400)
+        # Monnify redelivers events; the inbox's unique reference makes them idempotent
+        reference = payment_info.get('transactionReference') or f"sha256:{fingerprint(request.body)}"
+
+        with transaction.atomic():
+            event, created = webhooks.store_event(reference, event_type, account_number, amount, payload)
+            if not created:
+                return JsonResponse({'status': 'duplicate'}, status=200)
+
+            if getattr(settings, 'MONNIFY_WEBHOOK_INBOX', True):
+                # Acknowledge now; apply_webhook_events credits wallets in batches
+                apply_webhook_events.enqueue_once()
+                return JsonResponse({'status': 'received'}, status=200)
+
+            webhooks.apply_events([event])
+        if event.status != event.APPLIED:
+            return JsonResponse({'status': event.error}, status=404)
+        return JsonResponse({'status': 'wallet credited'}, status=200)
 
     return JsonResponse({'status': 'ignored'}, status=200)
 
@@ -222,25 +458,32 @@ def monnify_webhook(request):
 # -------------------------------------------------------------------
 def export_dashboard_pdf(request):
     """
-    Render the wallet dashboard as a PDF.
+    Queue a PDF render of the wallet dashboard, or with `?job=<id>` poll it:
+    202 while rendering, the PDF once done.
     """
-    context = {
-        'start_date': '2024-01-01',
-        'end_date': '2024-04-24',
-        'total_wallets': 50,
-        'total_balance': 25000,
-        'range_count': 120,
-        'range_volume': 18000,
-        'today_count': 5,
-        'today_volume': 700,
-        'chart_url': request.build_absolute_uri(static('chart.png')),
-        'now': timezone.now(),
-    }
-
-    html_string = render_to_string('dashboard_pdf.html', context)
-    html = HTML(string=html_string, base_url=request.build_absolute_uri('/'))
-    pdf_file = html.write_pdf()
+    job_id = request.GET.get('job')
+    if not job_id:
+        job = render_dashboard_pdf.enqueue(
+            params=request.GET.dict(),
+            base_url=request.build_absolute_uri('/'),
+        )
+    elif not job_id.isdigit():
+        raise Http404
+    else:
+        job = get_object_or_404(Job, pk=job_id, task=render_dashboard_pdf.name)
+        if job.status == Job.DONE:
+            return FileResponse(
+                default_storage.open(job.result['path'], 'rb'),
+                as_attachment=True,
+                filename='wallet_report.pdf',
+                content_type='application/pdf',
+            )
 
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename=wallet_report.pdf'
-    return response
\ No newline at end of file
+    body = {
+        'job': job.pk,
+        'status': job.status,
+        'url': request.build_absolute_uri(f"{request.path}?job={job.pk}"),
+    }
+    if job.status == Job.FAILED:
+        return JsonResponse(body, status=500)
+    return JsonResponse(body, status=202)